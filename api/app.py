@@ -1,14 +1,62 @@
 """FastAPI application entrypoint."""
 from __future__ import annotations
 
-from fastapi import FastAPI
+import time
+
+from fastapi import FastAPI, Request
+from fastapi.responses import PlainTextResponse
+
+from processing.metrics import REGISTRY
 
 from . import routes
+from .database import pool_metrics
+
+POOL_GAUGE = REGISTRY.gauge(
+    "echograph_db_pool_connections",
+    "Database pool connections by engine and state.",
+    ("engine", "state"),
+)
+REQUEST_SECONDS = REGISTRY.histogram(
+    "echograph_http_request_duration_seconds",
+    "API request latency by method, route template and status code.",
+    ("method", "route", "status"),
+)
 
 app = FastAPI(title="EchoGraph API", version="0.1.0")
 app.include_router(routes.router)
 
 
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    started = time.perf_counter()
+    response = await call_next(request)
+    route = request.scope.get("route")
+    REQUEST_SECONDS.observe(
+        time.perf_counter() - started,
+        method=request.method,
+        route=getattr(route, "path", "unmatched"),
+        status=str(response.status_code),
+    )
+    return response
+
+
 @app.get("/healthz")
 async def healthcheck() -> dict[str, str]:
     return {"status": "ok"}
+
+
+@app.get("/healthz/pool")
+async def pool_healthcheck() -> dict[str, dict[str, int | str]]:
+    return pool_metrics()
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics() -> PlainTextResponse:
+    for engine_name, snapshot in pool_metrics().items():
+        for state in ("checkedin", "checkedout", "overflow"):
+            if state in snapshot:
+                POOL_GAUGE.set(snapshot[state], engine=engine_name, state=state)
+    return PlainTextResponse(
+        REGISTRY.render_prometheus(),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
@@ -0,0 +1,212 @@
+"""Incrementally maintained match coverage per regulation, region and regulation type.
+
+``regulation_coverage`` holds the match counts of every active regulation section
+and ``coverage_summary`` their totals per ``(region, regulation_type)``, including how
+many regulations have at least one match and at least one approved match. Write
+paths report what they changed (``regulations_added``, ``regulations_retired`` and
+``matches_changed``) inside their own transaction, so dashboards read a handful of
+precomputed rows instead of aggregating the matches table. ``rebuild_coverage``
+recomputes both tables from scratch, e.g. after data was written outside the API.
+"""
+from __future__ import annotations
+
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Iterable, Sequence
+
+from sqlalchemy import case, delete, func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .models import CoverageSummary, Match, RegulationCoverage, RegulationSection
+
+COUNTS = ("matches", "pending", "approved")
+SUMMARY_COUNTS = ("regulations", "matched_regulations", "covered_regulations", *COUNTS)
+
+
+@dataclass(slots=True)
+class MatchChange:
+    """Status of one match before and after a write; None when it did not (or no longer) exist."""
+
+    regulation_id: int
+    before: str | None
+    after: str | None
+
+
+def _counts(status: str | None) -> tuple[int, int, int]:
+    return (int(status is not None), int(status == "pending"), int(status == "approved"))
+
+
+def _upsert(session: AsyncSession):
+    if session.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    return dialect_insert(CoverageSummary)
+
+
+async def _add_to_summary(
+    session: AsyncSession, deltas: dict[tuple[str, str], dict[str, int]]
+) -> None:
+    rows = [
+        {"region": region, "regulation_type": regulation_type, **dict.fromkeys(SUMMARY_COUNTS, 0)}
+        | counts
+        for (region, regulation_type), counts in deltas.items()
+        if any(counts.values())
+    ]
+    if not rows:
+        return
+    stmt = _upsert(session).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[CoverageSummary.region, CoverageSummary.regulation_type],
+        set_={
+            name: getattr(CoverageSummary, name) + getattr(stmt.excluded, name)
+            for name in SUMMARY_COUNTS
+        },
+    )
+    await session.execute(stmt)
+
+
+async def regulations_added(
+    session: AsyncSession, regulations: Sequence[RegulationSection]
+) -> None:
+    """Start tracking newly persisted (flushed) regulation sections."""
+
+    if not regulations:
+        return
+    await session.execute(
+        insert(RegulationCoverage),
+        [
+            {
+                "regulation_id": regulation.id,
+                "region": regulation.region,
+                "regulation_type": regulation.regulation_type,
+                **dict.fromkeys(COUNTS, 0),
+            }
+            for regulation in regulations
+        ],
+    )
+    deltas: dict[tuple[str, str], dict[str, int]] = defaultdict(lambda: defaultdict(int))
+    for regulation in regulations:
+        deltas[(regulation.region, regulation.regulation_type)]["regulations"] += 1
+    await _add_to_summary(session, deltas)
+
+
+async def regulations_retired(session: AsyncSession, regulation_ids: Sequence[int]) -> None:
+    """Stop counting superseded regulation sections and everything matched to them."""
+
+    if not regulation_ids:
+        return
+    rows = (
+        await session.execute(
+            delete(RegulationCoverage)
+            .where(RegulationCoverage.regulation_id.in_(regulation_ids))
+            .returning(
+                RegulationCoverage.region,
+                RegulationCoverage.regulation_type,
+                *(getattr(RegulationCoverage, name) for name in COUNTS),
+            )
+        )
+    ).all()
+    deltas: dict[tuple[str, str], dict[str, int]] = defaultdict(lambda: defaultdict(int))
+    for region, regulation_type, matches, pending, approved in rows:
+        delta = deltas[(region, regulation_type)]
+        delta["regulations"] -= 1
+        delta["matched_regulations"] -= int(matches > 0)
+        delta["covered_regulations"] -= int(approved > 0)
+        delta["matches"] -= matches
+        delta["pending"] -= pending
+        delta["approved"] -= approved
+    await _add_to_summary(session, deltas)
+
+
+async def matches_changed(session: AsyncSession, changes: Iterable[MatchChange]) -> None:
+    """Apply created, deleted and re-reviewed matches to the counters.
+
+    Matches of regulations that are not tracked (superseded) are ignored.
+    """
+
+    per_regulation: dict[int, list[int]] = defaultdict(lambda: [0, 0, 0])
+    for change in changes:
+        before, after = _counts(change.before), _counts(change.after)
+        totals = per_regulation[change.regulation_id]
+        for index in range(3):
+            totals[index] += after[index] - before[index]
+
+    deltas: dict[tuple[str, str], dict[str, int]] = defaultdict(lambda: defaultdict(int))
+    for regulation_id, (matches, pending, approved) in sorted(per_regulation.items()):
+        if not (matches or pending or approved):
+            continue
+        row = (
+            await session.execute(
+                update(RegulationCoverage)
+                .where(RegulationCoverage.regulation_id == regulation_id)
+                .values(
+                    matches=RegulationCoverage.matches + matches,
+                    pending=RegulationCoverage.pending + pending,
+                    approved=RegulationCoverage.approved + approved,
+                )
+                .returning(
+                    RegulationCoverage.region,
+                    RegulationCoverage.regulation_type,
+                    RegulationCoverage.matches,
+                    RegulationCoverage.approved,
+                )
+                .execution_options(synchronize_session=False)
+            )
+        ).first()
+        if row is None:
+            continue
+        region, regulation_type, matches_after, approved_after = row
+        delta = deltas[(region, regulation_type)]
+        delta["matched_regulations"] += int(matches_after > 0) - int(matches_after - matches > 0)
+        delta["covered_regulations"] += int(approved_after > 0) - int(
+            approved_after - approved > 0
+        )
+        delta["matches"] += matches
+        delta["pending"] += pending
+        delta["approved"] += approved
+    await _add_to_summary(session, deltas)
+
+
+async def rebuild_coverage(session: AsyncSession) -> int:
+    """Recompute both tables from the sections and matches; returns regulations tracked."""
+
+    await session.execute(delete(CoverageSummary))
+    await session.execute(delete(RegulationCoverage))
+    counts = (
+        select(
+            Match.regulation_id,
+            func.count().label("matches"),
+            func.sum(case((Match.status == "pending", 1), else_=0)).label("pending"),
+            func.sum(case((Match.status == "approved", 1), else_=0)).label("approved"),
+        )
+        .group_by(Match.regulation_id)
+        .subquery()
+    )
+    await session.execute(
+        insert(RegulationCoverage).from_select(
+            ["regulation_id", "region", "regulation_type", *COUNTS],
+            select(
+                RegulationSection.id,
+                RegulationSection.region,
+                RegulationSection.regulation_type,
+                *(func.coalesce(getattr(counts.c, name), 0) for name in COUNTS),
+            )
+            .outerjoin(counts, counts.c.regulation_id == RegulationSection.id)
+            .where(RegulationSection.superseded_at.is_(None)),
+        )
+    )
+    await session.execute(
+        insert(CoverageSummary).from_select(
+            ["region", "regulation_type", *SUMMARY_COUNTS],
+            select(
+                RegulationCoverage.region,
+                RegulationCoverage.regulation_type,
+                func.count(),
+                func.sum(case((RegulationCoverage.matches > 0, 1), else_=0)),
+                func.sum(case((RegulationCoverage.approved > 0, 1), else_=0)),
+                *(func.sum(getattr(RegulationCoverage, name)) for name in COUNTS),
+            ).group_by(RegulationCoverage.region, RegulationCoverage.regulation_type),
+        )
+    )
+    return await session.scalar(select(func.count()).select_from(RegulationCoverage)) or 0
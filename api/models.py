@@ -3,7 +3,18 @@ from __future__ import annotations
 
 from datetime import datetime
 
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, String, Text
+from sqlalchemy import (
+    JSON,
+    Column,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Text,
+    func,
+    literal,
+)
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
 
@@ -11,7 +22,42 @@ class Base(DeclarativeBase):
     pass
 
 
-class CloudGuidelineSection(Base):
+FULL_TEXT_CONFIG = "english"
+
+
+def full_text_vector(column):
+    """``to_tsvector`` expression matching the GIN indexes declared below."""
+
+    return func.to_tsvector(literal(FULL_TEXT_CONFIG, literal_execute=True), column)
+
+
+def _full_text_index(name: str, column) -> Index:
+    """GIN index over ``to_tsvector(body)``; only emitted on PostgreSQL."""
+
+    return Index(name, full_text_vector(column), postgresql_using="gin").ddl_if(
+        dialect="postgresql"
+    )
+
+
+class SectionRevisionMixin:
+    """Columns used to diff re-uploaded documents section by section.
+
+    ``duplicate_spans`` lists the offsets of near-identical segments that were
+    collapsed into this section during upload, as ``{"start", "end"}`` objects.
+    """
+
+    document_key: Mapped[str | None] = mapped_column(String(256), nullable=True, index=True)
+    content_hash: Mapped[str | None] = mapped_column(String(64), nullable=True, index=True)
+    version: Mapped[int] = mapped_column(Integer, default=1)
+    span_start: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    span_end: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    duplicate_spans: Mapped[list[dict[str, int]] | None] = mapped_column(
+        JSON(none_as_null=True), nullable=True
+    )
+    superseded_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+
+
+class CloudGuidelineSection(SectionRevisionMixin, Base):
     __tablename__ = "cloud_guideline_sections"
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
@@ -22,20 +68,24 @@ class CloudGuidelineSection(Base):
 
     matches: Mapped[list["Match"]] = relationship(back_populates="guideline")
 
+    __table_args__ = (_full_text_index("ix_cloud_guideline_sections_body_fts", body),)
+
 
-class RegulationSection(Base):
+class RegulationSection(SectionRevisionMixin, Base):
     __tablename__ = "regulation_sections"
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     external_id: Mapped[str] = mapped_column(String, unique=True, index=True)
     title: Mapped[str] = mapped_column(String(512))
     body: Mapped[str] = mapped_column(Text)
-    region: Mapped[str] = mapped_column(String(64))
-    regulation_type: Mapped[str] = mapped_column(String(64))
+    region: Mapped[str] = mapped_column(String(64), index=True)
+    regulation_type: Mapped[str] = mapped_column(String(64), index=True)
     language: Mapped[str] = mapped_column(String(12), default="en")
 
     matches: Mapped[list["Match"]] = relationship(back_populates="regulation")
 
+    __table_args__ = (_full_text_index("ix_regulation_sections_body_fts", body),)
+
 
 class Match(Base):
     __tablename__ = "matches"
@@ -48,6 +98,7 @@ class Match(Base):
     rationale: Mapped[str] = mapped_column(Text)
     guideline_excerpt: Mapped[str | None] = mapped_column(Text, nullable=True)
     regulation_excerpt: Mapped[str | None] = mapped_column(Text, nullable=True)
+    # Match spans are character offsets into the matched section's ``body``.
     guideline_span_start: Mapped[int | None] = mapped_column(Integer, nullable=True)
     guideline_span_end: Mapped[int | None] = mapped_column(Integer, nullable=True)
     regulation_span_start: Mapped[int | None] = mapped_column(Integer, nullable=True)
@@ -55,8 +106,43 @@ class Match(Base):
     status: Mapped[str] = mapped_column(String(32), default="pending")
     reviewer: Mapped[str | None] = mapped_column(String(128), nullable=True)
     reviewer_notes: Mapped[str | None] = mapped_column(Text, nullable=True)
+    # Review queue lease: who is working on a pending match and until when.
+    claimed_by: Mapped[str | None] = mapped_column(String(128), nullable=True)
+    claim_expires_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
     updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     guideline: Mapped[CloudGuidelineSection] = relationship(back_populates="matches")
     regulation: Mapped[RegulationSection] = relationship(back_populates="matches")
+
+    __table_args__ = (Index("ix_matches_status_claim_expires_at", status, claim_expires_at),)
+
+
+class RegulationCoverage(Base):
+    """Match counts of one active regulation section, maintained by ``api.coverage``."""
+
+    __tablename__ = "regulation_coverage"
+
+    regulation_id: Mapped[int] = mapped_column(
+        ForeignKey("regulation_sections.id"), primary_key=True
+    )
+    region: Mapped[str] = mapped_column(String(64))
+    regulation_type: Mapped[str] = mapped_column(String(64))
+    matches: Mapped[int] = mapped_column(Integer, default=0)
+    pending: Mapped[int] = mapped_column(Integer, default=0)
+    approved: Mapped[int] = mapped_column(Integer, default=0)
+
+
+class CoverageSummary(Base):
+    """Coverage of active regulation sections per region and regulation type."""
+
+    __tablename__ = "coverage_summary"
+
+    region: Mapped[str] = mapped_column(String(64), primary_key=True)
+    regulation_type: Mapped[str] = mapped_column(String(64), primary_key=True)
+    regulations: Mapped[int] = mapped_column(Integer, default=0)
+    matched_regulations: Mapped[int] = mapped_column(Integer, default=0)
+    covered_regulations: Mapped[int] = mapped_column(Integer, default=0)  # >= 1 approved match
+    matches: Mapped[int] = mapped_column(Integer, default=0)
+    pending: Mapped[int] = mapped_column(Integer, default=0)
+    approved: Mapped[int] = mapped_column(Integer, default=0)
@@ -0,0 +1,339 @@
+"""Recompute the matches of every active guideline, e.g. after a model or threshold change.
+
+Section vectors are encoded once (through the upload embedding cache) and saved in
+the checkpoint directory. Each block of guidelines is then scored against all
+regulations with ``processing.matching.tiled_top_k``, and its matches are written
+in one transaction:
+- pending matches still in the top ``k`` get the new score;
+- new pairs are inserted in bulk;
+- pending matches that dropped out are deleted.
+
+Reviewed matches (any status other than ``pending``) and pending matches under a
+live review claim are never changed. After each block the checkpoint records the
+next row, so re-running the same command after a crash resumes there.
+
+Usage::
+
+    python -m api.rematch --top-k 5 --threshold 0.55 --checkpoint data/rematch
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import sys
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Callable, Sequence
+
+import numpy as np
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from processing.cleanup import content_hash
+from processing.matching import RelationshipMatcher, tiled_top_k
+from processing.metrics import MATCHES_TOTAL, stage_timer
+
+from .coverage import MatchChange, matches_changed
+from .models import CloudGuidelineSection, Match, RegulationSection
+from .review_queue import claimed_by_other
+
+
+@dataclass(slots=True)
+class RematchConfig:
+    top_k: int = 5
+    threshold: float = 0.55
+    checkpoint_dir: Path = Path("data/rematch")
+    tile_rows: int = 1024
+    tile_cols: int = 16384
+    workers: int = 1
+
+
+@dataclass(slots=True)
+class RematchReport:
+    guidelines: int = 0
+    regulations: int = 0
+    resumed_from: int = 0
+    created: int = 0
+    updated: int = 0
+    removed: int = 0
+    kept: int = 0  # reviewed or claimed matches that are still among the top k
+    seconds: float = 0.0
+
+
+def _default_encode(texts: list[str]) -> np.ndarray:
+    from .upload import encode_sections
+
+    return encode_sections(texts).vectors
+
+
+def _signature(*parts: object) -> str:
+    return hashlib.sha256(json.dumps(parts, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class Checkpoint:
+    """Next guideline row and cached vectors of an interrupted run, in ``directory``."""
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = Path(directory)
+        self.state_path = self.directory / "rematch.json"
+        self.vectors_path = self.directory / "vectors.npz"
+
+    def next_row(self, signature: str) -> int:
+        try:
+            state = json.loads(self.state_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return 0
+        return state["next_row"] if state.get("signature") == signature else 0
+
+    def save(self, signature: str, next_row: int) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        temporary = self.state_path.with_suffix(".tmp")
+        temporary.write_text(
+            json.dumps({"signature": signature, "next_row": next_row}), encoding="utf-8"
+        )
+        os.replace(temporary, self.state_path)
+
+    def vectors(
+        self, signature: str, encode: Callable[[], tuple[np.ndarray, np.ndarray]]
+    ) -> tuple[np.ndarray, np.ndarray]:
+        try:
+            with np.load(self.vectors_path) as saved:
+                if str(saved["signature"]) == signature:
+                    return saved["guidelines"], saved["regulations"]
+        except (OSError, KeyError, ValueError):
+            pass
+        guidelines, regulations = encode()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        temporary = self.vectors_path.with_name("vectors.tmp.npz")
+        np.savez(
+            temporary, signature=signature, guidelines=guidelines, regulations=regulations
+        )
+        os.replace(temporary, self.vectors_path)
+        return guidelines, regulations
+
+    def clear(self) -> None:
+        self.state_path.unlink(missing_ok=True)
+        self.vectors_path.unlink(missing_ok=True)
+
+
+async def rematch_all(
+    session_factory: async_sessionmaker[AsyncSession],
+    config: RematchConfig | None = None,
+    *,
+    encode: Callable[[list[str]], np.ndarray] = _default_encode,
+    encoder_name: str = "upload",
+    progress: Callable[[int, int], None] | None = None,
+) -> RematchReport:
+    """Recompute the top ``k`` regulations of every active guideline section.
+
+    ``encode`` returns one L2-normalised vector per text; ``encoder_name`` identifies
+    it in the checkpoint, so vectors of another model are never reused.
+    """
+
+    config = config or RematchConfig()
+    started = time.perf_counter()
+    async with session_factory() as session:
+        guidelines = (
+            await session.scalars(
+                select(CloudGuidelineSection)
+                .where(CloudGuidelineSection.superseded_at.is_(None))
+                .order_by(CloudGuidelineSection.id)
+            )
+        ).all()
+        regulations = (
+            await session.scalars(
+                select(RegulationSection)
+                .where(RegulationSection.superseded_at.is_(None))
+                .order_by(RegulationSection.id)
+            )
+        ).all()
+    report = RematchReport(guidelines=len(guidelines), regulations=len(regulations))
+    if not guidelines:
+        return report
+
+    sections = [
+        [(section.id, content_hash(section.body)) for section in group]
+        for group in (guidelines, regulations)
+    ]
+    vector_signature = _signature(encoder_name, sections)
+    run_signature = _signature(vector_signature, config.top_k, config.threshold)
+    checkpoint = Checkpoint(config.checkpoint_dir)
+    report.resumed_from = checkpoint.next_row(run_signature)
+
+    def encode_all() -> tuple[np.ndarray, np.ndarray]:
+        with stage_timer("encode"):
+            return (
+                np.asarray(encode([section.body for section in guidelines]), dtype=np.float32),
+                np.asarray(encode([section.body for section in regulations]), dtype=np.float32),
+            )
+
+    guideline_vectors, regulation_vectors = await asyncio.to_thread(
+        checkpoint.vectors, vector_signature, encode_all
+    )
+    blocks = tiled_top_k(
+        guideline_vectors,
+        regulation_vectors,
+        config.top_k,
+        start_row=report.resumed_from,
+        tile_rows=config.tile_rows,
+        tile_cols=config.tile_cols,
+        workers=config.workers,
+    )
+    while True:
+        block = await asyncio.to_thread(next, blocks, None)
+        if block is None:
+            break
+        start, indices, scores = block
+        rows = guidelines[start : start + len(indices)]
+        candidates = {
+            (guideline.id, regulations[index].id): (guideline, regulations[index], float(score))
+            for guideline, row_indices, row_scores in zip(rows, indices, scores, strict=True)
+            for index, score in zip(row_indices, row_scores, strict=True)
+            if score >= config.threshold
+        }
+        guideline_ids = [guideline.id for guideline in rows]
+        async with session_factory() as session:
+            with stage_timer("db_persist"):
+                await _write_block(session, guideline_ids, candidates, report)
+        checkpoint.save(run_signature, start + len(rows))
+        if progress is not None:
+            progress(start + len(rows), len(guidelines))
+
+    checkpoint.clear()
+    MATCHES_TOTAL.inc(report.created, source="rematch")
+    report.seconds = round(time.perf_counter() - started, 3)
+    return report
+
+
+async def _write_block(
+    session: AsyncSession,
+    guideline_ids: Sequence[int],
+    candidates: dict[tuple[int, int], tuple[CloudGuidelineSection, RegulationSection, float]],
+    report: RematchReport,
+) -> None:
+    from .upload import _clip_excerpt
+
+    existing = await session.execute(
+        select(
+            Match.id,
+            Match.guideline_id,
+            Match.regulation_id,
+            Match.status,
+            claimed_by_other(None).label("claimed"),
+        )
+        .where(Match.guideline_id.in_(guideline_ids))
+        .with_for_update()
+    )
+    updates: list[dict[str, object]] = []
+    stale: list[tuple[int, int]] = []
+    for match_id, guideline_id, regulation_id, status, claimed in existing:
+        candidate = candidates.pop((guideline_id, regulation_id), None)
+        if status != "pending" or claimed:
+            # Reviewed matches, and pending ones a reviewer is working on, stay as they are.
+            report.kept += candidate is not None
+        elif candidate is None:
+            stale.append((match_id, regulation_id))
+        else:
+            score = candidate[2]
+            confidence = RelationshipMatcher.confidence_from_score(score)
+            updates.append({"id": match_id, "score": score, "confidence": confidence})
+
+    inserts = [
+        {
+            "guideline_id": guideline.id,
+            "regulation_id": regulation.id,
+            "score": score,
+            "confidence": RelationshipMatcher.confidence_from_score(score),
+            "rationale": RelationshipMatcher.summarize_rationale(
+                {"id": guideline.external_id, "title": guideline.title},
+                {"id": regulation.external_id, "title": regulation.title},
+            ),
+            "guideline_excerpt": _clip_excerpt(guideline.body),
+            "regulation_excerpt": _clip_excerpt(regulation.body),
+            "guideline_span_start": 0,
+            "guideline_span_end": len(guideline.body),
+            "status": "pending",
+        }
+        for guideline, regulation, score in candidates.values()
+    ]
+    if stale:
+        await session.execute(
+            delete(Match)
+            .where(Match.id.in_([match_id for match_id, _ in stale]))
+            .execution_options(synchronize_session=False)
+        )
+    if updates:
+        await session.execute(update(Match), updates)
+    if inserts:
+        await session.execute(insert(Match), inserts)
+    await matches_changed(
+        session,
+        [MatchChange(regulation_id, "pending", None) for _, regulation_id in stale]
+        + [MatchChange(row["regulation_id"], None, "pending") for row in inserts],
+    )
+    await session.commit()
+    report.removed += len(stale)
+    report.updated += len(updates)
+    report.created += len(inserts)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    defaults = RematchConfig()
+    parser = argparse.ArgumentParser(
+        description="Recompute guideline/regulation matches; reviewed matches are kept"
+    )
+    parser.add_argument("--top-k", type=int, default=defaults.top_k)
+    parser.add_argument("--threshold", type=float, default=defaults.threshold)
+    parser.add_argument(
+        "--checkpoint",
+        type=Path,
+        default=defaults.checkpoint_dir,
+        help="Directory for resume state and cached vectors",
+    )
+    parser.add_argument(
+        "--restart", action="store_true", help="Ignore the checkpoint of an interrupted run"
+    )
+    parser.add_argument("--tile-rows", type=int, default=defaults.tile_rows)
+    parser.add_argument("--tile-cols", type=int, default=defaults.tile_cols)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=defaults.workers,
+        help="Blocks scored in parallel; BLAS threads already parallelize each product",
+    )
+    return parser
+
+
+def main(argv: list[str] | None = None) -> None:
+    from .database import SessionLocal
+
+    args = build_parser().parse_args(argv)
+    config = RematchConfig(
+        top_k=args.top_k,
+        threshold=args.threshold,
+        checkpoint_dir=args.checkpoint,
+        tile_rows=args.tile_rows,
+        tile_cols=args.tile_cols,
+        workers=args.workers,
+    )
+    if args.restart:
+        Checkpoint(config.checkpoint_dir).clear()
+    started = time.perf_counter()
+
+    def progress(done: int, total: int) -> None:
+        elapsed = time.perf_counter() - started
+        print(
+            f"rematch: {done}/{total} guidelines ({done / total:.1%}), {elapsed:.0f}s elapsed",
+            file=sys.stderr,
+        )
+
+    report = asyncio.run(rematch_all(SessionLocal, config, progress=progress))
+    print(json.dumps(asdict(report), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""Lease-based work queue that hands pending matches to reviewers.
+
+A claim picks the most uncertain pending matches (confidence closest to 0.5) that
+nobody holds, or whose lease has expired, and stamps them with the reviewer and a
+lease expiry in a single UPDATE. On PostgreSQL the candidate rows are selected
+``FOR UPDATE SKIP LOCKED``, so concurrent claims neither wait for each other nor
+return the same rows. SQLite ignores the clause but runs the statement under its
+database-wide write lock, which serializes claims instead.
+"""
+from __future__ import annotations
+
+import os
+from datetime import datetime, timedelta
+from typing import Sequence
+
+from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .models import Match
+
+REVIEW_LEASE_SECONDS = float(os.getenv("REVIEW_LEASE_SECONDS") or 900)
+# Most uncertain first; ties go to the oldest match.
+PRIORITY = (func.abs(Match.confidence - 0.5), Match.id)
+
+
+def _claimable(now: datetime):
+    return and_(
+        Match.status == "pending",
+        or_(Match.claim_expires_at.is_(None), Match.claim_expires_at < now),
+    )
+
+
+async def claim_matches(
+    session: AsyncSession,
+    reviewer: str,
+    *,
+    limit: int,
+    lease_seconds: float = REVIEW_LEASE_SECONDS,
+    now: datetime | None = None,
+) -> tuple[list[int], datetime]:
+    """Lease up to ``limit`` pending matches to ``reviewer``; returns their ids and expiry."""
+
+    now = now or datetime.utcnow()
+    expires_at = now + timedelta(seconds=lease_seconds)
+    candidates = (
+        select(Match.id)
+        .where(_claimable(now))
+        .order_by(*PRIORITY)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    stmt = (
+        update(Match)
+        .where(Match.id.in_(candidates), _claimable(now))
+        .values(claimed_by=reviewer, claim_expires_at=expires_at)
+        .returning(Match.id)
+        .execution_options(synchronize_session=False)
+    )
+    match_ids = list((await session.scalars(stmt)).all())
+    await session.commit()
+    return match_ids, expires_at
+
+
+async def renew_claims(
+    session: AsyncSession,
+    reviewer: str,
+    match_ids: Sequence[int],
+    *,
+    lease_seconds: float = REVIEW_LEASE_SECONDS,
+    now: datetime | None = None,
+) -> tuple[list[int], datetime]:
+    """Extend ``reviewer``'s leases on ``match_ids``; returns the ids still held.
+
+    An expired lease can be renewed as long as no one else has claimed the match.
+    """
+
+    now = now or datetime.utcnow()
+    expires_at = now + timedelta(seconds=lease_seconds)
+    if not match_ids:
+        return [], expires_at
+    stmt = (
+        update(Match)
+        .where(
+            Match.id.in_(match_ids),
+            Match.claimed_by == reviewer,
+            Match.status == "pending",
+        )
+        .values(claim_expires_at=expires_at)
+        .returning(Match.id)
+        .execution_options(synchronize_session=False)
+    )
+    renewed = list((await session.scalars(stmt)).all())
+    await session.commit()
+    return renewed, expires_at
+
+
+async def release_claims(session: AsyncSession, reviewer: str, match_ids: Sequence[int]) -> int:
+    """Return ``reviewer``'s matches to the queue; returns how many were released."""
+
+    if not match_ids:
+        return 0
+    stmt = (
+        update(Match)
+        .where(Match.id.in_(match_ids), Match.claimed_by == reviewer)
+        .values(claimed_by=None, claim_expires_at=None)
+        .returning(Match.id)
+        .execution_options(synchronize_session=False)
+    )
+    released = len((await session.scalars(stmt)).all())
+    await session.commit()
+    return released
+
+
+def claimed_by_other(reviewer: str | None, now: datetime | None = None):
+    """SQL condition equivalent to ``held_by_other``; None matches every live claim."""
+
+    now = now or datetime.utcnow()
+    conditions = [
+        Match.claimed_by.is_not(None),
+        Match.claim_expires_at.is_not(None),
+        Match.claim_expires_at >= now,
+    ]
+    if reviewer is not None:
+        conditions.append(Match.claimed_by != reviewer)
+    return and_(*conditions)
+
+
+def held_by_other(match: Match, reviewer: str | None, now: datetime | None = None) -> bool:
+    """Whether someone other than ``reviewer`` holds a live lease on ``match``."""
+
+    now = now or datetime.utcnow()
+    return (
+        match.claimed_by is not None
+        and match.claimed_by != reviewer
+        and match.claim_expires_at is not None
+        and match.claim_expires_at >= now
+    )
@@ -2,21 +2,60 @@
 from __future__ import annotations
 
 import asyncio
+from datetime import datetime
 from pathlib import Path
 from uuid import uuid4
 
-from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File, Form
-from sqlalchemy import select
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, UploadFile, File, Form
+from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
 
-from .database import get_session
-from .models import CloudGuidelineSection, Match, RegulationSection
+from processing.corpus import CorpusError, default_corpus
+
+from .coverage import MatchChange, matches_changed, rebuild_coverage
+from .database import get_read_session, get_session
+from .models import (
+    CloudGuidelineSection,
+    CoverageSummary,
+    Match,
+    RegulationCoverage,
+    RegulationSection,
+)
 from .schemas import (
     GuidelineSection as GuidelineSchema,
+    CoverageRebuildResult,
+    CoverageSummary as CoverageSummarySchema,
+    MatchBulkUpdate,
+    MatchBulkUpdateResult,
     MatchDetail as MatchSchema,
     MatchUpdate,
+    RegulationCoverage as RegulationCoverageSchema,
     RegulationSection as RegulationSchema,
+    ReviewClaim,
+    ReviewClaimRequest,
+    ReviewLeaseRequest,
+    ReviewReleaseResult,
+    SearchHit as SearchHitSchema,
+    SearchResults,
+    TextSpan,
+)
+from .review_queue import (
+    PRIORITY,
+    REVIEW_LEASE_SECONDS,
+    claim_matches,
+    claimed_by_other,
+    held_by_other,
+    release_claims,
+    renew_claims,
+)
+from .search import search_sections
+from .serialization import (
+    guideline_select,
+    json_response,
+    match_detail_select,
+    nested_rows_to_dicts,
+    regulation_select,
+    rows_to_dicts,
 )
 from .upload import ingest_uploaded_document
 
@@ -28,54 +67,156 @@ except ModuleNotFoundError:  # pragma: no cover - triggered in limited test envs
     MULTIPART_AVAILABLE = False
 
 router = APIRouter()
+# Longest range one excerpt request may return.
+MAX_EXCERPT_CHARS = 100_000
 
 
 @router.get("/guidelines", response_model=list[GuidelineSchema])
 async def list_guidelines(
     language: str | None = Query(None),
-    session: AsyncSession = Depends(get_session),
-) -> list[GuidelineSchema]:
-    stmt = select(CloudGuidelineSection)
+    session: AsyncSession = Depends(get_read_session),
+) -> Response:
+    stmt = guideline_select().where(CloudGuidelineSection.superseded_at.is_(None))
     if language:
         stmt = stmt.filter(CloudGuidelineSection.language == language)
-    result = await session.scalars(stmt)
-    return [GuidelineSchema.model_validate(row) for row in result.all()]
+    result = await session.execute(stmt)
+    return json_response(rows_to_dicts(result.keys(), result.all()))
 
 
 @router.get("/regulations", response_model=list[RegulationSchema])
 async def list_regulations(
     region: str | None = Query(None),
     regulation_type: str | None = Query(None),
-    session: AsyncSession = Depends(get_session),
-) -> list[RegulationSchema]:
-    stmt = select(RegulationSection)
+    session: AsyncSession = Depends(get_read_session),
+) -> Response:
+    stmt = regulation_select().where(RegulationSection.superseded_at.is_(None))
     if region:
         stmt = stmt.filter(RegulationSection.region == region)
     if regulation_type:
         stmt = stmt.filter(RegulationSection.regulation_type == regulation_type)
-    result = await session.scalars(stmt)
-    return [RegulationSchema.model_validate(row) for row in result.all()]
+    result = await session.execute(stmt)
+    return json_response(rows_to_dicts(result.keys(), result.all()))
+
+
+@router.get("/search", response_model=SearchResults)
+async def search(
+    q: str = Query(..., min_length=1),
+    scope: str = Query("all"),
+    language: str | None = Query(None),
+    hybrid: bool = Query(False),
+    alpha: float = Query(0.5, ge=0.0, le=1.0),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    session: AsyncSession = Depends(get_read_session),
+) -> SearchResults:
+    scopes = {
+        "all": ("guideline", "regulation"),
+        "guideline": ("guideline",),
+        "regulation": ("regulation",),
+    }
+    if scope not in scopes:
+        raise HTTPException(
+            status_code=400, detail="scope must be 'all', 'guideline' or 'regulation'"
+        )
+    page = await search_sections(
+        session,
+        query=q,
+        kinds=scopes[scope],
+        language=language,
+        limit=limit,
+        offset=offset,
+        hybrid=hybrid,
+        alpha=alpha,
+    )
+    return SearchResults(
+        query=q,
+        total=page.total,
+        limit=limit,
+        offset=offset,
+        hits=[
+            SearchHitSchema(
+                kind=hit.kind,
+                section_id=hit.section.id,
+                external_id=hit.section.external_id,
+                title=hit.section.title,
+                language=hit.section.language,
+                score=hit.score,
+                lexical_score=hit.lexical_score,
+                semantic_score=hit.semantic_score,
+                highlights=[TextSpan(start=start, end=end) for start, end in hit.highlights or []],
+            )
+            for hit in page.hits
+        ],
+    )
 
 
 @router.get("/guidelines/{guideline_id}/matches", response_model=list[MatchSchema])
 async def list_matches(
     guideline_id: int,
     status: str | None = Query(None),
-    session: AsyncSession = Depends(get_session),
-) -> list[MatchSchema]:
-    stmt = (
-        select(Match)
-        .where(Match.guideline_id == guideline_id)
-        .options(
-            selectinload(Match.guideline),
-            selectinload(Match.regulation),
-        )
-    )
+    session: AsyncSession = Depends(get_read_session),
+) -> Response:
+    stmt = match_detail_select().where(Match.guideline_id == guideline_id)
     if status:
         stmt = stmt.filter(Match.status == status)
-    result = await session.scalars(stmt)
-    matches = result.all()
-    return [MatchSchema.model_validate(row) for row in matches]
+    result = await session.execute(stmt)
+    return json_response(nested_rows_to_dicts(result.keys(), result.all()))
+
+
+@router.get("/regulations/{regulation_id}/matches", response_model=list[MatchSchema])
+async def list_regulation_matches(
+    regulation_id: int,
+    status: str | None = Query(None),
+    session: AsyncSession = Depends(get_read_session),
+) -> Response:
+    """Guidelines matched to one regulation section (the reverse of the guideline lookup)."""
+
+    stmt = match_detail_select().where(Match.regulation_id == regulation_id)
+    if status:
+        stmt = stmt.filter(Match.status == status)
+    result = await session.execute(stmt.order_by(Match.score.desc(), Match.id))
+    return json_response(nested_rows_to_dicts(result.keys(), result.all()))
+
+
+@router.get("/regulations/{regulation_id}/coverage", response_model=RegulationCoverageSchema)
+async def regulation_coverage(
+    regulation_id: int,
+    session: AsyncSession = Depends(get_read_session),
+) -> RegulationCoverageSchema:
+    coverage = await session.get(RegulationCoverage, regulation_id)
+    if coverage is None:
+        raise HTTPException(status_code=404, detail="Regulation not found or superseded")
+    return RegulationCoverageSchema.model_validate(coverage)
+
+
+@router.get("/coverage", response_model=list[CoverageSummarySchema])
+async def coverage_summary(
+    region: str | None = Query(None),
+    regulation_type: str | None = Query(None),
+    session: AsyncSession = Depends(get_read_session),
+) -> list[CoverageSummarySchema]:
+    """Precomputed coverage per region and regulation type; ``covered`` is the approved share."""
+
+    stmt = select(CoverageSummary).order_by(
+        CoverageSummary.region, CoverageSummary.regulation_type
+    )
+    if region:
+        stmt = stmt.where(CoverageSummary.region == region)
+    if regulation_type:
+        stmt = stmt.where(CoverageSummary.regulation_type == regulation_type)
+    rows = (await session.scalars(stmt)).all()
+    return [CoverageSummarySchema.model_validate(row) for row in rows]
+
+
+@router.post("/coverage/rebuild", response_model=CoverageRebuildResult)
+async def rebuild_coverage_summary(
+    session: AsyncSession = Depends(get_session),
+) -> CoverageRebuildResult:
+    """Recompute the coverage tables, e.g. after sections were loaded outside the API."""
+
+    regulations = await rebuild_coverage(session)
+    await session.commit()
+    return CoverageRebuildResult(regulations=regulations)
 
 
 @router.patch("/matches/{match_id}", response_model=MatchSchema)
@@ -87,13 +228,199 @@ async def update_match(
     match = await session.get(Match, match_id)
     if not match:
         raise HTTPException(status_code=404, detail="Match not found")
+    # Without a reviewer the caller cannot be the holder of a live claim.
+    if held_by_other(match, payload.reviewer):
+        raise HTTPException(status_code=409, detail=f"Match is claimed by {match.claimed_by}")
+    previous_status = match.status
     for field, value in payload.model_dump(exclude_unset=True).items():
         setattr(match, field, value)
+    if match.status != "pending":
+        match.claimed_by = None
+        match.claim_expires_at = None
+    if match.status != previous_status:
+        await matches_changed(
+            session, [MatchChange(match.regulation_id, previous_status, match.status)]
+        )
     await session.commit()
-    await session.refresh(match)
+    # Column values are current after the flush; only the nested sections need loading.
+    await session.refresh(match, attribute_names=["guideline", "regulation"])
     return MatchSchema.model_validate(match)
 
 
+
+@router.post("/matches/bulk", response_model=MatchBulkUpdateResult)
+async def bulk_update_matches(
+    payload: MatchBulkUpdate,
+    session: AsyncSession = Depends(get_session),
+) -> MatchBulkUpdateResult:
+    """Apply one review decision to many matches with a single UPDATE ... RETURNING.
+
+    Matches that another reviewer holds under a live claim are skipped and listed in
+    ``skipped_ids``; without a ``reviewer`` in the changes, every live claim counts.
+    """
+
+    if (payload.match_ids is None) == (payload.filter is None):
+        raise HTTPException(
+            status_code=400, detail="Provide exactly one of 'match_ids' or 'filter'"
+        )
+    changes = payload.changes.model_dump(exclude_unset=True)
+    if not changes:
+        raise HTTPException(status_code=400, detail="No changes supplied")
+
+    conditions = []
+    if payload.match_ids is not None:
+        if not payload.match_ids:
+            return MatchBulkUpdateResult(updated=0, match_ids=[], status_counts={})
+        conditions.append(Match.id.in_(payload.match_ids))
+    else:
+        criteria = payload.filter
+        if criteria.guideline_id is not None:
+            conditions.append(Match.guideline_id == criteria.guideline_id)
+        if criteria.regulation_id is not None:
+            conditions.append(Match.regulation_id == criteria.regulation_id)
+        if criteria.status is not None:
+            conditions.append(Match.status == criteria.status)
+        if criteria.min_score is not None:
+            conditions.append(Match.score >= criteria.min_score)
+        if criteria.max_score is not None:
+            conditions.append(Match.score < criteria.max_score)
+        if not conditions:
+            raise HTTPException(
+                status_code=400, detail="'filter' must set at least one criterion"
+            )
+
+    # Matches leased to another reviewer are left to them, as in the single-match PATCH.
+    held = claimed_by_other(changes.get("reviewer"))
+    skipped = (await session.scalars(select(Match.id).where(*conditions, held))).all()
+    conditions.append(~held)
+
+    previous: dict[int, tuple[int, str]] = {}
+    if "status" in changes:
+        # Old statuses feed the coverage counters; the rows stay locked until commit.
+        locked = select(Match.id, Match.regulation_id, Match.status).where(*conditions)
+        for match_id, regulation_id, status in await session.execute(locked.with_for_update()):
+            previous[match_id] = (regulation_id, status)
+        if changes["status"] != "pending":
+            # Decided matches leave the review queue.
+            changes.update(claimed_by=None, claim_expires_at=None)
+    stmt = (
+        update(Match)
+        .where(*conditions)
+        .values(**changes)
+        .returning(Match.id, Match.status)
+        .execution_options(synchronize_session=False)
+    )
+    rows = (await session.execute(stmt)).all()
+    if previous:
+        await matches_changed(
+            session,
+            (
+                MatchChange(previous[match_id][0], previous[match_id][1], status)
+                for match_id, status in rows
+                if match_id in previous
+            ),
+        )
+    await session.commit()
+
+    status_counts: dict[str, int] = {}
+    for _, status in rows:
+        status_counts[status] = status_counts.get(status, 0) + 1
+    return MatchBulkUpdateResult(
+        updated=len(rows),
+        match_ids=sorted(match_id for match_id, _ in rows),
+        status_counts=status_counts,
+        skipped_ids=sorted(skipped),
+    )
+
+
+async def _review_claim(
+    session: AsyncSession, reviewer: str, match_ids: list[int], expires_at: datetime
+) -> Response:
+    rows = []
+    if match_ids:
+        stmt = match_detail_select().where(Match.id.in_(match_ids)).order_by(*PRIORITY)
+        result = await session.execute(stmt)
+        rows = nested_rows_to_dicts(result.keys(), result.all())
+    return json_response({"reviewer": reviewer, "lease_expires_at": expires_at, "matches": rows})
+
+
+@router.post("/review/claim", response_model=ReviewClaim)
+async def claim_review_work(
+    payload: ReviewClaimRequest,
+    session: AsyncSession = Depends(get_session),
+) -> Response:
+    """Lease the next ``limit`` pending matches, most uncertain first, to a reviewer.
+
+    Claimed matches are skipped by other reviewers' claims until the lease expires
+    or the reviewer decides or releases them.
+    """
+
+    match_ids, expires_at = await claim_matches(
+        session,
+        payload.reviewer,
+        limit=payload.limit,
+        lease_seconds=payload.lease_seconds or REVIEW_LEASE_SECONDS,
+    )
+    return await _review_claim(session, payload.reviewer, match_ids, expires_at)
+
+
+@router.post("/review/renew", response_model=ReviewClaim)
+async def renew_review_work(
+    payload: ReviewLeaseRequest,
+    session: AsyncSession = Depends(get_session),
+) -> Response:
+    """Extend the reviewer's leases; matches claimed by someone else are left out."""
+
+    match_ids, expires_at = await renew_claims(
+        session,
+        payload.reviewer,
+        payload.match_ids,
+        lease_seconds=payload.lease_seconds or REVIEW_LEASE_SECONDS,
+    )
+    return await _review_claim(session, payload.reviewer, match_ids, expires_at)
+
+
+@router.post("/review/release", response_model=ReviewReleaseResult)
+async def release_review_work(
+    payload: ReviewLeaseRequest,
+    session: AsyncSession = Depends(get_session),
+) -> ReviewReleaseResult:
+    released = await release_claims(session, payload.reviewer, payload.match_ids)
+    return ReviewReleaseResult(released=released)
+
+
+@router.get("/documents/{document_key:path}/excerpt")
+async def document_excerpt(
+    document_key: str,
+    start: int = Query(0, ge=0),
+    end: int | None = Query(None, ge=0),
+) -> dict[str, int | str]:
+    """Characters ``start:end`` of an uploaded document's normalized text.
+
+    Section and guideline-side match spans index this text, so clients can show the
+    context around a match without loading the whole document.
+    """
+
+    corpus = default_corpus()
+    if corpus is None:
+        raise HTTPException(status_code=503, detail="The document corpus is not configured")
+    try:
+        document = await asyncio.to_thread(corpus.document, document_key)
+    except CorpusError:
+        raise HTTPException(status_code=404, detail="Document not found") from None
+    end = document.length if end is None else min(end, document.length)
+    start = min(start, end)
+    end = min(end, start + MAX_EXCERPT_CHARS)
+    text = await asyncio.to_thread(corpus.excerpt, document_key, start, end)
+    return {
+        "document_key": document_key,
+        "length": document.length,
+        "start": start,
+        "end": end,
+        "text": text,
+    }
+
+
 if MULTIPART_AVAILABLE:
 
     @router.post("/documents/upload")
@@ -102,8 +429,11 @@ if MULTIPART_AVAILABLE:
         category: str = Form(...),
         title: str = Form(...),
         language: str = Form("en"),
+        document_key: str | None = Form(None),
+        region: str | None = Form(None),
+        regulation_type: str | None = Form(None),
         session: AsyncSession = Depends(get_session),
-    ) -> dict[str, int | str]:
+    ) -> dict[str, int | str | None]:
         upload_dir = Path("data/uploads")
         upload_dir.mkdir(parents=True, exist_ok=True)
         file_id = uuid4().hex
@@ -123,6 +453,9 @@ if MULTIPART_AVAILABLE:
                 category=normalized_category,
                 title=title,
                 language=language,
+                document_key=document_key,
+                region=region,
+                regulation_type=regulation_type,
             )
         finally:
             try:
@@ -134,6 +467,10 @@ if MULTIPART_AVAILABLE:
             "status": "processed",
             "sections_created": result.sections_created,
             "matches_created": result.matches_created,
+            "sections_unchanged": result.sections_unchanged,
+            "sections_superseded": result.sections_superseded,
+            "duplicates_collapsed": result.duplicates_collapsed,
+            "corpus_key": result.corpus_key,
         }
 
 else:
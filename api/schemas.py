@@ -4,7 +4,12 @@ from __future__ import annotations
 from datetime import datetime
 from typing import Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field, computed_field
+
+
+class TextSpan(BaseModel):
+    start: int
+    end: int
 
 
 class GuidelineSection(BaseModel):
@@ -13,9 +18,9 @@ class GuidelineSection(BaseModel):
     title: str
     body: str
     language: str
+    duplicate_spans: Optional[list[TextSpan]] = None
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class RegulationSection(BaseModel):
@@ -26,14 +31,9 @@ class RegulationSection(BaseModel):
     region: str
     regulation_type: str
     language: str
+    duplicate_spans: Optional[list[TextSpan]] = None
 
-    class Config:
-        orm_mode = True
-
-
-class TextSpan(BaseModel):
-    start: int
-    end: int
+    model_config = ConfigDict(from_attributes=True)
 
 
 class Match(BaseModel):
@@ -52,11 +52,12 @@ class Match(BaseModel):
     status: str
     reviewer: Optional[str]
     reviewer_notes: Optional[str]
+    claimed_by: Optional[str] = None
+    claim_expires_at: Optional[datetime] = None
     created_at: datetime
     updated_at: datetime
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class MatchUpdate(BaseModel):
@@ -65,6 +66,97 @@ class MatchUpdate(BaseModel):
     reviewer_notes: Optional[str] = None
 
 
+class MatchFilter(BaseModel):
+    guideline_id: Optional[int] = None
+    regulation_id: Optional[int] = None
+    status: Optional[str] = None
+    min_score: Optional[float] = None
+    max_score: Optional[float] = None
+
+
+class MatchBulkUpdate(BaseModel):
+    match_ids: Optional[list[int]] = None
+    filter: Optional[MatchFilter] = None
+    changes: MatchUpdate
+
+
+class MatchBulkUpdateResult(BaseModel):
+    updated: int
+    match_ids: list[int]
+    status_counts: dict[str, int]
+    # Selected matches left unchanged because another reviewer holds a live claim.
+    skipped_ids: list[int] = []
+
+
+class ReviewClaimRequest(BaseModel):
+    reviewer: str = Field(min_length=1, max_length=128)
+    limit: int = Field(10, ge=1, le=100)
+    lease_seconds: Optional[float] = Field(None, gt=0, le=86400)
+
+
+class ReviewLeaseRequest(BaseModel):
+    reviewer: str = Field(min_length=1, max_length=128)
+    match_ids: list[int]
+    lease_seconds: Optional[float] = Field(None, gt=0, le=86400)
+
+
+class ReviewReleaseResult(BaseModel):
+    released: int
+
+
+class RegulationCoverage(BaseModel):
+    regulation_id: int
+    region: str
+    regulation_type: str
+    matches: int
+    pending: int
+    approved: int
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class CoverageSummary(BaseModel):
+    region: str
+    regulation_type: str
+    regulations: int
+    matched_regulations: int
+    covered_regulations: int
+    matches: int
+    pending: int
+    approved: int
+
+    model_config = ConfigDict(from_attributes=True)
+
+    @computed_field
+    @property
+    def covered(self) -> float:
+        return self.covered_regulations / self.regulations if self.regulations else 0.0
+
+
+class CoverageRebuildResult(BaseModel):
+    regulations: int
+
+
+class SearchHit(BaseModel):
+    kind: str
+    section_id: int
+    external_id: str
+    title: str
+    language: str
+    score: float
+    lexical_score: float
+    semantic_score: Optional[float] = None
+    highlights: list[TextSpan]
+
+
+class SearchResults(BaseModel):
+    query: str
+    total: int
+    limit: int
+    offset: int
+    hits: list[SearchHit]
+
+
 class MatchDetail(Match):
     guideline_section: Optional[GuidelineSection] = Field(default=None, alias="guideline")
     regulation_section: Optional[RegulationSection] = Field(default=None, alias="regulation")
@@ -81,6 +173,10 @@ class MatchDetail(Match):
             return None
         return TextSpan(start=self.regulation_span_start, end=self.regulation_span_end)
 
-    class Config:
-        orm_mode = True
-        allow_population_by_field_name = True
+    model_config = ConfigDict(from_attributes=True, populate_by_name=True)
+
+
+class ReviewClaim(BaseModel):
+    reviewer: str
+    lease_expires_at: datetime
+    matches: list[MatchDetail]
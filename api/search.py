@@ -0,0 +1,258 @@
+"""Full-text and hybrid search over guideline and regulation sections."""
+from __future__ import annotations
+
+import asyncio
+import math
+import re
+from collections import Counter
+from dataclasses import dataclass
+from typing import Callable, Iterable, Sequence
+
+import numpy as np
+from sqlalchemy import String, func, literal, select
+from sqlalchemy.dialects.postgresql import array
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from processing.embeddings import cosine_similarity
+
+from .models import FULL_TEXT_CONFIG, CloudGuidelineSection, RegulationSection, full_text_vector
+from .upload import encode_sections
+
+TOKEN_RE = re.compile(r"\w+")
+
+SECTION_MODELS = {
+    "guideline": CloudGuidelineSection,
+    "regulation": RegulationSection,
+}
+
+
+def tokenize(text: str) -> list[str]:
+    return [token.lower() for token in TOKEN_RE.findall(text)]
+
+
+def highlight_spans(
+    text: str,
+    terms: Sequence[str],
+    *,
+    normalize: Callable[[str], Iterable[str]] | None = None,
+    limit: int = 20,
+) -> list[tuple[int, int]]:
+    """Return character offsets of tokens in ``text`` that matched a query term.
+
+    ``normalize`` maps a lowercased token to the keys it is ranked under (its stemmed
+    lexemes for PostgreSQL full-text search); by default a token must equal a term,
+    as in the in-process BM25 index, so highlights agree with what was scored.
+    """
+
+    normalize = normalize or (lambda token: (token,))
+    keys = {key for term in terms for key in normalize(term)}
+    if not keys:
+        return []
+    spans: list[tuple[int, int]] = []
+    for match in TOKEN_RE.finditer(text):
+        if keys.intersection(normalize(match.group(0).lower())):
+            spans.append((match.start(), match.end()))
+            if len(spans) >= limit:
+                break
+    return spans
+
+
+async def _lexemes(session: AsyncSession, words: Iterable[str]) -> dict[str, tuple[str, ...]]:
+    """Lexemes PostgreSQL's ``to_tsvector`` produces for each word (empty for stop words)."""
+
+    word = func.unnest(array(sorted(set(words)), type_=String)).table_valued("word")
+    lexemes = func.tsvector_to_array(full_text_vector(word.c.word))
+    rows = await session.execute(select(word.c.word, lexemes))
+    return {row[0]: tuple(row[1] or ()) for row in rows}
+
+
+class InvertedIndex:
+    """BM25 inverted index used when the database has no native full-text search."""
+
+    def __init__(self, documents: Sequence[tuple[int, str]], *, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings: dict[str, dict[int, int]] = {}
+        self.lengths: dict[int, int] = {}
+        for doc_id, text in documents:
+            tokens = tokenize(text)
+            self.lengths[doc_id] = len(tokens)
+            for token, count in Counter(tokens).items():
+                self.postings.setdefault(token, {})[doc_id] = count
+        total_length = sum(self.lengths.values())
+        self.average_length = total_length / len(self.lengths) if self.lengths else 0.0
+
+    def search(self, terms: Sequence[str]) -> list[tuple[int, float]]:
+        total = len(self.lengths)
+        scores: dict[int, float] = {}
+        for term in set(terms):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_id, frequency in postings.items():
+                norm = 1 - self.b + self.b * self.lengths[doc_id] / (self.average_length or 1.0)
+                weight = frequency * (self.k1 + 1) / (frequency + self.k1 * norm)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * weight
+        return sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+
+
+# (database url, kind, language) -> ((row count, max id), index). Section bodies are
+# never edited in place: revisions insert new rows and supersede old ones, so the
+# active count/max-id pair is enough to detect a stale index.
+_INDEX_CACHE: dict[tuple[str, str, str | None], tuple[tuple[int, int | None], InvertedIndex]] = {}
+
+
+async def _inverted_index(
+    session: AsyncSession,
+    kind: str,
+    language: str | None,
+) -> InvertedIndex:
+    model = SECTION_MODELS[kind]
+    conditions = [model.superseded_at.is_(None)]
+    if language:
+        conditions.append(model.language == language)
+    stats_stmt = select(func.count(model.id), func.max(model.id)).where(*conditions)
+    stats = tuple((await session.execute(stats_stmt)).one())
+    key = (str(session.get_bind().url), kind, language)
+    cached = _INDEX_CACHE.get(key)
+    if cached and cached[0] == stats:
+        return cached[1]
+    rows = (await session.execute(select(model.id, model.body).where(*conditions))).all()
+    index = InvertedIndex([(row.id, row.body) for row in rows])
+    _INDEX_CACHE[key] = (stats, index)
+    return index
+
+
+async def _lexical_candidates(
+    session: AsyncSession,
+    kind: str,
+    *,
+    query: str,
+    terms: Sequence[str],
+    language: str | None,
+    limit: int,
+) -> tuple[list[tuple[int, float]], int]:
+    """Return ``(section_id, lexical_score)`` pairs and the total number of hits."""
+
+    model = SECTION_MODELS[kind]
+    if session.get_bind().dialect.name != "postgresql":
+        ranked = (await _inverted_index(session, kind, language)).search(terms)
+        return ranked[:limit], len(ranked)
+
+    vector = full_text_vector(model.body)
+    tsquery = func.websearch_to_tsquery(literal(FULL_TEXT_CONFIG, literal_execute=True), query)
+    conditions = [vector.op("@@")(tsquery), model.superseded_at.is_(None)]
+    if language:
+        conditions.append(model.language == language)
+    rank = func.ts_rank_cd(vector, tsquery)
+    rows = (
+        await session.execute(
+            select(model.id, rank.label("rank"))
+            .where(*conditions)
+            .order_by(rank.desc(), model.id)
+            .limit(limit)
+        )
+    ).all()
+    total = await session.scalar(select(func.count()).select_from(model).where(*conditions))
+    return [(row.id, float(row.rank)) for row in rows], int(total or 0)
+
+
+@dataclass(slots=True)
+class SearchHit:
+    kind: str
+    section: CloudGuidelineSection | RegulationSection
+    lexical_score: float
+    semantic_score: float | None = None
+    score: float = 0.0
+    highlights: list[tuple[int, int]] | None = None
+
+
+@dataclass(slots=True)
+class SearchPage:
+    total: int
+    hits: list[SearchHit]
+
+
+async def search_sections(
+    session: AsyncSession,
+    *,
+    query: str,
+    kinds: Sequence[str] = ("guideline", "regulation"),
+    language: str | None = None,
+    limit: int = 20,
+    offset: int = 0,
+    hybrid: bool = False,
+    alpha: float = 0.5,
+    candidate_pool: int = 100,
+) -> SearchPage:
+    """Rank sections lexically and optionally re-rank the head with embeddings.
+
+    With ``hybrid`` enabled, the top ``candidate_pool`` lexical hits are rescored as
+    ``alpha * normalized_lexical + (1 - alpha) * cosine(query, section)``.
+    """
+
+    terms = tokenize(query)
+    if not terms:
+        return SearchPage(total=0, hits=[])
+
+    window = offset + limit
+    fetch = max(window, candidate_pool) if hybrid else window
+    ranked: list[tuple[str, int, float]] = []
+    total = 0
+    for kind in kinds:
+        candidates, kind_total = await _lexical_candidates(
+            session, kind, query=query, terms=terms, language=language, limit=fetch
+        )
+        total += kind_total
+        ranked.extend((kind, section_id, score) for section_id, score in candidates)
+    ranked.sort(key=lambda item: (-item[2], item[0], item[1]))
+    ranked = ranked[:fetch]
+    if not ranked:
+        return SearchPage(total=total, hits=[])
+
+    sections: dict[tuple[str, int], CloudGuidelineSection | RegulationSection] = {}
+    for kind in kinds:
+        ids = [section_id for hit_kind, section_id, _ in ranked if hit_kind == kind]
+        if not ids:
+            continue
+        model = SECTION_MODELS[kind]
+        for section in (await session.scalars(select(model).where(model.id.in_(ids)))).all():
+            sections[(kind, section.id)] = section
+
+    hits = [
+        SearchHit(kind=kind, section=sections[(kind, section_id)], lexical_score=score, score=score)
+        for kind, section_id, score in ranked
+    ]
+    if hybrid:
+        await _rerank(hits, query=query, alpha=alpha)
+        hits.sort(key=lambda hit: -hit.score)
+
+    page = hits[offset:window]
+    normalize = None
+    if page and session.get_bind().dialect.name == "postgresql":
+        # Highlight what websearch_to_tsquery matched: stemmed lexemes, not raw tokens.
+        words = set(terms).union(*(tokenize(hit.section.body) for hit in page))
+        lexemes = await _lexemes(session, words)
+        normalize = lambda token: lexemes.get(token, ())  # noqa: E731
+    for hit in page:
+        hit.highlights = highlight_spans(hit.section.body, terms, normalize=normalize)
+    return SearchPage(total=total, hits=page)
+
+
+def _semantic_scores(query: str, bodies: list[str]) -> np.ndarray:
+    # Section bodies hit the content-hash embedding cache that uploads and re-matching
+    # fill, so the model only sees the query and sections never embedded before.
+    query_vectors = encode_sections([query]).vectors
+    section_vectors = encode_sections(bodies).vectors
+    return cosine_similarity(query_vectors, section_vectors)[0]
+
+
+async def _rerank(hits: list[SearchHit], *, query: str, alpha: float) -> None:
+    similarities = await asyncio.to_thread(
+        _semantic_scores, query, [hit.section.body for hit in hits]
+    )
+    top_lexical = max(hit.lexical_score for hit in hits) or 1.0
+    for hit, similarity in zip(hits, np.asarray(similarities, dtype=float), strict=True):
+        hit.semantic_score = float(similarity)
+        hit.score = alpha * (hit.lexical_score / top_lexical) + (1 - alpha) * float(similarity)
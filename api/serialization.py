@@ -0,0 +1,145 @@
+"""Fast JSON rendering for list endpoints.
+
+List routes select plain columns through SQLAlchemy Core and encode the resulting
+tuples directly, skipping ORM identity-map bookkeeping and per-row Pydantic
+validation. The payload shape matches the ``api.schemas`` models exactly, which
+remain the documented ``response_model`` for each route.
+"""
+from __future__ import annotations
+
+import json
+from datetime import date, datetime
+from typing import Any, Iterable, Sequence
+
+from fastapi import Response
+from sqlalchemy import Select, select
+
+from .models import CloudGuidelineSection, Match, RegulationSection
+
+try:  # pragma: no cover - optional dependency for faster encoding
+    import orjson
+
+    ORJSON_AVAILABLE = True
+except ModuleNotFoundError:  # pragma: no cover - triggered in limited test envs
+    ORJSON_AVAILABLE = False
+
+
+GUIDELINE_COLUMNS = (
+    CloudGuidelineSection.id,
+    CloudGuidelineSection.external_id,
+    CloudGuidelineSection.title,
+    CloudGuidelineSection.body,
+    CloudGuidelineSection.language,
+    CloudGuidelineSection.duplicate_spans,
+)
+REGULATION_COLUMNS = (
+    RegulationSection.id,
+    RegulationSection.external_id,
+    RegulationSection.title,
+    RegulationSection.body,
+    RegulationSection.region,
+    RegulationSection.regulation_type,
+    RegulationSection.language,
+    RegulationSection.duplicate_spans,
+)
+MATCH_COLUMNS = (
+    Match.id,
+    Match.guideline_id,
+    Match.regulation_id,
+    Match.score,
+    Match.confidence,
+    Match.rationale,
+    Match.guideline_excerpt,
+    Match.regulation_excerpt,
+    Match.guideline_span_start,
+    Match.guideline_span_end,
+    Match.regulation_span_start,
+    Match.regulation_span_end,
+    Match.status,
+    Match.reviewer,
+    Match.reviewer_notes,
+    Match.claimed_by,
+    Match.claim_expires_at,
+    Match.created_at,
+    Match.updated_at,
+)
+NESTED_SEPARATOR = "__"
+
+
+def guideline_select() -> Select:
+    return select(*GUIDELINE_COLUMNS)
+
+
+def regulation_select() -> Select:
+    return select(*REGULATION_COLUMNS)
+
+
+def _nested(relation: str, columns: Sequence[Any]) -> list[Any]:
+    return [column.label(f"{relation}{NESTED_SEPARATOR}{column.key}") for column in columns]
+
+
+def match_detail_select() -> Select:
+    """Matches joined with both sections, nested columns labelled ``<relation>__<field>``."""
+
+    return (
+        select(
+            *MATCH_COLUMNS,
+            *_nested("guideline", GUIDELINE_COLUMNS),
+            *_nested("regulation", REGULATION_COLUMNS),
+        )
+        .outerjoin(CloudGuidelineSection, Match.guideline_id == CloudGuidelineSection.id)
+        .outerjoin(RegulationSection, Match.regulation_id == RegulationSection.id)
+    )
+
+
+def rows_to_dicts(keys: Sequence[str], rows: Iterable[Sequence[Any]]) -> list[dict[str, Any]]:
+    keys = list(keys)
+    return [dict(zip(keys, row, strict=True)) for row in rows]
+
+
+def nested_rows_to_dicts(
+    keys: Sequence[str],
+    rows: Iterable[Sequence[Any]],
+) -> list[dict[str, Any]]:
+    """Fold ``<relation>__<field>`` columns into nested objects (``None`` when unjoined)."""
+
+    flat: list[tuple[str, int]] = []
+    nested: dict[str, list[tuple[str, int]]] = {}
+    for position, key in enumerate(keys):
+        relation, separator, field = key.partition(NESTED_SEPARATOR)
+        if separator:
+            nested.setdefault(relation, []).append((field, position))
+        else:
+            flat.append((key, position))
+
+    relations = [
+        (relation, next(position for field, position in fields if field == "id"), fields)
+        for relation, fields in nested.items()
+    ]
+    records: list[dict[str, Any]] = []
+    for row in rows:
+        record = {key: row[position] for key, position in flat}
+        for relation, id_position, fields in relations:
+            if row[id_position] is None:
+                record[relation] = None
+            else:
+                record[relation] = {field: row[position] for field, position in fields}
+        records.append(record)
+    return records
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(payload: Any) -> bytes:
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(payload)
+    encoded = json.dumps(payload, default=_default, ensure_ascii=False, separators=(",", ":"))
+    return encoded.encode("utf-8")
+
+
+def json_response(payload: Any) -> Response:
+    return Response(content=dumps(payload), media_type="application/json")
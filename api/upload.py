@@ -2,45 +2,77 @@
 from __future__ import annotations
 
 import asyncio
+import os
 from dataclasses import dataclass
+from datetime import datetime
 from pathlib import Path
-from typing import Iterable, Sequence
-
-import re
+from typing import TYPE_CHECKING, Sequence
 
 import numpy as np
-from sentence_transformers import SentenceTransformer
-from sqlalchemy import select
+from sqlalchemy import delete, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ingestion.extract import extract_text
-from processing.cleanup import normalize_text
+from processing.cleanup import content_hash, normalize_paragraphs
+from processing.corpus import CorpusStore, default_corpus
+from processing.dedup import collapse_near_duplicates
+from processing.embeddings import EmbeddingCache, WindowedEmbeddings, encode_windows
 from processing.matching import RelationshipMatcher
+from processing.metrics import DOCUMENTS_TOTAL, MATCHES_TOTAL, SECTIONS_TOTAL, stage_timer
+from processing.rerank import CrossEncoderReranker, RerankConfig
+from processing.segmentation import Segment, segment_text
+from processing.spans import SpanRequest, localize_spans
 
+from .coverage import MatchChange, matches_changed, regulations_added, regulations_retired
 from .models import CloudGuidelineSection, Match, RegulationSection
 
+if TYPE_CHECKING:  # pragma: no cover - imports for type checkers only
+    from sentence_transformers import SentenceTransformer
+
 
 _embedding_model: SentenceTransformer | None = None
+# Section vectors keyed by content hash, so unchanged sections are never re-encoded.
+_embedding_cache = EmbeddingCache()
+# Long sections are embedded as pooled word windows instead of being truncated.
+EMBEDDING_WINDOW_WORDS = int(os.getenv("EMBEDDING_WINDOW_WORDS") or 160)
+EMBEDDING_POOLING = os.getenv("EMBEDDING_POOLING") or "mean"
+# Optional cross-encoder that rescores the top-k candidates; enabled by RERANK_MODEL.
+_rerank_config = RerankConfig.from_env()
+_reranker: CrossEncoderReranker | None = None
 
 
 def _get_model() -> SentenceTransformer:
     global _embedding_model
     if _embedding_model is None:
+        # Imported lazily: torch and sentence-transformers take seconds and hundreds of
+        # MB to load, which health checks and read-only routes never need.
+        from sentence_transformers import SentenceTransformer
+
         _embedding_model = SentenceTransformer("sentence-transformers/all-MiniLM-L6-v2")
     return _embedding_model
 
 
-@dataclass(slots=True)
-class Segment:
-    text: str
-    start: int
-    end: int
+def _get_reranker() -> CrossEncoderReranker | None:
+    global _reranker
+    if _reranker is None and _rerank_config is not None:
+        _reranker = CrossEncoderReranker(_rerank_config)
+    return _reranker
 
 
 @dataclass(slots=True)
 class UploadSummary:
     sections_created: int
     matches_created: int
+    sections_unchanged: int = 0
+    sections_superseded: int = 0
+    duplicates_collapsed: int = 0
+    corpus_key: str | None = None
+
+
+SECTION_MODELS: dict[str, type[CloudGuidelineSection] | type[RegulationSection]] = {
+    "guideline": CloudGuidelineSection,
+    "regulation": RegulationSection,
+}
 
 
 async def ingest_uploaded_document(
@@ -50,117 +82,205 @@ async def ingest_uploaded_document(
     category: str,
     title: str,
     language: str,
+    document_key: str | None = None,
+    region: str | None = None,
+    regulation_type: str | None = None,
     max_segment_length: int = 800,
     similarity_threshold: float = 0.55,
     top_k: int = 5,
+    duplicate_threshold: float | None = 0.85,
 ) -> UploadSummary:
-    """Extract text, persist sections, and create similarity matches."""
-
-    raw_text = await asyncio.to_thread(extract_text, file_path)
-    normalized = normalize_text(raw_text)
+    """Extract text, persist sections, and create similarity matches.
+
+    When ``document_key`` names a previously uploaded document, the new revision is
+    diffed against its active sections by content hash: unchanged sections (and their
+    matches and reviewer decisions) are kept, only new or edited sections are embedded
+    and matched, and sections that disappeared are marked superseded.
+    """
+
+    DOCUMENTS_TOTAL.inc(source="upload")
+    with stage_timer("extract"):
+        raw_text = await asyncio.to_thread(extract_text, file_path)
+    with stage_timer("normalize"):
+        normalized = normalize_paragraphs(raw_text)
     if not normalized:
         return UploadSummary(sections_created=0, matches_created=0)
 
-    segments = list(_segment_text(normalized, max_segment_length=max_segment_length))
+    with stage_timer("segment"):
+        segments = list(segment_text(normalized, max_length=max_segment_length))
     if not segments:
         return UploadSummary(sections_created=0, matches_created=0)
 
-    if category not in {"guideline", "regulation"}:
+    if category not in SECTION_MODELS:
         raise ValueError(f"Unsupported category: {category}")
-
-    matches_created = 0
-    if category == "guideline":
-        created_sections: list[tuple[CloudGuidelineSection, Segment]] = []
-        for index, segment in enumerate(segments, start=1):
-            external_id = f"{file_path.stem}-{index}"
-            section = CloudGuidelineSection(
-                external_id=external_id,
-                title=f"{title} (Section {index})",
-                body=segment.text,
-                language=language,
+    model = SECTION_MODELS[category]
+
+    segments, duplicate_spans = _collapse_duplicates(segments, duplicate_threshold)
+    duplicates_collapsed = sum(len(spans) for spans in duplicate_spans.values())
+
+    hashes = [content_hash(segment.text) for segment in segments]
+    reused: dict[int, CloudGuidelineSection | RegulationSection] = {}
+    superseded: list[CloudGuidelineSection | RegulationSection] = []
+    version = 1
+    if document_key:
+        existing = (
+            await session.scalars(
+                select(model)
+                .where(model.document_key == document_key, model.superseded_at.is_(None))
+                .order_by(model.id)
             )
+        ).all()
+        version = max((section.version for section in existing), default=0) + 1
+        by_hash: dict[str | None, list[CloudGuidelineSection | RegulationSection]] = {}
+        for section in existing:
+            by_hash.setdefault(section.content_hash, []).append(section)
+        for index, digest in enumerate(hashes):
+            candidates = by_hash.get(digest)
+            if candidates:
+                reused[index] = candidates.pop(0)
+        superseded = [section for bucket in by_hash.values() for section in bucket]
+
+    created_sections: list[tuple[CloudGuidelineSection | RegulationSection, Segment]] = []
+    with stage_timer("db_persist"):
+        for index, (segment, digest) in enumerate(zip(segments, hashes, strict=True)):
+            section_title = f"{title} (Section {index + 1})"
+            duplicates = duplicate_spans.get(index)
+            if index in reused:
+                reused[index].duplicate_spans = duplicates
+                _move_section(reused[index], segment, section_title)
+                continue
+            fields = {
+                "external_id": f"{file_path.stem}-{index + 1}",
+                "title": section_title,
+                "body": segment.text,
+                "language": language,
+                "document_key": document_key,
+                "content_hash": digest,
+                "version": version,
+                "span_start": segment.start,
+                "span_end": segment.end,
+                "duplicate_spans": duplicates,
+            }
+            if category == "regulation":
+                fields.update(
+                    region=region or "uploaded", regulation_type=regulation_type or "custom"
+                )
+            section = model(**fields)
             session.add(section)
-            await session.flush()
             created_sections.append((section, segment))
+        if superseded:
+            await _supersede_sections(session, category, superseded)
+        await session.flush()
+        if category == "regulation":
+            await regulations_added(session, [section for section, _ in created_sections])
 
+    if category == "guideline":
         matches_created = await _match_new_guidelines(
             session,
             created_sections,
             similarity_threshold=similarity_threshold,
             top_k=top_k,
+            region=region,
+            regulation_type=regulation_type,
         )
-        sections_created = len(created_sections)
     else:
-        created_sections: list[tuple[RegulationSection, Segment]] = []
-        for index, segment in enumerate(segments, start=1):
-            external_id = f"{file_path.stem}-{index}"
-            section = RegulationSection(
-                external_id=external_id,
-                title=f"{title} (Section {index})",
-                body=segment.text,
-                region="uploaded",
-                regulation_type="custom",
-                language=language,
-            )
-            session.add(section)
-            await session.flush()
-            created_sections.append((section, segment))
-
         matches_created = await _match_new_regulations(
             session,
             created_sections,
             similarity_threshold=similarity_threshold,
             top_k=top_k,
         )
-        sections_created = len(created_sections)
 
-    await session.commit()
-    return UploadSummary(sections_created=sections_created, matches_created=matches_created)
+    with stage_timer("db_persist"):
+        await session.commit()
+    corpus = default_corpus()
+    corpus_key = None
+    if corpus is not None:
+        # Section spans are offsets into this text; match spans are relative to the
+        # section body, so sections can move between revisions without touching them.
+        # Written only once the sections describing this revision are committed.
+        corpus_key = document_key or f"upload/{content_hash(normalized)}"
+        with stage_timer("corpus"):
+            await asyncio.to_thread(corpus.add, corpus_key, normalized)
+    sections_created = len(created_sections)
+    SECTIONS_TOTAL.inc(sections_created, category=category)
+    MATCHES_TOTAL.inc(matches_created, source="upload")
+    return UploadSummary(
+        sections_created=sections_created,
+        matches_created=matches_created,
+        sections_unchanged=len(reused),
+        sections_superseded=len(superseded),
+        duplicates_collapsed=duplicates_collapsed,
+        corpus_key=corpus_key,
+    )
 
 
-PARAGRAPH_PATTERN = re.compile(r"(.+?)(\n\n+|$)", re.DOTALL)
+def _collapse_duplicates(
+    segments: list[Segment],
+    threshold: float | None,
+) -> tuple[list[Segment], dict[int, list[dict[str, int]]]]:
+    """Drop near-duplicate segments, returning canonical segments and collapsed offsets.
 
+    The offsets are keyed by the canonical segment's position in the returned list.
+    """
 
-def _segment_text(text: str, *, max_segment_length: int) -> Iterable[Segment]:
-    for match in PARAGRAPH_PATTERN.finditer(text):
-        paragraph = match.group(1)
-        stripped = paragraph.strip()
-        if not stripped:
-            continue
+    if threshold is None or len(segments) < 2:
+        return segments, {}
+    with stage_timer("dedupe"):
+        canonical_of = collapse_near_duplicates(
+            [segment.text for segment in segments], threshold=threshold
+        )
+    kept: list[Segment] = []
+    positions: dict[int, int] = {}
+    spans: dict[int, list[dict[str, int]]] = {}
+    for index, (segment, canonical) in enumerate(zip(segments, canonical_of, strict=True)):
+        if canonical == index:
+            positions[index] = len(kept)
+            kept.append(segment)
+        else:
+            spans.setdefault(positions[canonical], []).append(
+                {"start": segment.start, "end": segment.end}
+            )
+    return kept, spans
 
-        leading = len(paragraph) - len(paragraph.lstrip())
-        trailing = len(paragraph) - len(paragraph.rstrip())
-        actual_start = match.start(1) + leading
-        actual_end = match.end(1) - trailing
-        if actual_start >= actual_end:
-            continue
 
-        yield from _slice_segment(
-            stripped,
-            base_start=actual_start,
-            max_segment_length=max_segment_length,
-        )
+def _move_section(
+    section: CloudGuidelineSection | RegulationSection,
+    segment: Segment,
+    title: str,
+) -> None:
+    """Keep an unchanged section at its new offset in the revised document.
 
+    Match spans are relative to the section body, so they stay valid as is.
+    """
 
-def _slice_segment(text: str, *, base_start: int, max_segment_length: int) -> Iterable[Segment]:
-    cursor = 0
-    length = len(text)
-    while cursor < length:
-        end = min(length, cursor + max_segment_length)
-        if end < length:
-            split = text.rfind(" ", cursor + int(max_segment_length * 0.4), end)
-            if split > cursor:
-                end = split
-        chunk = text[cursor:end]
-        stripped = chunk.strip()
-        if stripped:
-            leading = len(chunk) - len(chunk.lstrip())
-            trailing = len(chunk) - len(chunk.rstrip())
-            start = base_start + cursor + leading
-            finish = base_start + end - trailing
-            yield Segment(text=stripped, start=start, end=finish)
-        next_cursor = end if end > cursor else cursor + max(1, max_segment_length)
-        cursor = next_cursor
+    section.title = title
+    section.span_start, section.span_end = segment.start, segment.end
+
+
+async def _supersede_sections(
+    session: AsyncSession,
+    category: str,
+    sections: Sequence[CloudGuidelineSection | RegulationSection],
+) -> None:
+    """Retire sections missing from the new revision and drop their unreviewed matches."""
+
+    now = datetime.utcnow()
+    for section in sections:
+        section.superseded_at = now
+    section_ids = [section.id for section in sections]
+    if category == "regulation":
+        await regulations_retired(session, section_ids)
+    owner = Match.guideline_id if category == "guideline" else Match.regulation_id
+    deleted = await session.scalars(
+        delete(Match)
+        .where(owner.in_(section_ids), Match.status == "pending")
+        .returning(Match.regulation_id)
+        .execution_options(synchronize_session=False)
+    )
+    await matches_changed(
+        session, [MatchChange(regulation_id, "pending", None) for regulation_id in deleted]
+    )
 
 
 async def _match_new_guidelines(
@@ -169,17 +289,29 @@ async def _match_new_guidelines(
     *,
     similarity_threshold: float,
     top_k: int,
+    region: str | None = None,
+    regulation_type: str | None = None,
 ) -> int:
-    regulations = (await session.scalars(select(RegulationSection))).all()
+    if not sections:
+        return 0
+    query = select(RegulationSection).where(RegulationSection.superseded_at.is_(None))
+    if region:
+        query = query.where(RegulationSection.region == region)
+    if regulation_type:
+        query = query.where(RegulationSection.regulation_type == regulation_type)
+    regulations = (await session.scalars(query)).all()
     if not regulations:
         return 0
 
     guideline_texts = [segment.text for _, segment in sections]
     regulation_texts = [reg.body for reg in regulations]
-    guideline_vectors, regulation_vectors = await _encode_pair(guideline_texts, regulation_texts)
-    similarity_matrix = _cosine_similarity(guideline_vectors, regulation_vectors)
+    guideline_vectors, regulation_vectors = await _encode_windowed_pair(
+        guideline_texts, regulation_texts
+    )
+    with stage_timer("similarity"):
+        similarity_matrix = guideline_vectors.vectors @ regulation_vectors.vectors.T
 
-    created = 0
+    located: list[tuple[Match, int, int]] = []
     for row, (section, segment) in enumerate(sections):
         scores = similarity_matrix[row]
         top_indices = np.argsort(scores)[::-1][:top_k]
@@ -198,15 +330,18 @@ async def _match_new_guidelines(
                     {"id": regulation.external_id, "title": regulation.title},
                 ),
                 guideline_excerpt=_clip_excerpt(segment.text),
-                regulation_excerpt=_clip_excerpt(regulation.body),
-                guideline_span_start=segment.start,
-                guideline_span_end=segment.end,
-                regulation_span_start=0,
-                regulation_span_end=len(regulation.body),
+                guideline_span_start=0,
+                guideline_span_end=len(segment.text),
             )
-            session.add(match)
-            created += 1
-    return created
+            located.append((match, row, int(index)))
+    passages = await _localize_matches(
+        located, guideline_vectors.vectors, regulations, regulation_vectors, side="regulation"
+    )
+    candidates = [
+        (match, sections[row][1].text, passage)
+        for (match, row, _), passage in zip(located, passages, strict=True)
+    ]
+    return await _add_matches(session, candidates)
 
 
 async def _match_new_regulations(
@@ -216,16 +351,25 @@ async def _match_new_regulations(
     similarity_threshold: float,
     top_k: int,
 ) -> int:
-    guidelines = (await session.scalars(select(CloudGuidelineSection))).all()
+    if not sections:
+        return 0
+    guidelines = (
+        await session.scalars(
+            select(CloudGuidelineSection).where(CloudGuidelineSection.superseded_at.is_(None))
+        )
+    ).all()
     if not guidelines:
         return 0
 
     guideline_texts = [guideline.body for guideline in guidelines]
     regulation_texts = [segment.text for _, segment in sections]
-    guideline_vectors, regulation_vectors = await _encode_pair(guideline_texts, regulation_texts)
-    similarity_matrix = _cosine_similarity(guideline_vectors, regulation_vectors)
+    guideline_vectors, regulation_vectors = await _encode_windowed_pair(
+        guideline_texts, regulation_texts
+    )
+    with stage_timer("similarity"):
+        similarity_matrix = guideline_vectors.vectors @ regulation_vectors.vectors.T
 
-    created = 0
+    located: list[tuple[Match, int, int]] = []
     for col, (section, segment) in enumerate(sections):
         scores = similarity_matrix[:, col]
         top_indices = np.argsort(scores)[::-1][:top_k]
@@ -243,46 +387,154 @@ async def _match_new_regulations(
                     {"id": guideline.external_id, "title": guideline.title},
                     {"id": section.external_id, "title": section.title},
                 ),
-                guideline_excerpt=_clip_excerpt(guideline.body),
                 regulation_excerpt=_clip_excerpt(segment.text),
-                guideline_span_start=0,
-                guideline_span_end=len(guideline.body),
-                regulation_span_start=segment.start,
-                regulation_span_end=segment.end,
+                regulation_span_start=0,
+                regulation_span_end=len(segment.text),
+            )
+            located.append((match, col, int(index)))
+    passages = await _localize_matches(
+        located, regulation_vectors.vectors, guidelines, guideline_vectors, side="guideline"
+    )
+    candidates = [
+        (match, passage, sections[col][1].text)
+        for (match, col, _), passage in zip(located, passages, strict=True)
+    ]
+    return await _add_matches(session, candidates)
+
+
+async def _localize_matches(
+    located: Sequence[tuple[Match, int, int]],
+    queries: np.ndarray,
+    sections: Sequence[CloudGuidelineSection | RegulationSection],
+    windows: WindowedEmbeddings,
+    *,
+    side: str,
+) -> list[str]:
+    """Point each match's ``side`` span and excerpt at the best sentences of that section.
+
+    ``located`` holds ``(match, query_row, section_index)``. The search is limited to
+    the section's best embedding window, and all candidate sentence windows are
+    encoded in one cached batch. Returns the located passages.
+
+    Sections of a document held in the corpus are read from it, only over the
+    window's range; the others use their ``body``.
+    """
+
+    corpus = default_corpus()
+    requests = []
+    bases = []
+    for _, row, index in located:
+        start, end = _best_window(windows, index, queries[row])
+        section = sections[index]
+        base = _corpus_base(corpus, section)
+        bases.append(base)
+        if base is None:
+            requests.append(SpanRequest(row, section.body, start, end))
+        else:
+            requests.append(
+                SpanRequest(row, None, base + start, base + end, document=section.document_key)
             )
-            session.add(match)
-            created += 1
-    return created
+    model = _get_model()
+    with stage_timer("localize"):
+        spans = await asyncio.to_thread(
+            localize_spans,
+            lambda texts: _embedding_cache.encode(model, texts),
+            queries,
+            requests,
+            corpus=corpus,
+        )
+    passages: list[str] = []
+    for (match, _, index), base, (start, end) in zip(located, bases, spans, strict=True):
+        if base is not None:
+            start, end = start - base, end - base
+        passage = sections[index].body[start:end]
+        setattr(match, f"{side}_span_start", start)
+        setattr(match, f"{side}_span_end", end)
+        setattr(match, f"{side}_excerpt", _clip_excerpt(passage))
+        passages.append(passage)
+    return passages
+
+
+def _corpus_base(
+    corpus: CorpusStore | None, section: CloudGuidelineSection | RegulationSection
+) -> int | None:
+    """Offset of ``section`` in its corpus document, or None when it must use its body."""
+
+    if corpus is None or not section.document_key or section.span_start is None:
+        return None
+    if section.span_end - section.span_start != len(section.body):
+        return None
+    if section.document_key not in corpus:
+        return None
+    return section.span_start
+
+
+async def _add_matches(
+    session: AsyncSession,
+    candidates: Sequence[tuple[Match, str, str]],
+) -> int:
+    """Add matches, first replacing their confidence with cross-encoder scores if enabled.
+
+    Candidates are ``(match, guideline_passage, regulation_passage)``; they are re-ranked
+    best cosine score first, so the re-ranker's candidate budget covers the strongest
+    matches and anything it skips keeps the score-derived confidence.
+    """
+
+    reranker = _get_reranker()
+    if reranker is not None and candidates:
+        ordered = sorted(candidates, key=lambda candidate: candidate[0].score, reverse=True)
+        probabilities = await asyncio.to_thread(
+            reranker.score, [(guideline, regulation) for _, guideline, regulation in ordered]
+        )
+        for (match, _, _), probability in zip(ordered, probabilities, strict=True):
+            if probability is not None:
+                match.confidence = probability
+    session.add_all(match for match, _, _ in candidates)
+    await matches_changed(
+        session,
+        [
+            MatchChange(match.regulation_id, None, match.status or "pending")
+            for match, _, _ in candidates
+        ],
+    )
+    return len(candidates)
 
 
-async def _encode_pair(
+async def _encode_windowed_pair(
     left: Sequence[str],
     right: Sequence[str],
-) -> tuple[np.ndarray, np.ndarray]:
+) -> tuple[WindowedEmbeddings, WindowedEmbeddings]:
+    left_windows = await asyncio.to_thread(encode_sections, list(left))
+    right_windows = await asyncio.to_thread(encode_sections, list(right))
+    return left_windows, right_windows
+
+
+def encode_sections(texts: list[str]) -> WindowedEmbeddings:
+    """Embed section texts as pooled windows through the shared embedding cache.
+
+    Uploads, search and re-matching all go through here, so a section embedded on
+    one path is served from the cache on the others instead of reaching the model.
+    """
+
     model = _get_model()
-    left_vectors = await asyncio.to_thread(
-        model.encode,
-        list(left),
-        show_progress_bar=False,
-        convert_to_numpy=True,
-    )
-    right_vectors = await asyncio.to_thread(
-        model.encode,
-        list(right),
-        show_progress_bar=False,
-        convert_to_numpy=True,
+    return encode_windows(
+        lambda windows: _embedding_cache.encode(model, windows),
+        texts,
+        window_words=EMBEDDING_WINDOW_WORDS,
+        pooling=EMBEDDING_POOLING,
     )
-    return np.asarray(left_vectors), np.asarray(right_vectors)
 
 
-def _cosine_similarity(a: np.ndarray, b: np.ndarray) -> np.ndarray:
-    a_norm = np.linalg.norm(a, axis=1, keepdims=True)
-    b_norm = np.linalg.norm(b, axis=1, keepdims=True)
-    a_safe = np.maximum(a_norm, 1e-9)
-    b_safe = np.maximum(b_norm, 1e-9)
-    denominator = a_safe * b_safe.T
-    similarity = a @ b.T
-    return similarity / denominator
+def _best_window(
+    embeddings: WindowedEmbeddings,
+    index: int,
+    query: np.ndarray,
+) -> tuple[int, int]:
+    """Character span of the window of text ``index`` closest to ``query``."""
+
+    windows = embeddings.windows(index)
+    scores = embeddings.window_vectors[windows] @ query
+    return embeddings.spans[windows.start + int(np.argmax(scores))]
 
 
 def _clip_excerpt(text: str, limit: int = 480) -> str:
@@ -0,0 +1 @@
+"""Throughput and latency benchmarks, kept separate from the unit tests."""
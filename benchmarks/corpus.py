@@ -0,0 +1,118 @@
+"""Deterministic synthetic corpora and offline stand-ins for models and Qdrant."""
+from __future__ import annotations
+
+import random
+import zlib
+from dataclasses import dataclass
+from typing import Sequence
+
+import numpy as np
+from qdrant_client.http.models import ScoredPoint
+
+CONTROL_VOCABULARY = (
+    "access", "audit", "availability", "backup", "breach", "certificate", "cloud", "compliance",
+    "confidentiality", "control", "customer", "data", "deletion", "encryption", "identity",
+    "incident", "integrity", "key", "logging", "monitoring", "network", "notification",
+    "operator", "personal", "processing", "provider", "recovery", "region", "resilience",
+    "retention", "risk", "segregation", "service", "storage", "supplier", "transfer",
+    "vulnerability", "workload",
+)
+FILLER_VOCABULARY = (
+    "the", "shall", "must", "should", "ensure", "that", "all", "and", "of", "to", "in", "for",
+    "with", "where", "appropriate", "measures", "implemented", "documented", "reviewed",
+    "regularly", "at", "least", "annually", "by", "responsible", "party",
+)
+
+
+@dataclass(slots=True)
+class CorpusConfig:
+    documents: int = 50
+    paragraphs_per_document: int = 20
+    sentences_per_paragraph: int = 5
+    words_per_sentence: int = 18
+    seed: int = 13
+
+
+def _sentence(rng: random.Random, words: int) -> str:
+    tokens = [
+        rng.choice(CONTROL_VOCABULARY) if rng.random() < 0.35 else rng.choice(FILLER_VOCABULARY)
+        for _ in range(words)
+    ]
+    tokens[0] = tokens[0].capitalize()
+    return " ".join(tokens) + "."
+
+
+def generate_documents(config: CorpusConfig) -> list[str]:
+    """Return raw documents with blank-line paragraph breaks and ragged whitespace."""
+
+    rng = random.Random(config.seed)
+    documents: list[str] = []
+    for _ in range(config.documents):
+        paragraphs = []
+        for _ in range(config.paragraphs_per_document):
+            sentences = [
+                _sentence(rng, config.words_per_sentence)
+                for _ in range(config.sentences_per_paragraph)
+            ]
+            paragraphs.append("  ".join(sentences).replace(" data ", " da\u00adta "))
+        documents.append("\n\n".join(paragraphs))
+    return documents
+
+
+def generate_sections(config: CorpusConfig, count: int, *, offset: int = 0) -> list[str]:
+    """Return ``count`` paragraph-sized sections drawn from a seeded generator."""
+
+    rng = random.Random(config.seed + offset)
+    return [
+        " ".join(
+            _sentence(rng, config.words_per_sentence)
+            for _ in range(config.sentences_per_paragraph)
+        )
+        for _ in range(count)
+    ]
+
+
+class HashingEmbedder:
+    """Deterministic bag-of-words embedder exposing the ``SentenceTransformer.encode`` API."""
+
+    def __init__(self, dimension: int = 384) -> None:
+        self.dimension = dimension
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dimension
+
+    def encode(self, texts: Sequence[str], **_: object) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for token in text.lower().split():
+                digest = zlib.crc32(token.encode("utf-8"))
+                sign = 1.0 if digest & 1 else -1.0
+                vectors[row, (digest >> 1) % self.dimension] += sign
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-9)
+
+
+class InMemoryVectorClient:
+    """Brute-force cosine search with the subset of the ``QdrantClient`` API the matcher uses."""
+
+    def __init__(self, vectors: np.ndarray, payloads: Sequence[dict[str, str]]) -> None:
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        self.vectors = vectors / np.maximum(norms, 1e-9)
+        self.payloads = list(payloads)
+
+    def search(self, collection_name, query_vector, limit, query_filter=None):
+        query = np.asarray(query_vector, dtype=np.float32)
+        scores = self.vectors @ (query / max(float(np.linalg.norm(query)), 1e-9))
+        limit = min(limit, len(scores))
+        top = np.argpartition(-scores, limit - 1)[:limit]
+        top = top[np.argsort(-scores[top])]
+        return [
+            ScoredPoint(
+                id=int(index),
+                version=0,
+                score=float(scores[index]),
+                payload=self.payloads[index],
+                vector=None,
+            )
+            for index in top
+        ]
@@ -0,0 +1,68 @@
+"""Timing helpers shared by the benchmark suites."""
+from __future__ import annotations
+
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from typing import Any, Callable
+
+
+def measure(
+    fn: Callable[..., Any],
+    *,
+    items: int,
+    unit: str = "items",
+    repeat: int = 5,
+    warmup: int = 1,
+    setup: Callable[[], Any] | None = None,
+) -> dict[str, float | int | str]:
+    """Run ``fn`` ``warmup + repeat`` times and summarize the timed runs.
+
+    When ``setup`` is given it runs untimed before every call and its return value
+    is passed to ``fn``.
+    """
+
+    def invoke() -> float:
+        args = (setup(),) if setup is not None else ()
+        started = time.perf_counter()
+        fn(*args)
+        return time.perf_counter() - started
+
+    for _ in range(warmup):
+        invoke()
+    timings = [invoke() for _ in range(repeat)]
+    median = statistics.median(timings)
+    return {
+        "items": items,
+        "unit": unit,
+        "repeat": repeat,
+        "median_seconds": median,
+        "min_seconds": min(timings),
+        "max_seconds": max(timings),
+        f"{unit}_per_second": items / median if median else 0.0,
+    }
+
+
+def environment() -> dict[str, str | None]:
+    """Describe the interpreter and checkout so results can be compared over time."""
+
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    import numpy as np
+
+    return {
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "numpy": np.__version__,
+        "commit": commit,
+    }
@@ -0,0 +1,280 @@
+"""Run the EchoGraph benchmark suites and emit a JSON report.
+
+Everything runs offline: embeddings come from a deterministic hashing stub,
+vector search from an in-memory client and the upload flow from SQLite.
+
+Usage::
+
+    python -m benchmarks.run --documents 200 --suites chunking,segment --output bench.json
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import shutil
+import sys
+import tempfile
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+
+from benchmarks import serialization, startup
+from benchmarks.corpus import (
+    CorpusConfig,
+    HashingEmbedder,
+    InMemoryVectorClient,
+    generate_documents,
+    generate_sections,
+)
+from benchmarks.harness import environment, measure
+
+
+@dataclass(slots=True)
+class BenchmarkConfig:
+    corpus: CorpusConfig
+    guidelines: int = 500
+    regulations: int = 2000
+    top_k: int = 5
+    repeat: int = 5
+    segment_bytes: int = 10_000_000
+
+
+def bench_chunking(config: BenchmarkConfig) -> dict[str, object]:
+    from processing.chunking import chunk_text
+
+    documents = generate_documents(config.corpus)
+    tokens = sum(len(document.split()) for document in documents)
+
+    def run() -> None:
+        for document in documents:
+            chunk_text(document)
+
+    return measure(run, items=tokens, unit="tokens", repeat=config.repeat)
+
+
+def bench_normalize(config: BenchmarkConfig) -> dict[str, object]:
+    from processing.cleanup import normalize_many
+
+    documents = generate_documents(config.corpus)
+    characters = sum(len(document) for document in documents)
+    return measure(
+        lambda: normalize_many(documents), items=characters, unit="chars", repeat=config.repeat
+    )
+
+
+def bench_segment(config: BenchmarkConfig) -> dict[str, object]:
+    from processing.cleanup import normalize_paragraphs
+    from processing.segmentation import segment_text
+
+    # Repeat the synthetic corpus into one large document of ``segment_bytes`` characters
+    # so the measurement covers a single long scan rather than many short ones.
+    corpus = "\n\n".join(generate_documents(config.corpus))
+    copies = max(1, -(-config.segment_bytes // max(1, len(corpus))))
+    document = normalize_paragraphs("\n\n".join([corpus] * copies))
+
+    def run() -> None:
+        for _ in segment_text(document, max_length=800):
+            pass
+
+    return measure(run, items=len(document), unit="chars", repeat=config.repeat)
+
+
+def _section_vectors(config: BenchmarkConfig) -> tuple[np.ndarray, np.ndarray]:
+    embedder = HashingEmbedder()
+    guidelines = embedder.encode(generate_sections(config.corpus, config.guidelines))
+    regulations = embedder.encode(generate_sections(config.corpus, config.regulations, offset=1))
+    return guidelines, regulations
+
+
+def bench_similarity(config: BenchmarkConfig) -> dict[str, object]:
+    from processing.embeddings import cosine_similarity
+
+    guidelines, regulations = _section_vectors(config)
+    top_k = min(config.top_k, regulations.shape[0])
+
+    def run() -> None:
+        similarity = cosine_similarity(guidelines, regulations)
+        candidates = np.argpartition(-similarity, top_k - 1, axis=1)[:, :top_k]
+        rows = np.arange(similarity.shape[0])[:, None]
+        np.take_along_axis(candidates, np.argsort(-similarity[rows, candidates], axis=1), axis=1)
+
+    pairs = guidelines.shape[0] * regulations.shape[0]
+    return measure(run, items=pairs, unit="pairs", repeat=config.repeat)
+
+
+def bench_matcher(config: BenchmarkConfig) -> dict[str, object]:
+    from processing.matching import RelationshipMatcher
+
+    guidelines, regulations = _section_vectors(config)
+    payloads = [
+        {"id": f"reg-{index}", "title": f"Regulation {index}"}
+        for index in range(regulations.shape[0])
+    ]
+    matcher = RelationshipMatcher(
+        client=InMemoryVectorClient(regulations, payloads),
+        collection_name="benchmark",
+    )
+    chunks = [
+        {"id": f"guideline-{index}", "title": f"Guideline {index}"}
+        for index in range(guidelines.shape[0])
+    ]
+    lookup = {chunk["id"]: guidelines[index] for index, chunk in enumerate(chunks)}
+
+    def run() -> None:
+        matcher.match(
+            chunks,
+            embedding_lookup=lookup.__getitem__,
+            rationale_fn=RelationshipMatcher.summarize_rationale,
+        )
+
+    return measure(run, items=len(chunks), unit="queries", repeat=config.repeat)
+
+
+def bench_upload(config: BenchmarkConfig) -> dict[str, object]:
+    from docx import Document
+    from sqlalchemy import create_engine
+    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+    from sqlalchemy.orm import Session
+    from sqlalchemy.pool import NullPool
+
+    import api.upload as upload
+    from api.models import Base, RegulationSection
+
+    upload._embedding_model = HashingEmbedder()
+    workdir = Path(tempfile.mkdtemp(prefix="echograph-bench-"))
+    document_path = workdir / "guideline.docx"
+    docx = Document()
+    text = generate_documents(CorpusConfig(documents=1, seed=config.corpus.seed))[0]
+    for paragraph in text.split("\n\n"):
+        docx.add_paragraph(paragraph)
+    docx.save(document_path)
+    regulations = generate_sections(config.corpus, config.regulations, offset=1)
+    runs = iter(range(config.repeat + 2))
+
+    def setup() -> Path:
+        # Every run encodes (and reranks) from scratch, as a fresh upload would.
+        upload._embedding_cache.clear()
+        if upload._reranker is not None:
+            upload._reranker.clear()
+        database_path = workdir / f"upload-{next(runs)}.db"
+        engine = create_engine(f"sqlite:///{database_path}")
+        Base.metadata.create_all(engine)
+        with Session(engine) as session:
+            session.add_all(
+                RegulationSection(
+                    external_id=f"reg-{index}",
+                    title=f"Regulation {index}",
+                    body=body,
+                    region="EU",
+                    regulation_type="law",
+                )
+                for index, body in enumerate(regulations)
+            )
+            session.commit()
+        engine.dispose()
+        return database_path
+
+    def run(database_path: Path) -> None:
+        async def ingest() -> None:
+            engine = create_async_engine(f"sqlite+aiosqlite:///{database_path}", poolclass=NullPool)
+            factory = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+            async with factory() as session:
+                await upload.ingest_uploaded_document(
+                    session,
+                    file_path=document_path,
+                    category="guideline",
+                    title="Benchmark guideline",
+                    language="en",
+                    top_k=config.top_k,
+                )
+            await engine.dispose()
+
+        asyncio.run(ingest())
+
+    try:
+        return measure(run, items=len(text), unit="chars", repeat=config.repeat, setup=setup)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def bench_serialization(config: BenchmarkConfig) -> dict[str, object]:
+    return serialization.run(
+        guidelines=config.guidelines,
+        regulations=config.regulations,
+        matches=config.guidelines * config.top_k,
+        repeat=config.repeat,
+    )["results"]
+
+
+def bench_startup(config: BenchmarkConfig) -> dict[str, object]:
+    return startup.run(repeat=config.repeat)
+
+
+SUITES: dict[str, Callable[[BenchmarkConfig], dict[str, object]]] = {
+    "chunking": bench_chunking,
+    "normalize": bench_normalize,
+    "segment": bench_segment,
+    "similarity": bench_similarity,
+    "matcher": bench_matcher,
+    "upload": bench_upload,
+    "serialization": bench_serialization,
+    "startup": bench_startup,
+}
+
+
+def run_suites(config: BenchmarkConfig, suites: list[str]) -> dict[str, object]:
+    unknown = sorted(set(suites) - set(SUITES))
+    if unknown:
+        raise ValueError(f"Unknown benchmark suites: {', '.join(unknown)}")
+    return {
+        "benchmark": "echograph",
+        "environment": environment(),
+        "config": asdict(config),
+        "results": {name: SUITES[name](config) for name in suites},
+    }
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Run EchoGraph benchmarks")
+    parser.add_argument("--suites", default=",".join(SUITES), help="Comma-separated suite names")
+    parser.add_argument("--documents", type=int, default=50)
+    parser.add_argument("--paragraphs", type=int, default=20, help="Paragraphs per document")
+    parser.add_argument("--guidelines", type=int, default=500)
+    parser.add_argument("--regulations", type=int, default=2000)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--segment-mb", type=float, default=10.0, help="Document size for the segment suite"
+    )
+    parser.add_argument("--seed", type=int, default=13)
+    parser.add_argument("--output", type=Path, default=None)
+    return parser
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = build_parser().parse_args(argv)
+    config = BenchmarkConfig(
+        corpus=CorpusConfig(
+            documents=args.documents,
+            paragraphs_per_document=args.paragraphs,
+            seed=args.seed,
+        ),
+        guidelines=args.guidelines,
+        regulations=args.regulations,
+        top_k=args.top_k,
+        repeat=args.repeat,
+        segment_bytes=int(args.segment_mb * 1_000_000),
+    )
+    suites = [name.strip() for name in args.suites.split(",") if name.strip()]
+    report = json.dumps(run_suites(config, suites), indent=2)
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(report, encoding="utf-8")
+    sys.stdout.write(report + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""Compare list-endpoint serialization: ``api.schemas`` models vs. the Core/orjson path.
+
+Usage::
+
+    python -m benchmarks.serialization --matches 20000 --repeat 5 --output bench.json
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Callable
+
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session, selectinload
+
+from api.models import Base, CloudGuidelineSection, Match, RegulationSection
+from api.schemas import GuidelineSection as GuidelineSchema, MatchDetail as MatchSchema
+from api.serialization import (
+    ORJSON_AVAILABLE,
+    dumps,
+    guideline_select,
+    match_detail_select,
+    nested_rows_to_dicts,
+    rows_to_dicts,
+)
+from benchmarks.harness import measure
+
+BODY = "Providers shall encrypt customer data at rest and in transit using managed keys. " * 4
+
+
+def seed(session: Session, *, guidelines: int, regulations: int, matches: int) -> None:
+    session.add_all(
+        CloudGuidelineSection(external_id=f"g-{index}", title=f"Guideline {index}", body=BODY)
+        for index in range(guidelines)
+    )
+    session.add_all(
+        RegulationSection(
+            external_id=f"r-{index}",
+            title=f"Regulation {index}",
+            body=BODY,
+            region="EU",
+            regulation_type="law",
+        )
+        for index in range(regulations)
+    )
+    session.flush()
+    session.add_all(
+        Match(
+            guideline_id=1 + index % guidelines,
+            regulation_id=1 + (index * 7) % regulations,
+            score=0.5 + (index % 50) / 100,
+            confidence=0.5,
+            rationale="Guideline aligns with regulation based on thematic overlap.",
+            guideline_excerpt=BODY[:200],
+            regulation_excerpt=BODY[:200],
+        )
+        for index in range(matches)
+    )
+    session.commit()
+
+
+def schema_matches(session: Session) -> bytes:
+    adapter = TypeAdapter(list[MatchSchema])
+    rows = session.scalars(
+        select(Match).options(selectinload(Match.guideline), selectinload(Match.regulation))
+    ).all()
+    validated = [MatchSchema.model_validate(row) for row in rows]
+    # FastAPI validates route return values again against ``response_model``.
+    return adapter.dump_json(adapter.validate_python(validated), by_alias=True)
+
+
+def fast_matches(session: Session) -> bytes:
+    result = session.execute(match_detail_select())
+    return dumps(nested_rows_to_dicts(result.keys(), result.all()))
+
+
+def schema_guidelines(session: Session) -> bytes:
+    adapter = TypeAdapter(list[GuidelineSchema])
+    rows = session.scalars(select(CloudGuidelineSection)).all()
+    validated = [GuidelineSchema.model_validate(row) for row in rows]
+    return adapter.dump_json(adapter.validate_python(validated))
+
+
+def fast_guidelines(session: Session) -> bytes:
+    result = session.execute(guideline_select())
+    return dumps(rows_to_dicts(result.keys(), result.all()))
+
+
+def _timed(
+    engine,
+    render: Callable[[Session], bytes],
+    *,
+    rows: int,
+    repeat: int,
+) -> dict[str, object]:
+    payload_bytes = 0
+
+    def run() -> None:
+        nonlocal payload_bytes
+        with Session(engine) as session:
+            payload_bytes = len(render(session))
+
+    result = measure(run, items=rows, unit="rows", repeat=repeat)
+    result["payload_bytes"] = payload_bytes
+    return result
+
+
+def run(*, guidelines: int, regulations: int, matches: int, repeat: int) -> dict[str, object]:
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        seed(session, guidelines=guidelines, regulations=regulations, matches=matches)
+
+    cases = {
+        "guidelines": (schema_guidelines, fast_guidelines, guidelines),
+        "matches": (schema_matches, fast_matches, matches),
+    }
+    results: dict[str, object] = {}
+    for name, (schema_path, fast_path, rows) in cases.items():
+        baseline = _timed(engine, schema_path, rows=rows, repeat=repeat)
+        fast = _timed(engine, fast_path, rows=rows, repeat=repeat)
+        results[name] = {
+            "rows": rows,
+            "schemas": baseline,
+            "fast": fast,
+            "speedup": baseline["median_seconds"] / fast["median_seconds"],
+        }
+    engine.dispose()
+    return {"benchmark": "serialization", "orjson": ORJSON_AVAILABLE, "results": results}
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--guidelines", type=int, default=2000)
+    parser.add_argument("--regulations", type=int, default=2000)
+    parser.add_argument("--matches", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", type=Path, default=None)
+    return parser
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = build_parser().parse_args(argv)
+    report = run(
+        guidelines=args.guidelines,
+        regulations=args.regulations,
+        matches=args.matches,
+        repeat=args.repeat,
+    )
+    encoded = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(encoded, encoding="utf-8")
+    sys.stdout.write(encoded + "\n")
+
+
+if __name__ == "__main__":
+    main()
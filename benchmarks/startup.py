@@ -0,0 +1,103 @@
+"""Measure cold-start time and memory of the API and CLI entry points.
+
+Each target runs in a fresh interpreter that reports its own import time, peak
+RSS and which heavy dependencies ended up loaded.
+
+Usage::
+
+    python -m benchmarks.startup --repeat 5
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+HEAVY_MODULES = (
+    "torch",
+    "sentence_transformers",
+    "qdrant_client",
+    "pandas",
+    "pdfplumber",
+    "docx",
+    "tika",
+)
+
+TARGETS = {
+    "api.app": "import api.app",
+    "ingestion.cli --help": (
+        "import sys\n"
+        "sys.argv = ['ingestion.cli', '--help']\n"
+        "from ingestion.cli import main\n"
+        "try:\n"
+        "    main()\n"
+        "except SystemExit:\n"
+        "    pass\n"
+    ),
+    "processing": "import processing",
+}
+
+# On Linux ``ru_maxrss`` survives fork/exec, so a child would report the harness's
+# own peak; ``VmHWM`` belongs to the new address space and measures only the target.
+PROBE = """
+import json, resource, sys, time
+_started = time.perf_counter()
+{body}
+_elapsed = time.perf_counter() - _started
+try:
+    with open("/proc/self/status", encoding="ascii") as _status:
+        _peak_kb = next(int(line.split()[1]) for line in _status if line.startswith("VmHWM:"))
+    _rss_mb = _peak_kb / 1024
+except (OSError, StopIteration):
+    _rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    _rss_mb = _rss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+sys.stderr.write(json.dumps({{
+    "import_seconds": _elapsed,
+    "max_rss_mb": _rss_mb,
+    "heavy_modules": [name for name in {heavy!r} if name in sys.modules],
+}}) + "\\n")
+"""
+
+
+def probe(body: str) -> dict[str, object]:
+    code = PROBE.format(body=body, heavy=HEAVY_MODULES)
+    started = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    wall = time.perf_counter() - started
+    report = json.loads(completed.stderr.strip().splitlines()[-1])
+    report["process_seconds"] = wall
+    return report
+
+
+def run(*, repeat: int = 3) -> dict[str, object]:
+    results: dict[str, object] = {}
+    for name, body in TARGETS.items():
+        samples = [probe(body) for _ in range(repeat)]
+        results[name] = {
+            "repeat": repeat,
+            "median_import_seconds": statistics.median(s["import_seconds"] for s in samples),
+            "median_process_seconds": statistics.median(s["process_seconds"] for s in samples),
+            "max_rss_mb": max(s["max_rss_mb"] for s in samples),
+            "heavy_modules": samples[-1]["heavy_modules"],
+        }
+    return results
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Measure API and CLI cold-start cost")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+    report = {"benchmark": "startup", "results": run(repeat=args.repeat)}
+    sys.stdout.write(json.dumps(report, indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main()
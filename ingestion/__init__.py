@@ -1,6 +1,20 @@
 """Ingestion package for EchoGraph."""
 
+from importlib import import_module
+from typing import TYPE_CHECKING, Any
+
 from .config import IngestionConfig
-from .pipeline import IngestionPipeline
+
+if TYPE_CHECKING:  # pragma: no cover - imports for type checkers only
+    from .pipeline import IngestionPipeline
 
 __all__ = ["IngestionConfig", "IngestionPipeline"]
+
+
+def __getattr__(name: str) -> Any:
+    # The pipeline pulls in pandas and the document parsers; load it on first use.
+    if name != "IngestionPipeline":
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = import_module(".pipeline", __name__).IngestionPipeline
+    globals()[name] = value
+    return value
@@ -0,0 +1,132 @@
+"""Content-addressed on-disk cache of extracted document text.
+
+Entries are keyed by the SHA-256 of the file bytes plus the extractor version, so
+the same file uploaded twice (under any name) is parsed once, and changing the
+extraction code invalidates old entries. Each entry stores the page texts and
+extraction metadata as zlib-compressed JSON. When the directory grows beyond
+``max_bytes`` the least recently used entries are deleted.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import zlib
+from pathlib import Path
+from typing import Any
+
+from processing.metrics import REGISTRY
+
+EXTRACTION_CACHE_TOTAL = REGISTRY.counter(
+    "echograph_extraction_cache_total",
+    "Extraction cache lookups, by result.",
+    ("result",),
+)
+
+ENTRY_SUFFIX = ".json.z"
+
+
+def file_digest(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        for block in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ExtractionCache:
+    """Size-bounded LRU of JSON payloads stored under ``directory``.
+
+    Recency is tracked through file modification times, which a hit refreshes,
+    so several processes can share one directory.
+    """
+
+    def __init__(self, directory: Path, *, max_bytes: int = 512 * 1024 * 1024) -> None:
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+        self._size: int | None = None
+        self._lock = threading.Lock()
+
+    def key(self, path: Path, version: str) -> str:
+        return hashlib.sha256(f"{version}\0{file_digest(path)}".encode()).hexdigest()
+
+    def _entry(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}{ENTRY_SUFFIX}"
+
+    def get(self, key: str) -> dict[str, Any] | None:
+        entry = self._entry(key)
+        try:
+            payload = json.loads(zlib.decompress(entry.read_bytes()))
+            os.utime(entry)
+        except (OSError, zlib.error, ValueError):
+            with self._lock:
+                self.misses += 1
+            EXTRACTION_CACHE_TOTAL.inc(result="miss")
+            return None
+        with self._lock:
+            self.hits += 1
+        EXTRACTION_CACHE_TOTAL.inc(result="hit")
+        return payload
+
+    def put(self, key: str, payload: dict[str, Any]) -> None:
+        data = zlib.compress(json.dumps(payload, ensure_ascii=False).encode("utf-8"))
+        if len(data) > self.max_bytes:
+            return
+        entry = self._entry(key)
+        entry.parent.mkdir(parents=True, exist_ok=True)
+        temporary = entry.with_name(f"{entry.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        temporary.write_bytes(data)
+        with self._lock:
+            size = self._current_size()
+            previous = entry.stat().st_size if entry.exists() else 0
+            os.replace(temporary, entry)
+            self.writes += 1
+            self._size = size + len(data) - previous
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _entries(self) -> list[tuple[float, int, Path]]:
+        found = []
+        for entry in self.directory.glob(f"*/*{ENTRY_SUFFIX}"):
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            found.append((stat.st_mtime, stat.st_size, entry))
+        return found
+
+    def _current_size(self) -> int:
+        if self._size is None:
+            self._size = sum(size for _, size, _ in self._entries())
+        return self._size
+
+    def _evict(self) -> None:
+        # Rescan so entries written by other processes are accounted for.
+        entries = sorted(self._entries(), key=lambda item: item[0])
+        size = sum(item[1] for item in entries)
+        for _, entry_size, entry in entries:
+            if size <= self.max_bytes:
+                break
+            try:
+                entry.unlink()
+            except OSError:
+                continue
+            size -= entry_size
+            self.evictions += 1
+        self._size = size
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "writes": self.writes,
+                "evictions": self.evictions,
+                "bytes": self._current_size(),
+                "max_bytes": self.max_bytes,
+            }
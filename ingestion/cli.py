@@ -2,32 +2,198 @@
 from __future__ import annotations
 
 import argparse
+import json
+import signal
+from dataclasses import asdict
 from pathlib import Path
 
+from processing.metrics import REGISTRY
+
 from .config import IngestionConfig
-from .pipeline import IngestionPipeline
 
 
 def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(description="Run the EchoGraph ingestion pipeline")
-    parser.add_argument("sources", nargs="+", help="Source URLs to ingest")
+    parser.add_argument("sources", nargs="*", help="Source URLs to ingest")
     parser.add_argument("--output-dir", type=Path, default=Path("data/raw"))
     parser.add_argument("--metadata-dir", type=Path, default=Path("data/metadata"))
+    parser.add_argument(
+        "--cache-dir",
+        type=Path,
+        default=Path("data/cache/extraction"),
+        help="Reuse extracted text of files seen before (content-addressed)",
+    )
+    parser.add_argument("--cache-max-mb", type=float, default=512.0)
+    parser.add_argument("--no-cache", action="store_true", help="Always re-extract")
+    parser.add_argument(
+        "--corpus-dir",
+        type=Path,
+        default=Path("data/corpus"),
+        help="Compressed store of extracted text, read by the API for excerpts",
+    )
+    parser.add_argument("--no-corpus", action="store_true", help="Do not write the corpus")
+    parser.add_argument(
+        "--schedule", default=None, help="Cron expression (UTC) or @hourly/@daily/@weekly/@monthly"
+    )
+    parser.add_argument(
+        "--daemon", action="store_true", help="Stay running and ingest on every --schedule time"
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Run once, processing only sources that changed since the last run",
+    )
+    parser.add_argument(
+        "--jitter", type=float, default=60.0, help="Random delay (s) added to scheduled runs"
+    )
+    parser.add_argument(
+        "--rate-limit",
+        type=float,
+        default=1.0,
+        help="Minimum seconds between requests to the same host",
+    )
+    parser.add_argument(
+        "--mirror",
+        action="append",
+        nargs=2,
+        default=[],
+        metavar=("SOURCE", "URL"),
+        help="Alternative URL for a source; repeat for several mirrors",
+    )
+    parser.add_argument(
+        "--hedge-after",
+        type=float,
+        default=5.0,
+        help="Seconds before a slow download is also requested from the next mirror",
+    )
+    parser.add_argument(
+        "--download-attempts",
+        type=int,
+        default=3,
+        help="Download rounds over all mirrors, with exponential backoff between them",
+    )
+    parser.add_argument(
+        "--history", type=int, metavar="N", default=None, help="Print the last N runs and exit"
+    )
+    parser.add_argument(
+        "--documents",
+        type=int,
+        metavar="N",
+        default=None,
+        help="Print the last N ingested documents (see --source, --since) and exit",
+    )
+    parser.add_argument("--source", default=None, help="Filter --documents by source URL")
+    parser.add_argument(
+        "--since", default=None, help="ISO date/time filter for --history and --documents"
+    )
+    parser.add_argument(
+        "--import-metadata",
+        action="store_true",
+        help="Load per-document JSON files from --metadata-dir into the metadata store and exit",
+    )
+    parser.add_argument(
+        "--metrics-report",
+        type=Path,
+        default=None,
+        help="Write per-stage timings and counters as JSON to this path ('-' for stdout)",
+    )
     return parser
 
 
-def main() -> None:
+def main(argv: list[str] | None = None) -> None:
     parser = build_parser()
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
+    mirrors: dict[str, list[str]] = {}
+    for source, url in args.mirror:
+        mirrors.setdefault(source, []).append(url)
     config = IngestionConfig(
         sources=args.sources,
+        mirrors=mirrors,
+        hedge_after_seconds=args.hedge_after,
+        download_attempts=args.download_attempts,
         output_dir=args.output_dir,
         metadata_dir=args.metadata_dir,
+        schedule=args.schedule,
+        cache_dir=None if args.no_cache else args.cache_dir,
+        cache_max_bytes=int(args.cache_max_mb * 1024 * 1024),
+        corpus_dir=None if args.no_corpus else args.corpus_dir,
     )
-    pipeline = IngestionPipeline(config)
-    files = pipeline.run()
-    parquet = pipeline.to_parquet(files)
-    print(f"Wrote {len(files)} JSONL files and parquet at {parquet}")
+    if args.history is not None or args.documents is not None or args.import_metadata:
+        query_metadata(config, args)
+        return
+    if not args.sources:
+        parser.error("at least one source URL is required")
+    if args.daemon or args.incremental:
+        run_scheduled(config, args, parser)
+    else:
+        # Deferred so that ``--help`` and argument errors return without loading pandas
+        # and the document parsers.
+        from .pipeline import IngestionPipeline
+
+        pipeline = IngestionPipeline(config)
+        files = pipeline.run()
+        parquet = pipeline.to_parquet(files)
+        print(f"Wrote {len(files)} JSONL files and parquet at {parquet}")
+        if pipeline.cache is not None:
+            print(f"Extraction cache: {json.dumps(pipeline.cache.stats())}")
+        if pipeline.corpus is not None:
+            print(f"Corpus: {json.dumps(pipeline.corpus.stats())}")
+    if args.metrics_report:
+        write_metrics_report(args.metrics_report)
+
+
+def query_metadata(config: IngestionConfig, args: argparse.Namespace) -> None:
+    from .metadata import MetadataStore
+
+    store = MetadataStore(config.metadata_store_path())
+    try:
+        if args.import_metadata:
+            imported = store.import_json_files(config.metadata_dir)
+            print(f"Imported {imported} documents into {store.path}")
+        if args.history is not None:
+            for run in store.runs(since=args.since, limit=args.history):
+                print(json.dumps(asdict(run)))
+        if args.documents is not None:
+            for document in store.documents(
+                source=args.source, since=args.since, limit=args.documents
+            ):
+                print(json.dumps(asdict(document)))
+    finally:
+        store.close()
+
+
+def run_scheduled(
+    config: IngestionConfig, args: argparse.Namespace, parser: argparse.ArgumentParser
+) -> None:
+    from .scheduler import CronSchedule, HostRateLimiter, IngestionScheduler
+
+    scheduler = IngestionScheduler(
+        config,
+        jitter_seconds=args.jitter,
+        rate_limiter=HostRateLimiter(args.rate_limit),
+    )
+    if not args.daemon:
+        print(json.dumps(asdict(scheduler.run_once())))
+        return
+    if not config.schedule:
+        parser.error("--daemon requires --schedule")
+    try:
+        CronSchedule.parse(config.schedule)
+    except ValueError as exc:
+        parser.error(str(exc))
+    signal.signal(signal.SIGTERM, lambda *_: scheduler.stop())
+    try:
+        scheduler.serve()
+    except KeyboardInterrupt:
+        scheduler.stop()
+
+
+def write_metrics_report(destination: Path) -> None:
+    report = json.dumps(REGISTRY.snapshot(), indent=2)
+    if str(destination) == "-":
+        print(report)
+    else:
+        destination.write_text(report, encoding="utf-8")
 
 
 if __name__ == "__main__":
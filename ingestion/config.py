@@ -3,7 +3,7 @@ from __future__ import annotations
 
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Sequence
+from typing import Mapping, Sequence
 
 
 @dataclass(slots=True)
@@ -11,10 +11,20 @@ class IngestionConfig:
     """Runtime configuration for an ingestion job."""
 
     sources: Sequence[str]
+    # Alternative URLs per source URL; the source URL stays the document's identity.
+    mirrors: Mapping[str, Sequence[str]] = field(default_factory=dict)
+    hedge_after_seconds: float = 5.0
+    download_attempts: int = 3
+    retry_backoff_seconds: float = 2.0
+    download_timeout: float = 60.0
     output_dir: Path = Path("data/raw")
     metadata_dir: Path = Path("data/metadata")
     tika_server_url: str | None = None
     schedule: str | None = None
+    metadata_db: Path | None = None  # defaults to ``metadata_dir / "ingestion.db"``
+    cache_dir: Path | None = None
+    cache_max_bytes: int = 512 * 1024 * 1024
+    corpus_dir: Path | None = None
     allowed_mime_types: Sequence[str] = field(
         default_factory=lambda: (
             "application/pdf",
@@ -23,6 +33,9 @@ class IngestionConfig:
         )
     )
 
+    def metadata_store_path(self) -> Path:
+        return self.metadata_db or self.metadata_dir / "ingestion.db"
+
     def ensure_directories(self) -> None:
         self.output_dir.mkdir(parents=True, exist_ok=True)
         self.metadata_dir.mkdir(parents=True, exist_ok=True)
@@ -1,19 +1,52 @@
-"""Utilities for downloading document sources."""
+"""Utilities for downloading document sources.
+
+A source can list mirror URLs. ``MirrorFetcher`` requests the mirror with the best
+recent latency first; if it has not finished after ``hedge_after`` seconds (or
+fails), the next mirror is requested as well and the first complete download wins.
+When every mirror fails, the round is retried with exponential backoff.
+"""
 from __future__ import annotations
 
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Iterable
+from typing import TYPE_CHECKING, Any, Callable, Iterable, Mapping, Sequence
+
+from processing.metrics import REGISTRY
+
+if TYPE_CHECKING:
+    from .config import IngestionConfig
 
-import requests
+DOWNLOAD_REQUESTS_TOTAL = REGISTRY.counter(
+    "echograph_download_requests_total",
+    "Mirror requests of ingestion downloads, by outcome (ok, failed or hedged).",
+    ("outcome",),
+)
 
 
 class DownloadError(Exception):
     """Raised when a download fails."""
 
 
-def download_file(url: str, destination: Path, *, chunk_size: int = 16384) -> Path:
-    """Download a single file and return its path."""
-    response = requests.get(url, stream=True, timeout=60)
+@dataclass(slots=True)
+class FetchResult:
+    url: str
+    path: Path | None  # None when the server reported the source as not modified
+    etag: str | None = None
+    last_modified: str | None = None
+    mirror: str | None = None  # URL that served the response, when it differs from ``url``
+
+
+def destination_for(url: str, output_dir: Path) -> Path:
+    return output_dir / url.split("/")[-1]
+
+
+def _write_body(response: Any, url: str, destination: Path, chunk_size: int) -> Path:
+    import requests
+
     try:
         response.raise_for_status()
     except requests.HTTPError as exc:
@@ -28,11 +61,251 @@ def download_file(url: str, destination: Path, *, chunk_size: int = 16384) -> Pa
     return destination
 
 
-def download_all(urls: Iterable[str], output_dir: Path) -> list[Path]:
+def download_file(
+    url: str, destination: Path, *, chunk_size: int = 16384, timeout: float = 60.0
+) -> Path:
+    """Download a single file and return its path."""
+    import requests
+
+    response = requests.get(url, stream=True, timeout=timeout)
+    return _write_body(response, url, destination, chunk_size)
+
+
+def fetch_if_changed(
+    url: str,
+    destination: Path,
+    *,
+    etag: str | None = None,
+    last_modified: str | None = None,
+    chunk_size: int = 16384,
+    timeout: float = 60.0,
+) -> FetchResult:
+    """Download ``url`` unless the validators from the previous fetch still match."""
+    import requests
+
+    headers = {}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+    response = requests.get(url, stream=True, timeout=timeout, headers=headers)
+    if response.status_code == 304:
+        return FetchResult(url, None, etag, last_modified)
+    path = _write_body(response, url, destination, chunk_size)
+    return FetchResult(
+        url, path, response.headers.get("ETag"), response.headers.get("Last-Modified")
+    )
+
+
+class MirrorStats:
+    """Smoothed download latency and consecutive failures per mirror URL."""
+
+    def __init__(
+        self,
+        latencies: Mapping[str, float] | None = None,
+        failures: Mapping[str, int] | None = None,
+        *,
+        smoothing: float = 0.3,
+    ) -> None:
+        self.latencies = dict(latencies or {})
+        self.failures = dict(failures or {})
+        self.smoothing = smoothing
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_snapshot(cls, snapshot: Mapping[str, Mapping[str, Any]]) -> MirrorStats:
+        return cls(
+            {url: entry["latency_seconds"] for url, entry in snapshot.items()},
+            {url: entry["failures"] for url, entry in snapshot.items()},
+        )
+
+    def record(self, url: str, seconds: float, *, ok: bool = True) -> None:
+        with self._lock:
+            previous = self.latencies.get(url)
+            self.latencies[url] = (
+                seconds
+                if previous is None
+                else previous + self.smoothing * (seconds - previous)
+            )
+            self.failures[url] = 0 if ok else self.failures.get(url, 0) + 1
+
+    def order(self, urls: Sequence[str], *, unknown: float) -> list[str]:
+        """``urls`` fastest first; unmeasured mirrors count as ``unknown`` seconds.
+
+        Each consecutive failure doubles a mirror's score. The sort is stable, so
+        mirrors with equal scores keep their configured order.
+        """
+
+        with self._lock:
+            scores = {
+                url: self.latencies.get(url, unknown) * 2 ** min(self.failures.get(url, 0), 6)
+                for url in urls
+            }
+        return sorted(urls, key=scores.__getitem__)
+
+    def snapshot(self) -> dict[str, dict[str, float | int]]:
+        with self._lock:
+            return {
+                url: {"latency_seconds": latency, "failures": self.failures.get(url, 0)}
+                for url, latency in self.latencies.items()
+            }
+
+
+class MirrorFetcher:
+    """Fetches a source from the fastest of its mirrors, hedging slow requests."""
+
+    def __init__(
+        self,
+        mirrors: Mapping[str, Sequence[str]] | None = None,
+        *,
+        hedge_after: float = 5.0,
+        attempts: int = 3,
+        backoff_seconds: float = 2.0,
+        timeout: float = 60.0,
+        stats: MirrorStats | None = None,
+        fetch: Callable[..., FetchResult] = fetch_if_changed,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], object] = time.sleep,
+    ) -> None:
+        self.mirrors = {source: list(urls) for source, urls in (mirrors or {}).items()}
+        self.hedge_after = hedge_after
+        self.attempts = max(attempts, 1)
+        self.backoff_seconds = backoff_seconds
+        self.timeout = timeout
+        self.stats = stats or MirrorStats()
+        self._fetch = fetch
+        self._clock = clock
+        self._sleep = sleep
+
+    @classmethod
+    def from_config(
+        cls, config: IngestionConfig, *, stats: MirrorStats | None = None
+    ) -> MirrorFetcher:
+        return cls(
+            config.mirrors,
+            hedge_after=config.hedge_after_seconds,
+            attempts=config.download_attempts,
+            backoff_seconds=config.retry_backoff_seconds,
+            timeout=config.download_timeout,
+            stats=stats,
+        )
+
+    def candidates(self, source: str) -> list[str]:
+        """The source URL and its mirrors, best first."""
+
+        urls = list(dict.fromkeys([source, *self.mirrors.get(source, ())]))
+        return self.stats.order(urls, unknown=self.hedge_after)
+
+    def fetch(
+        self,
+        source: str,
+        destination: Path,
+        *,
+        etag: str | None = None,
+        last_modified: str | None = None,
+    ) -> FetchResult:
+        """Download ``source`` to ``destination``; retried with backoff if every mirror fails."""
+
+        errors: list[str] = []
+        for attempt in range(self.attempts):
+            if attempt:
+                self._sleep(self.backoff_seconds * 2 ** (attempt - 1))
+            try:
+                result = self._hedged(source, destination, etag, last_modified)
+            except DownloadError as exc:
+                errors.append(str(exc))
+                continue
+            return FetchResult(
+                source,
+                result.path,
+                result.etag,
+                result.last_modified,
+                mirror=result.url if result.url != source else None,
+            )
+        raise DownloadError(
+            f"Failed to download {source} after {self.attempts} attempts: {errors[-1]}"
+        )
+
+    def _hedged(
+        self, source: str, destination: Path, etag: str | None, last_modified: str | None
+    ) -> FetchResult:
+        pending = self.candidates(source)
+        # Every request writes its own part file; the winner's is renamed into place.
+        parts = {
+            url: destination.with_name(f".{destination.name}.{index}.part")
+            for index, url in enumerate(pending)
+        }
+        started: dict[Future[FetchResult], tuple[str, float]] = {}
+        errors: list[str] = []
+        executor = ThreadPoolExecutor(max_workers=len(pending))
+
+        def start() -> None:
+            url = pending.pop(0)
+            future = executor.submit(
+                self._fetch,
+                url,
+                parts[url],
+                etag=etag,
+                last_modified=last_modified,
+                timeout=self.timeout,
+            )
+            started[future] = (url, self._clock())
+
+        try:
+            start()
+            while started:
+                timeout = self.hedge_after if pending else None
+                done, _ = wait(started, timeout=timeout, return_when=FIRST_COMPLETED)
+                if not done:
+                    DOWNLOAD_REQUESTS_TOTAL.inc(outcome="hedged")
+                    start()
+                    continue
+                for future in done:
+                    url, began = started.pop(future)
+                    elapsed = self._clock() - began
+                    try:
+                        result = future.result()
+                    except Exception as exc:  # noqa: BLE001 - the next mirror is tried
+                        self.stats.record(url, max(elapsed, self.timeout), ok=False)
+                        parts[url].unlink(missing_ok=True)
+                        DOWNLOAD_REQUESTS_TOTAL.inc(outcome="failed")
+                        errors.append(f"{url}: {type(exc).__name__}: {exc}")
+                        if pending:
+                            # Replace the failed request now, even while others are in flight.
+                            start()
+                        continue
+                    self.stats.record(url, elapsed)
+                    DOWNLOAD_REQUESTS_TOTAL.inc(outcome="ok")
+                    for loser, (other, other_began) in started.items():
+                        # Slower than the winner so far; its final time is never awaited.
+                        self.stats.record(other, self._clock() - other_began)
+                        loser.add_done_callback(_discard(parts[other]))
+                    started.clear()
+                    path = None
+                    if result.path is not None:
+                        os.replace(result.path, destination)
+                        path = destination
+                    return FetchResult(url, path, result.etag, result.last_modified)
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+        raise DownloadError(f"No mirror of {source} succeeded: {'; '.join(errors)}")
+
+
+def _discard(path: Path) -> Callable[[Future[FetchResult]], None]:
+    def callback(_: Future[FetchResult]) -> None:
+        path.unlink(missing_ok=True)
+
+    return callback
+
+
+def download_all(
+    urls: Iterable[str], output_dir: Path, *, fetcher: MirrorFetcher | None = None
+) -> list[Path]:
     """Download multiple files into an output directory."""
+    fetcher = fetcher or MirrorFetcher()
     downloaded: list[Path] = []
     for url in urls:
-        filename = url.split("/")[-1]
-        destination = output_dir / filename
-        downloaded.append(download_file(url, destination))
+        result = fetcher.fetch(url, destination_for(url, output_dir))
+        if result.path is not None:
+            downloaded.append(result.path)
     return downloaded
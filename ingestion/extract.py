@@ -1,30 +1,194 @@
 """Text extraction utilities."""
 from __future__ import annotations
 
+import os
+import re
+import time
+import unicodedata
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Iterable
+from typing import Any, Callable, Iterable, Sequence
 
-import pdfplumber
-from docx import Document
-from tika import parser
+from processing.metrics import REGISTRY
+
+from .cache import ExtractionCache
+
+# Parser libraries are imported inside each extractor so that importing this module
+# (for example from the API) does not pay for every backend up front.
+
+PDF_PAGES_TOTAL = REGISTRY.counter(
+    "echograph_pdf_pages_total",
+    "PDF pages extracted, by backend.",
+    ("backend",),
+)
+PDF_SECONDS_TOTAL = REGISTRY.counter(
+    "echograph_pdf_extract_seconds_total",
+    "Seconds spent extracting PDF pages, by backend.",
+    ("backend",),
+)
+
+# Bump when extraction output changes so cached results are not reused.
+EXTRACTOR_VERSION = "1"
+
+CID_RE = re.compile(r"\(cid:\d+\)")
+GARBLED_CATEGORIES = frozenset({"Cc", "Co", "Cn", "Cs"})
 
 
 class ExtractionError(Exception):
     """Raised when text extraction fails."""
 
 
+@dataclass(slots=True)
+class Extraction:
+    text: str
+    metadata: dict[str, Any] = field(default_factory=dict)
+    pages: list[str] = field(default_factory=list)  # empty for formats without pages
+
+
+# A PDF backend returns the text of the requested zero-based pages (all pages when
+# ``pages`` is None), keyed by page index.
+PdfBackend = Callable[[Path, Sequence[int] | None], dict[int, str]]
+
+
+def _pdfium_pages(path: Path, pages: Sequence[int] | None = None) -> dict[int, str]:
+    import pypdfium2 as pdfium
+
+    document = pdfium.PdfDocument(path)
+    try:
+        texts: dict[int, str] = {}
+        for index in range(len(document)) if pages is None else pages:
+            page = document[index]
+            textpage = page.get_textpage()
+            try:
+                texts[index] = textpage.get_text_bounded()
+            finally:
+                textpage.close()
+                page.close()
+        return texts
+    finally:
+        document.close()
+
+
+def _pdfplumber_pages(path: Path, pages: Sequence[int] | None = None) -> dict[int, str]:
+    import pdfplumber
+
+    numbers = None if pages is None else [index + 1 for index in pages]
+    with pdfplumber.open(path, pages=numbers) as pdf:
+        return {page.page_number - 1: page.extract_text() or "" for page in pdf.pages}
+
+
+# Tried in order: the first backend extracts every page, later ones only re-extract
+# the pages whose text looks degraded. pypdfium2 is a fast text-only parser;
+# pdfplumber is slower but recovers layout-heavy pages.
+PDF_BACKENDS: dict[str, PdfBackend] = {
+    "pypdfium2": _pdfium_pages,
+    "pdfplumber": _pdfplumber_pages,
+}
+
+
+def garbled_ratio(text: str) -> float:
+    """Share of non-whitespace characters that are unmapped glyphs or control codes."""
+
+    cid_chars = sum(len(match) for match in CID_RE.findall(text))
+    visible = bad = 0
+    for char in text:
+        if char.isspace():
+            continue
+        visible += 1
+        if char == "\ufffd" or unicodedata.category(char) in GARBLED_CATEGORIES:
+            bad += 1
+    if not visible:
+        return 1.0
+    return min(1.0, (bad + cid_chars) / visible)
+
+
+def page_is_degraded(text: str, *, max_garbled_ratio: float = 0.1) -> bool:
+    return not text.strip() or garbled_ratio(text) > max_garbled_ratio
+
+
+def extract_pdf_document(path: Path, *, max_garbled_ratio: float = 0.1) -> Extraction:
+    """Extract PDF text with the fastest backend, falling back per degraded page.
+
+    ``metadata["page_backends"]`` names the backend whose text was kept for each
+    page and ``metadata["backends"]`` reports pages, seconds and pages/second for
+    every backend that ran.
+    """
+
+    texts: dict[int, str] = {}
+    chosen: dict[int, str] = {}
+    stats: dict[str, dict[str, Any]] = {}
+    errors: list[str] = []
+    pending: list[int] | None = None  # None: every page
+    for name, backend in PDF_BACKENDS.items():
+        started = time.perf_counter()
+        try:
+            extracted = backend(path, pending)
+        except ImportError:
+            continue
+        except Exception as exc:  # noqa: BLE001 - a later backend may still read the file
+            errors.append(f"{name}: {exc}")
+            continue
+        seconds = time.perf_counter() - started
+        stats[name] = {
+            "pages": len(extracted),
+            "seconds": round(seconds, 6),
+            "pages_per_second": round(len(extracted) / seconds, 2) if seconds > 0 else 0.0,
+        }
+        PDF_PAGES_TOTAL.inc(len(extracted), backend=name)
+        PDF_SECONDS_TOTAL.inc(seconds, backend=name)
+        for index, text in extracted.items():
+            previous = texts.get(index)
+            if previous is None or _better(text, previous, max_garbled_ratio):
+                texts[index] = text
+                chosen[index] = name
+        pending = sorted(
+            index
+            for index, text in texts.items()
+            if page_is_degraded(text, max_garbled_ratio=max_garbled_ratio)
+        )
+        if not pending:
+            break
+    if not stats:
+        detail = "; ".join(errors) or "no PDF backend is installed"
+        raise ExtractionError(f"Could not extract {path}: {detail}")
+
+    order = sorted(texts)
+    pages = [texts[index] for index in order]
+    return Extraction(
+        text="\n\n".join(pages),
+        metadata={
+            "extractor": "pdf",
+            "pages": len(order),
+            "page_backends": [chosen[index] for index in order],
+            "backends": stats,
+        },
+        pages=pages,
+    )
+
+
+def _better(candidate: str, current: str, max_garbled_ratio: float) -> bool:
+    """Whether a fallback backend's ``candidate`` should replace a degraded page."""
+
+    if not candidate.strip() or not page_is_degraded(current, max_garbled_ratio=max_garbled_ratio):
+        return False
+    return not current.strip() or garbled_ratio(candidate) < garbled_ratio(current)
+
+
 def extract_pdf(path: Path) -> str:
-    with pdfplumber.open(path) as pdf:
-        pages = [page.extract_text() or "" for page in pdf.pages]
-    return "\n".join(pages)
+    return extract_pdf_document(path).text
 
 
 def extract_docx(path: Path) -> str:
+    from docx import Document
+
     document = Document(path)
-    return "\n".join(paragraph.text for paragraph in document.paragraphs)
+    # A blank line between paragraphs lets ``normalize_paragraphs`` keep the breaks.
+    return "\n\n".join(paragraph.text for paragraph in document.paragraphs)
 
 
 def extract_via_tika(path: Path) -> str:
+    from tika import parser
+
     parsed = parser.from_file(str(path))
     return parsed.get("content", "") or ""
 
@@ -35,11 +199,79 @@ EXTRACTORS: dict[str, callable[[Path], str]] = {
     ".doc": extract_via_tika,
 }
 
+# Extractors that also report metadata; suffixes missing here fall back to EXTRACTORS.
+DOCUMENT_EXTRACTORS: dict[str, Callable[[Path], Extraction]] = {
+    ".pdf": extract_pdf_document,
+}
+
+
+_default_cache: ExtractionCache | None = None
+
+
+def default_cache() -> ExtractionCache | None:
+    """Cache configured by ``EXTRACTION_CACHE_DIR``; None (no caching) when unset."""
+
+    global _default_cache
+    directory = os.getenv("EXTRACTION_CACHE_DIR")
+    if not directory:
+        return None
+    if _default_cache is None or _default_cache.directory != Path(directory):
+        max_mb = float(os.getenv("EXTRACTION_CACHE_MAX_MB", "512"))
+        _default_cache = ExtractionCache(Path(directory), max_bytes=int(max_mb * 1024 * 1024))
+    return _default_cache
+
+
+def extractor_version(suffix: str) -> str:
+    if suffix == ".pdf":
+        return f"{EXTRACTOR_VERSION}:pdf:{','.join(PDF_BACKENDS)}"
+    return f"{EXTRACTOR_VERSION}:{suffix}"
+
+
+def _extract_uncached(path: Path, suffix: str) -> Extraction:
+    if suffix in DOCUMENT_EXTRACTORS:
+        return DOCUMENT_EXTRACTORS[suffix](path)
+    extractor = EXTRACTORS.get(suffix, extract_via_tika)
+    return Extraction(extractor(path), {"extractor": extractor.__name__})
+
+
+def extract_document(path: Path, *, cache: ExtractionCache | None = None) -> Extraction:
+    """Extract ``path``, served from ``cache`` (or ``default_cache()``) when possible."""
+
+    suffix = path.suffix.lower()
+    cache = cache or default_cache()
+    if cache is None:
+        return _extract_uncached(path, suffix)
+
+    key = cache.key(path, extractor_version(suffix))
+    cached = cache.get(key)
+    if cached is not None:
+        pages = cached["pages"]
+        text = "\n\n".join(pages) if pages else cached["text"]
+        return Extraction(text, {**cached["metadata"], "cached": True}, pages)
+    extraction = _extract_uncached(path, suffix)
+    # Paged documents store only their pages; the text is rebuilt from them on a hit.
+    cache.put(
+        key,
+        {
+            "pages": extraction.pages,
+            "text": None if extraction.pages else extraction.text,
+            "metadata": extraction.metadata,
+        },
+    )
+    return extraction
+
+
+def extract_text(path: Path, *, cache: ExtractionCache | None = None) -> str:
+    return extract_document(path, cache=cache).text
+
 
-def extract_text(path: Path) -> str:
-    extractor = EXTRACTORS.get(path.suffix.lower(), extract_via_tika)
-    return extractor(path)
+def batch_extract(
+    paths: Iterable[Path], *, cache: ExtractionCache | None = None
+) -> dict[Path, str]:
+    return {path: extract_text(path, cache=cache) for path in paths}
 
 
-def batch_extract(paths: Iterable[Path]) -> dict[Path, str]:
-    return {path: extract_text(path) for path in paths}
+def batch_extract_documents(
+    paths: Iterable[Path], *, cache: ExtractionCache | None = None
+) -> dict[Path, Extraction]:
+    return {path: extract_document(path, cache=cache) for path in paths}
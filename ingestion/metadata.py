@@ -0,0 +1,294 @@
+"""SQLite store for ingestion runs, sources and per-document extraction results.
+
+One WAL-mode database (``<metadata_dir>/ingestion.db`` by default) replaces the
+per-document JSON files and the scheduler's state files, so history can be
+queried by source or date with an index instead of listing and parsing files.
+Documents of a run are written in a single transaction.
+"""
+from __future__ import annotations
+
+import json
+import sqlite3
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id TEXT PRIMARY KEY,
+    started_at TEXT NOT NULL,
+    finished_at TEXT,
+    duration_seconds REAL,
+    status TEXT NOT NULL,
+    sources INTEGER NOT NULL DEFAULT 0,
+    changed TEXT NOT NULL DEFAULT '[]',
+    files TEXT NOT NULL DEFAULT '[]',
+    errors TEXT NOT NULL DEFAULT '{}'
+);
+CREATE INDEX IF NOT EXISTS ix_runs_started_at ON runs (started_at);
+
+CREATE TABLE IF NOT EXISTS sources (
+    url TEXT PRIMARY KEY,
+    etag TEXT,
+    last_modified TEXT,
+    sha256 TEXT,
+    size_bytes INTEGER,
+    checked_at TEXT,
+    changed_at TEXT
+);
+
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    run_id TEXT,
+    source TEXT NOT NULL,
+    source_path TEXT NOT NULL,
+    sha256 TEXT,
+    size_bytes INTEGER,
+    num_characters INTEGER,
+    ingested_at TEXT NOT NULL,
+    extract_seconds REAL,
+    status TEXT NOT NULL,
+    error TEXT,
+    extraction TEXT NOT NULL DEFAULT '{}'
+);
+CREATE INDEX IF NOT EXISTS ix_documents_source ON documents (source, ingested_at);
+CREATE INDEX IF NOT EXISTS ix_documents_ingested_at ON documents (ingested_at);
+CREATE INDEX IF NOT EXISTS ix_documents_sha256 ON documents (sha256);
+
+CREATE TABLE IF NOT EXISTS mirrors (
+    url TEXT PRIMARY KEY,
+    latency_seconds REAL NOT NULL,
+    failures INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+
+@dataclass(slots=True)
+class RunRecord:
+    run_id: str
+    started_at: str
+    finished_at: str | None = None
+    duration_seconds: float | None = None
+    status: str = "running"  # ok, partial (some sources failed), failed or skipped
+    sources: int = 0
+    changed: list[str] = field(default_factory=list)
+    files: list[str] = field(default_factory=list)
+    errors: dict[str, str] = field(default_factory=dict)
+
+
+@dataclass(slots=True)
+class DocumentRecord:
+    source: str
+    source_path: str
+    ingested_at: str
+    status: str = "ok"  # ok or failed
+    run_id: str | None = None
+    sha256: str | None = None
+    size_bytes: int | None = None
+    num_characters: int | None = None
+    extract_seconds: float | None = None
+    error: str | None = None
+    extraction: dict[str, Any] = field(default_factory=dict)
+
+
+DOCUMENT_COLUMNS = tuple(DocumentRecord.__dataclass_fields__)
+SOURCE_COLUMNS = ("etag", "last_modified", "sha256", "size_bytes", "checked_at", "changed_at")
+
+
+class MetadataStore:
+    """Indexed history of ingestion runs, source validators and documents."""
+
+    def __init__(self, path: Path, *, timeout: float = 30.0) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(self.path, timeout=timeout, isolation_level=None)
+        self._connection.row_factory = sqlite3.Row
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self._connection.close()
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        self._connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield self._connection
+        except BaseException:
+            self._connection.execute("ROLLBACK")
+            raise
+        self._connection.execute("COMMIT")
+
+    # Runs -------------------------------------------------------------------
+
+    def record_run(self, record: RunRecord) -> None:
+        with self.transaction() as connection:
+            connection.execute(
+                """
+                INSERT OR REPLACE INTO runs (id, started_at, finished_at, duration_seconds,
+                    status, sources, changed, files, errors)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    record.run_id,
+                    record.started_at,
+                    record.finished_at,
+                    record.duration_seconds,
+                    record.status,
+                    record.sources,
+                    json.dumps(record.changed),
+                    json.dumps(record.files),
+                    json.dumps(record.errors),
+                ),
+            )
+
+    def runs(
+        self, *, since: str | None = None, until: str | None = None, limit: int = 20
+    ) -> list[RunRecord]:
+        """Runs started in ``[since, until)`` (ISO timestamps), newest first."""
+
+        rows = self._connection.execute(
+            """
+            SELECT * FROM runs
+            WHERE (:since IS NULL OR started_at >= :since)
+              AND (:until IS NULL OR started_at < :until)
+            ORDER BY started_at DESC, rowid DESC
+            LIMIT :limit
+            """,
+            {"since": since, "until": until, "limit": limit},
+        )
+        return [
+            RunRecord(
+                run_id=row["id"],
+                started_at=row["started_at"],
+                finished_at=row["finished_at"],
+                duration_seconds=row["duration_seconds"],
+                status=row["status"],
+                sources=row["sources"],
+                changed=json.loads(row["changed"]),
+                files=json.loads(row["files"]),
+                errors=json.loads(row["errors"]),
+            )
+            for row in rows
+        ]
+
+    # Sources ----------------------------------------------------------------
+
+    def source_states(self) -> dict[str, dict[str, Any]]:
+        rows = self._connection.execute("SELECT * FROM sources")
+        return {row["url"]: {column: row[column] for column in SOURCE_COLUMNS} for row in rows}
+
+    def update_sources(self, states: dict[str, dict[str, Any]]) -> None:
+        rows = [
+            (url, *(state.get(column) for column in SOURCE_COLUMNS))
+            for url, state in states.items()
+        ]
+        with self.transaction() as connection:
+            connection.executemany(
+                f"INSERT OR REPLACE INTO sources (url, {', '.join(SOURCE_COLUMNS)}) "
+                f"VALUES (?, {', '.join('?' for _ in SOURCE_COLUMNS)})",
+                rows,
+            )
+
+    # Mirrors ----------------------------------------------------------------
+
+    def mirror_stats(self) -> dict[str, dict[str, Any]]:
+        rows = self._connection.execute("SELECT url, latency_seconds, failures FROM mirrors")
+        return {
+            row["url"]: {"latency_seconds": row["latency_seconds"], "failures": row["failures"]}
+            for row in rows
+        }
+
+    def update_mirrors(self, stats: dict[str, dict[str, Any]]) -> None:
+        with self.transaction() as connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO mirrors (url, latency_seconds, failures) VALUES (?, ?, ?)",
+                [
+                    (url, entry["latency_seconds"], entry["failures"])
+                    for url, entry in stats.items()
+                ],
+            )
+
+    # Documents --------------------------------------------------------------
+
+    def record_documents(self, records: Iterable[DocumentRecord]) -> int:
+        rows = [
+            tuple(
+                json.dumps(record.extraction) if name == "extraction" else getattr(record, name)
+                for name in DOCUMENT_COLUMNS
+            )
+            for record in records
+        ]
+        with self.transaction() as connection:
+            connection.executemany(
+                f"INSERT INTO documents ({', '.join(DOCUMENT_COLUMNS)}) "
+                f"VALUES ({', '.join('?' for _ in DOCUMENT_COLUMNS)})",
+                rows,
+            )
+        return len(rows)
+
+    def documents(
+        self,
+        *,
+        source: str | None = None,
+        since: str | None = None,
+        until: str | None = None,
+        status: str | None = None,
+        limit: int = 100,
+    ) -> list[DocumentRecord]:
+        """Documents ingested in ``[since, until)``, newest first."""
+
+        rows = self._connection.execute(
+            f"""
+            SELECT {', '.join(DOCUMENT_COLUMNS)} FROM documents
+            WHERE (:source IS NULL OR source = :source)
+              AND (:since IS NULL OR ingested_at >= :since)
+              AND (:until IS NULL OR ingested_at < :until)
+              AND (:status IS NULL OR status = :status)
+            ORDER BY ingested_at DESC, id DESC
+            LIMIT :limit
+            """,
+            {"source": source, "since": since, "until": until, "status": status, "limit": limit},
+        )
+        return [
+            DocumentRecord(**{**dict(row), "extraction": json.loads(row["extraction"])})
+            for row in rows
+        ]
+
+    # Import -----------------------------------------------------------------
+
+    def import_json_files(self, directory: Path) -> int:
+        """Load the per-document JSON files written by earlier versions; returns rows added.
+
+        Files already imported (same source path and timestamp) are skipped, so the
+        import can be repeated safely.
+        """
+
+        existing = {
+            tuple(row)
+            for row in self._connection.execute("SELECT source_path, ingested_at FROM documents")
+        }
+        records = []
+        for path in sorted(Path(directory).glob("*.json")):
+            try:
+                data = json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                continue
+            if not isinstance(data, dict) or "source_path" not in data:
+                continue
+            key = (data["source_path"], data.get("ingested_at", ""))
+            if key in existing:
+                continue
+            existing.add(key)
+            records.append(
+                DocumentRecord(
+                    source=data.get("source", data["source_path"]),
+                    source_path=data["source_path"],
+                    ingested_at=data.get("ingested_at", ""),
+                    num_characters=data.get("num_characters"),
+                    extraction=data.get("extraction", {}),
+                )
+            )
+        return self.record_documents(records)
@@ -2,47 +2,128 @@
 from __future__ import annotations
 
 import json
+import time
+import uuid
 from datetime import datetime
 from pathlib import Path
-from typing import Iterable
+from typing import Iterable, Mapping
 
-import pandas as pd
+from processing.corpus import CorpusStore
+from processing.metrics import DOCUMENTS_TOTAL, stage_timer
 
+from .cache import ExtractionCache, file_digest
 from .config import IngestionConfig
-from .download import download_all
-from .extract import batch_extract
+from .download import MirrorFetcher, MirrorStats, download_all
+from .extract import Extraction, extract_document
+from .metadata import DocumentRecord, MetadataStore, RunRecord
 
 
 class IngestionPipeline:
     """Coordinates downloads, extraction, and persistence."""
 
-    def __init__(self, config: IngestionConfig) -> None:
+    def __init__(self, config: IngestionConfig, *, store: MetadataStore | None = None) -> None:
         self.config = config
         self.config.ensure_directories()
+        self.cache = (
+            ExtractionCache(config.cache_dir, max_bytes=config.cache_max_bytes)
+            if config.cache_dir is not None
+            else None
+        )
+        self.corpus = CorpusStore(config.corpus_dir) if config.corpus_dir is not None else None
+        self.store = store or MetadataStore(config.metadata_store_path())
+        self.failures: dict[Path, str] = {}
 
     def run(self) -> list[Path]:
         """Execute the pipeline and return created JSONL files."""
-        downloaded = download_all(self.config.sources, self.config.output_dir)
-        extracted = batch_extract(downloaded)
-        return [self._persist(path, text) for path, text in extracted.items()]
-
-    def _persist(self, original_path: Path, text: str) -> Path:
-        metadata = {
-            "source_path": str(original_path),
-            "ingested_at": datetime.utcnow().isoformat(),
-            "num_characters": len(text),
-        }
-        metadata_path = self.config.metadata_dir / f"{original_path.stem}.json"
-        metadata_path.write_text(json.dumps(metadata, indent=2), encoding="utf-8")
+        started = datetime.utcnow()
+        record = RunRecord(run_id=uuid.uuid4().hex, started_at=started.isoformat())
+        fetcher = MirrorFetcher.from_config(
+            self.config, stats=MirrorStats.from_snapshot(self.store.mirror_stats())
+        )
+        with stage_timer("download"):
+            downloaded = download_all(
+                self.config.sources, self.config.output_dir, fetcher=fetcher
+            )
+        self.store.update_mirrors(fetcher.stats.snapshot())
+        sources = dict(zip(downloaded, self.config.sources, strict=True))
+        files = self.process(downloaded, sources=sources, run_id=record.run_id)
 
+        finished = datetime.utcnow()
+        record.finished_at = finished.isoformat()
+        record.duration_seconds = round((finished - started).total_seconds(), 3)
+        record.sources = len(downloaded)
+        record.files = [str(path) for path in files]
+        record.errors = {sources[path]: error for path, error in self.failures.items()}
+        record.status = "partial" if record.errors else "ok"
+        self.store.record_run(record)
+        return files
+
+    def process(
+        self,
+        paths: Iterable[Path],
+        *,
+        sources: Mapping[Path, str] | None = None,
+        run_id: str | None = None,
+    ) -> list[Path]:
+        """Extract and persist already downloaded files; returns created JSONL files.
+
+        Every document, including failed extractions, is recorded in the metadata
+        store in one transaction; failures are also left in ``self.failures``. With a
+        corpus configured, the extracted text is also stored under the document's source.
+        """
+        sources = sources or {}
+        files: list[Path] = []
+        records: list[DocumentRecord] = []
+        self.failures = {}
+        for path in paths:
+            record = DocumentRecord(
+                source=sources.get(path, str(path)),
+                source_path=str(path),
+                ingested_at=datetime.utcnow().isoformat(),
+                run_id=run_id,
+                sha256=file_digest(path),
+                size_bytes=path.stat().st_size,
+            )
+            records.append(record)
+            started = time.perf_counter()
+            try:
+                with stage_timer("extract"):
+                    extraction = extract_document(path, cache=self.cache)
+            except Exception as exc:  # noqa: BLE001 - recorded per document
+                record.status = "failed"
+                record.error = f"{type(exc).__name__}: {exc}"
+                self.failures[path] = record.error
+                continue
+            record.extract_seconds = round(time.perf_counter() - started, 6)
+            record.num_characters = len(extraction.text)
+            record.extraction = extraction.metadata
+            with stage_timer("persist"):
+                files.append(self._persist(path, extraction))
+                if self.corpus is not None:
+                    self.corpus.add(record.source, extraction.text)
+            DOCUMENTS_TOTAL.inc(source="ingestion")
+        with stage_timer("metadata"):
+            self.store.record_documents(records)
+        return files
+
+    def _persist(self, original_path: Path, extraction: Extraction) -> Path:
+        import pandas as pd
+
+        source_path = str(original_path)
         jsonl_path = self.config.output_dir / f"{original_path.stem}.jsonl"
-        records = [{"text": line, "source": metadata["source_path"]} for line in text.splitlines() if line]
+        records = [
+            {"text": line, "source": source_path}
+            for line in extraction.text.splitlines()
+            if line
+        ]
         df = pd.DataFrame.from_records(records)
         df.to_json(jsonl_path, orient="records", lines=True, force_ascii=False)
         return jsonl_path
 
     def to_parquet(self, files: Iterable[Path]) -> Path:
         """Persist combined text to a Parquet file for downstream use."""
+        import pandas as pd
+
         all_records: list[dict[str, str]] = []
         for file in files:
             for line in file.read_text(encoding="utf-8").splitlines():
@@ -0,0 +1,307 @@
+"""In-process scheduler for recurring, incremental ingestion runs.
+
+``IngestionScheduler.serve`` waits for the next time matching a cron expression
+(plus random jitter), then runs ``run_once``: every source is re-fetched with its
+previous ``ETag``/``Last-Modified`` validators, and only sources whose content
+hash changed are extracted and persisted. A lock file prevents overlapping runs,
+also across processes, and each run is recorded in the metadata store.
+"""
+from __future__ import annotations
+
+import calendar
+import os
+import random
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable
+from urllib.parse import urlsplit
+
+from processing.metrics import stage_timer
+
+from .cache import file_digest
+from .config import IngestionConfig
+from .download import FetchResult, MirrorFetcher, MirrorStats, destination_for
+from .metadata import MetadataStore, RunRecord
+
+CRON_ALIASES = {
+    "@hourly": "0 * * * *",
+    "@daily": "0 0 * * *",
+    "@weekly": "0 0 * * 0",
+    "@monthly": "0 0 1 * *",
+}
+# (minimum, maximum) of the minute, hour, day-of-month, month and day-of-week fields;
+# day-of-week accepts both 0 and 7 for Sunday.
+CRON_FIELDS = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+
+
+def _parse_field(value: str, minimum: int, maximum: int) -> frozenset[int]:
+    values: set[int] = set()
+    for part in value.split(","):
+        base, _, step_text = part.partition("/")
+        step = int(step_text) if step_text else 1
+        if base == "*":
+            start, stop = minimum, maximum
+        elif "-" in base:
+            start_text, stop_text = base.split("-", 1)
+            start, stop = int(start_text), int(stop_text)
+        else:
+            start = int(base)
+            stop = maximum if step_text else start
+        if step < 1 or start < minimum or stop > maximum or start > stop:
+            raise ValueError(f"Invalid cron field {value!r}")
+        values.update(range(start, stop + 1, step))
+    if maximum == 7 and 7 in values:
+        values = (values - {7}) | {0}
+    return frozenset(values)
+
+
+@dataclass(frozen=True, slots=True)
+class CronSchedule:
+    """Five-field cron expression (minute hour day month weekday), evaluated in UTC."""
+
+    minutes: frozenset[int]
+    hours: frozenset[int]
+    days: frozenset[int]
+    months: frozenset[int]
+    weekdays: frozenset[int]
+    any_day: bool
+    any_weekday: bool
+
+    @classmethod
+    def parse(cls, expression: str) -> CronSchedule:
+        fields = CRON_ALIASES.get(expression.strip(), expression).split()
+        if len(fields) != 5:
+            raise ValueError(f"Expected five cron fields, got {expression!r}")
+        parsed = [
+            _parse_field(value, minimum, maximum)
+            for value, (minimum, maximum) in zip(fields, CRON_FIELDS, strict=True)
+        ]
+        return cls(*parsed, any_day=fields[2] == "*", any_weekday=fields[4] == "*")
+
+    def _day_matches(self, moment: datetime) -> bool:
+        day = moment.day in self.days
+        weekday = (moment.weekday() + 1) % 7 in self.weekdays
+        # As in cron, a restricted day-of-month and day-of-week match if either does.
+        if self.any_day or self.any_weekday:
+            return day and weekday
+        return day or weekday
+
+    def next_after(self, moment: datetime) -> datetime:
+        """First matching minute strictly after ``moment``."""
+
+        candidate = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = moment.year + 5
+        while candidate.year <= limit:
+            if candidate.month not in self.months:
+                days = calendar.monthrange(candidate.year, candidate.month)[1]
+                candidate = candidate.replace(day=1, hour=0, minute=0) + timedelta(days=days)
+            elif not self._day_matches(candidate):
+                candidate = candidate.replace(hour=0, minute=0) + timedelta(days=1)
+            elif candidate.hour not in self.hours:
+                candidate = candidate.replace(minute=0) + timedelta(hours=1)
+            elif candidate.minute not in self.minutes:
+                candidate += timedelta(minutes=1)
+            else:
+                return candidate
+        raise ValueError("Cron expression never matches")
+
+
+class RunLock:
+    """Exclusive, non-blocking lock on a file; released automatically if the process dies."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self._fd: int | None = None
+
+    def acquire(self) -> bool:
+        import fcntl
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        os.ftruncate(fd, 0)
+        os.write(fd, str(os.getpid()).encode())
+        self._fd = fd
+        return True
+
+    def release(self) -> None:
+        if self._fd is not None:
+            os.close(self._fd)  # closing the descriptor drops the flock
+            self._fd = None
+
+
+class HostRateLimiter:
+    """Keeps at least ``interval`` seconds between requests to the same host."""
+
+    def __init__(
+        self,
+        interval: float = 1.0,
+        *,
+        overrides: dict[str, float] | None = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], object] = time.sleep,
+    ) -> None:
+        self.interval = interval
+        self.overrides = dict(overrides or {})
+        self._clock = clock
+        self._sleep = sleep
+        self._last: dict[str, float] = {}
+
+    def wait(self, url: str) -> None:
+        host = urlsplit(url).netloc
+        interval = self.overrides.get(host, self.interval)
+        last = self._last.get(host)
+        if last is not None:
+            remaining = last + interval - self._clock()
+            if remaining > 0:
+                self._sleep(remaining)
+        self._last[host] = self._clock()
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class IngestionScheduler:
+    """Runs incremental ingestion for ``config.sources`` on ``config.schedule``.
+
+    Per-source validators and hashes and the run history are kept in the
+    metadata store; the lock file lives in ``state_dir`` (default ``metadata_dir``).
+    """
+
+    def __init__(
+        self,
+        config: IngestionConfig,
+        *,
+        jitter_seconds: float = 0.0,
+        rate_limiter: HostRateLimiter | None = None,
+        state_dir: Path | None = None,
+        store: MetadataStore | None = None,
+        fetch: Callable[..., FetchResult] | None = None,
+        clock: Callable[[], datetime] = _utcnow,
+        sleep: Callable[[float], object] | None = None,
+        rng: random.Random | None = None,
+    ) -> None:
+        self.config = config
+        self.jitter_seconds = jitter_seconds
+        self.rate_limiter = rate_limiter or HostRateLimiter()
+        self.state_dir = Path(state_dir or config.metadata_dir)
+        self.lock = RunLock(self.state_dir / "ingestion.lock")
+        self.store = store or MetadataStore(config.metadata_store_path())
+        self.fetcher = MirrorFetcher.from_config(
+            config, stats=MirrorStats.from_snapshot(self.store.mirror_stats())
+        )
+        self._fetch = fetch or self.fetcher.fetch
+        self._clock = clock
+        self._stop = threading.Event()
+        self._sleep = sleep or self._stop.wait
+        self._rng = rng or random.Random()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def serve(self, *, max_runs: int | None = None) -> None:
+        """Run on every scheduled time until ``stop()`` (or ``max_runs`` runs)."""
+
+        if not self.config.schedule:
+            raise ValueError("IngestionConfig.schedule is not set")
+        schedule = CronSchedule.parse(self.config.schedule)
+        runs = 0
+        while not self._stop.is_set() and (max_runs is None or runs < max_runs):
+            now = self._clock()
+            delay = (schedule.next_after(now) - now).total_seconds()
+            self._sleep(delay + self._rng.uniform(0, self.jitter_seconds))
+            if self._stop.is_set():
+                break
+            self.run_once()
+            runs += 1
+
+    def run_once(self) -> RunRecord:
+        started = self._clock()
+        record = RunRecord(run_id=uuid.uuid4().hex, started_at=started.isoformat())
+        if not self.lock.acquire():
+            record.status = "skipped"
+            return self._finish(record, started)
+        try:
+            with stage_timer("scheduled_run"):
+                self._run(record)
+        except Exception as exc:  # noqa: BLE001 - recorded in the run history
+            record.status = "failed"
+            record.errors["run"] = f"{type(exc).__name__}: {exc}"
+        finally:
+            self.lock.release()
+        return self._finish(record, started)
+
+    def _run(self, record: RunRecord) -> None:
+        from .pipeline import IngestionPipeline
+
+        pipeline = IngestionPipeline(self.config, store=self.store)
+        state = self.store.source_states()
+        updates: dict[str, dict[str, Any]] = {}
+        changed: list[Path] = []
+        sources: dict[Path, str] = {}
+        for url in self.config.sources:
+            record.sources += 1
+            previous = state.get(url, {})
+            self.rate_limiter.wait(url)
+            try:
+                result = self._fetch(
+                    url,
+                    destination_for(url, self.config.output_dir),
+                    etag=previous.get("etag"),
+                    last_modified=previous.get("last_modified"),
+                )
+            except Exception as exc:  # noqa: BLE001 - other sources still run
+                record.errors[url] = f"{type(exc).__name__}: {exc}"
+                continue
+            entry = {
+                **previous,
+                "etag": result.etag,
+                "last_modified": result.last_modified,
+                "checked_at": record.started_at,
+            }
+            if result.path is not None:
+                digest = file_digest(result.path)
+                if digest != previous.get("sha256"):
+                    changed.append(result.path)
+                    record.changed.append(url)
+                    entry.update(
+                        sha256=digest,
+                        size_bytes=result.path.stat().st_size,
+                        changed_at=record.started_at,
+                    )
+                    sources[result.path] = url
+            updates[url] = entry
+
+        if changed:
+            files = pipeline.process(changed, sources=sources, run_id=record.run_id)
+            pipeline.to_parquet(sorted(self.config.output_dir.glob("*.jsonl")))
+            record.files = [str(path) for path in files]
+            for path, error in pipeline.failures.items():
+                record.errors[sources[path]] = error
+                # Forget the failed source's state so the next run extracts it again.
+                updates.pop(sources[path], None)
+        # Saved only after processing, so a failed run retries the same sources.
+        self.store.update_sources(updates)
+        self.store.update_mirrors(self.fetcher.stats.snapshot())
+        record.status = "partial" if record.errors else "ok"
+
+    def _finish(self, record: RunRecord, started: datetime) -> RunRecord:
+        finished = self._clock()
+        record.finished_at = finished.isoformat()
+        record.duration_seconds = round((finished - started).total_seconds(), 3)
+        self.store.record_run(record)
+        return record
+
+    def history(self, limit: int = 20, *, since: str | None = None) -> list[RunRecord]:
+        """Most recent runs, newest first."""
+
+        return self.store.runs(since=since, limit=limit)
@@ -1,9 +1,24 @@
-"""Processing utilities for EchoGraph."""
+"""Processing utilities for EchoGraph.
+
+``EmbeddingService`` and ``RelationshipMatcher`` are resolved on first access so
+that importing lightweight helpers does not load sentence-transformers, torch or
+qdrant-client.
+"""
+
+from importlib import import_module
+from typing import TYPE_CHECKING, Any
 
 from .cleanup import normalize_text
 from .chunking import chunk_text
-from .embeddings import EmbeddingService
-from .matching import RelationshipMatcher
+
+if TYPE_CHECKING:  # pragma: no cover - imports for type checkers only
+    from .embeddings import EmbeddingService
+    from .matching import RelationshipMatcher
+
+_LAZY_ATTRIBUTES = {
+    "EmbeddingService": ".embeddings",
+    "RelationshipMatcher": ".matching",
+}
 
 __all__ = [
     "normalize_text",
@@ -11,3 +26,12 @@ __all__ = [
     "EmbeddingService",
     "RelationshipMatcher",
 ]
+
+
+def __getattr__(name: str) -> Any:
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
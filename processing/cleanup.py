@@ -1,12 +1,14 @@
 """Text normalization helpers."""
 from __future__ import annotations
 
+import hashlib
 import re
 import unicodedata
 from typing import Iterable
 
 
 WHITESPACE_RE = re.compile(r"\s+")
+PARAGRAPH_BREAK_RE = re.compile(r"\n\s*\n")
 
 
 def normalize_text(text: str) -> str:
@@ -17,5 +19,26 @@ def normalize_text(text: str) -> str:
     return normalized.strip()
 
 
+def normalize_paragraphs(text: str) -> str:
+    """Like ``normalize_text`` but keep paragraph breaks as a single blank line.
+
+    Line breaks inside a paragraph become spaces; two or more consecutive line
+    breaks (blank lines) become exactly ``"\n\n"``.
+    """
+    normalized = unicodedata.normalize("NFKC", text)
+    normalized = normalized.replace("\u00ad", "")
+    normalized = normalized.replace("\r\n", "\n").replace("\r", "\n")
+    paragraphs = (
+        WHITESPACE_RE.sub(" ", paragraph).strip()
+        for paragraph in PARAGRAPH_BREAK_RE.split(normalized)
+    )
+    return "\n\n".join(paragraph for paragraph in paragraphs if paragraph)
+
+
 def normalize_many(texts: Iterable[str]) -> list[str]:
     return [normalize_text(text) for text in texts]
+
+
+def content_hash(text: str) -> str:
+    """Stable SHA-256 fingerprint of a section body, used to detect unchanged sections."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
@@ -0,0 +1,279 @@
+"""Compressed block store for raw document text with random access by character range.
+
+Each document is cut into blocks of ``block_chars`` characters that are compressed
+independently (zstd when the ``zstandard`` package is installed, zlib otherwise)
+and appended to ``blocks.bin``. ``index.bin`` holds one fixed-size record per
+block and ``documents.jsonl`` maps document keys to their run of blocks; adding a
+key again points it at the new blocks. Reads memory-map ``blocks.bin`` and
+decompress only the blocks that overlap the requested range, so an excerpt costs
+at most two blocks regardless of the document's size.
+
+Writers serialize on a lock file, so ingestion and API processes can share one
+directory; readers pick up documents added by other processes on the next read.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import mmap
+import os
+import threading
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+FORMAT_VERSION = 1
+# One record per block; ``document`` is the index position of the document's first block.
+INDEX_DTYPE = np.dtype(
+    [("document", "<u8"), ("char_start", "<u8"), ("offset", "<u8"), ("size", "<u4")]
+)
+
+
+class CorpusError(Exception):
+    """Raised for unknown documents or a store written with an unavailable codec."""
+
+
+@dataclass(slots=True)
+class CorpusDocument:
+    key: str
+    length: int
+    sha256: str
+    first_block: int
+    blocks: int
+
+
+def _zstd():
+    try:
+        import zstandard
+    except ImportError:
+        return None
+    return zstandard
+
+
+def _default_codec() -> str:
+    return "zstd" if _zstd() is not None else "zlib"
+
+
+class CorpusStore:
+    def __init__(
+        self,
+        directory: Path,
+        *,
+        block_chars: int = 65_536,
+        codec: str | None = None,
+        level: int | None = None,
+    ) -> None:
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        header_path = self.directory / "corpus.json"
+        if header_path.exists():
+            header = json.loads(header_path.read_text(encoding="utf-8"))
+        else:
+            header = {
+                "format": FORMAT_VERSION,
+                "codec": codec or _default_codec(),
+                "block_chars": block_chars,
+            }
+            temporary = header_path.with_suffix(".tmp")
+            temporary.write_text(json.dumps(header), encoding="utf-8")
+            os.replace(temporary, header_path)
+        self.codec = header["codec"]
+        self.block_chars = header["block_chars"]
+        if self.codec == "zstd":
+            zstandard = _zstd()
+            if zstandard is None:
+                raise CorpusError("Corpus was written with zstd; install the zstandard package")
+            self._compressor = zstandard.ZstdCompressor(level=level or 3)
+            self._decompressor = zstandard.ZstdDecompressor()
+        elif self.codec == "zlib":
+            self._compressor = None
+            self._decompressor = None
+            self._level = level or 6
+        else:
+            raise CorpusError(f"Unknown corpus codec {self.codec!r}")
+
+        self._blocks_path = self.directory / "blocks.bin"
+        self._index_path = self.directory / "index.bin"
+        self._documents_path = self.directory / "documents.jsonl"
+        for path in (self._blocks_path, self._index_path, self._documents_path):
+            path.touch(exist_ok=True)
+        self._documents: dict[str, CorpusDocument] = {}
+        self._documents_read = 0
+        self._index = np.zeros(0, dtype=INDEX_DTYPE)
+        self._map: mmap.mmap | None = None
+        self._lock = threading.RLock()
+        self.blocks_read = 0
+        self.bytes_read = 0
+
+    # Compression ------------------------------------------------------------
+
+    def _compress(self, data: bytes) -> bytes:
+        if self._compressor is not None:
+            return self._compressor.compress(data)
+        return zlib.compress(data, self._level)
+
+    def _decompress(self, data: bytes) -> bytes:
+        if self._decompressor is not None:
+            return self._decompressor.decompress(data)
+        return zlib.decompress(data)
+
+    # Writing ----------------------------------------------------------------
+
+    def add(self, key: str, text: str) -> CorpusDocument:
+        """Store ``text`` under ``key``; unchanged text is not written again."""
+
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        with self._lock, _FileLock(self.directory / "corpus.lock"):
+            self._refresh()
+            current = self._documents.get(key)
+            if current is not None and current.sha256 == digest:
+                return current
+            first_block = self._index_path.stat().st_size // INDEX_DTYPE.itemsize
+            records = []
+            with self._blocks_path.open("ab") as blocks:
+                offset = blocks.tell()
+                for char_start in range(0, max(len(text), 1), self.block_chars):
+                    chunk = text[char_start : char_start + self.block_chars].encode("utf-8")
+                    compressed = self._compress(chunk)
+                    blocks.write(compressed)
+                    records.append((first_block, char_start, offset, len(compressed)))
+                    offset += len(compressed)
+            with self._index_path.open("ab") as index:
+                index.write(np.array(records, dtype=INDEX_DTYPE).tobytes())
+            document = CorpusDocument(key, len(text), digest, first_block, len(records))
+            # The document line is written last, so readers never see a key whose
+            # blocks are incomplete.
+            with self._documents_path.open("a", encoding="utf-8") as documents:
+                documents.write(json.dumps(_document_row(document)) + "\n")
+            self._refresh()
+            return document
+
+    # Reading ----------------------------------------------------------------
+
+    def _refresh(self) -> None:
+        size = self._documents_path.stat().st_size
+        if size > self._documents_read:
+            with self._documents_path.open("rb") as documents:
+                documents.seek(self._documents_read)
+                tail = documents.read(size - self._documents_read)
+            complete = tail.rfind(b"\n") + 1
+            for line in tail[:complete].splitlines():
+                row = json.loads(line)
+                self._documents[row["key"]] = CorpusDocument(**row)
+            self._documents_read += complete
+        if self._index_path.stat().st_size // INDEX_DTYPE.itemsize != len(self._index):
+            self._index = np.fromfile(self._index_path, dtype=INDEX_DTYPE)
+        blocks_size = self._blocks_path.stat().st_size
+        if blocks_size and (self._map is None or len(self._map) < blocks_size):
+            if self._map is not None:
+                self._map.close()
+            with self._blocks_path.open("rb") as blocks:
+                self._map = mmap.mmap(blocks.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def _document(self, key: str) -> CorpusDocument:
+        # Another process may have added or replaced documents since the last read.
+        if self._documents_path.stat().st_size != self._documents_read or self._map is None:
+            self._refresh()
+        document = self._documents.get(key)
+        if document is None:
+            raise CorpusError(f"Unknown corpus document {key!r}")
+        return document
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            try:
+                self._document(key)
+            except CorpusError:
+                return False
+            return True
+
+    def document(self, key: str) -> CorpusDocument:
+        with self._lock:
+            return self._document(key)
+
+    def excerpt(self, key: str, start: int = 0, end: int | None = None) -> str:
+        """Return ``text[start:end]`` of document ``key``, decompressing only overlapping blocks."""
+
+        with self._lock:
+            document = self._document(key)
+            start, end, _ = slice(start, end).indices(document.length)
+            if start >= end:
+                return ""
+            blocks = self._index[document.first_block : document.first_block + document.blocks]
+            first = int(np.searchsorted(blocks["char_start"], start, side="right")) - 1
+            last = int(np.searchsorted(blocks["char_start"], end, side="left"))
+            parts = []
+            for record in blocks[first:last]:
+                offset, size = int(record["offset"]), int(record["size"])
+                parts.append(self._decompress(self._map[offset : offset + size]).decode("utf-8"))
+                self.blocks_read += 1
+                self.bytes_read += size
+            base = int(blocks[first]["char_start"])
+            return "".join(parts)[start - base : end - base]
+
+    def text(self, key: str) -> str:
+        return self.excerpt(key)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            self._refresh()
+            live = self._documents.values()
+            return {
+                "codec": self.codec,
+                "documents": len(self._documents),
+                "characters": sum(document.length for document in live),
+                "stored_bytes": self._blocks_path.stat().st_size,
+                "blocks_read": self.blocks_read,
+                "bytes_read": self.bytes_read,
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._map is not None:
+                self._map.close()
+                self._map = None
+
+
+_default_corpus: CorpusStore | None = None
+
+
+def default_corpus() -> CorpusStore | None:
+    """Store configured by ``CORPUS_DIR``; None (corpus disabled) when unset."""
+
+    global _default_corpus
+    directory = os.getenv("CORPUS_DIR")
+    if not directory:
+        return None
+    if _default_corpus is None or _default_corpus.directory != Path(directory):
+        _default_corpus = CorpusStore(Path(directory))
+    return _default_corpus
+
+
+def _document_row(document: CorpusDocument) -> dict[str, Any]:
+    return {
+        "key": document.key,
+        "length": document.length,
+        "sha256": document.sha256,
+        "first_block": document.first_block,
+        "blocks": document.blocks,
+    }
+
+
+class _FileLock:
+    def __init__(self, path: Path) -> None:
+        self._path = path
+        self._fd: int | None = None
+
+    def __enter__(self) -> None:
+        import fcntl
+
+        self._fd = os.open(self._path, os.O_RDWR | os.O_CREAT, 0o644)
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+
+    def __exit__(self, *exc_info: object) -> None:
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
@@ -0,0 +1,107 @@
+"""Near-duplicate detection with MinHash signatures and LSH banding."""
+from __future__ import annotations
+
+import hashlib
+import re
+from typing import Hashable, Sequence
+
+import numpy as np
+
+TOKEN_RE = re.compile(r"\w+")
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+
+def _shingles(text: str, size: int) -> set[str]:
+    tokens = [token.lower() for token in TOKEN_RE.findall(text)]
+    if len(tokens) <= size:
+        return {" ".join(tokens)}
+    return {" ".join(tokens[index : index + size]) for index in range(len(tokens) - size + 1)}
+
+
+class MinHasher:
+    """Compute ``num_perm`` MinHash values per text from word shingles."""
+
+    def __init__(self, *, num_perm: int = 128, shingle_size: int = 3, seed: int = 1) -> None:
+        generator = np.random.default_rng(seed)
+        # Coefficients stay below 2**29 so ``a * x + b`` fits in uint64 for 32-bit ``x``.
+        self._a = generator.integers(1, 1 << 29, size=num_perm, dtype=np.uint64)
+        self._b = generator.integers(0, 1 << 29, size=num_perm, dtype=np.uint64)
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+
+    def signature(self, text: str) -> np.ndarray:
+        digests = b"".join(
+            hashlib.blake2b(shingle.encode("utf-8"), digest_size=4).digest()
+            for shingle in sorted(_shingles(text, self.shingle_size))
+        )
+        values = np.frombuffer(digests, dtype=np.uint32).astype(np.uint64)
+        permuted = (values[:, None] * self._a + self._b) % _MERSENNE_PRIME & _MAX_HASH
+        return permuted.min(axis=0)
+
+
+def estimated_jaccard(left: np.ndarray, right: np.ndarray) -> float:
+    return float(np.count_nonzero(left == right)) / len(left)
+
+
+class MinHashLSH:
+    """Index signatures in ``bands`` buckets and return keys above a Jaccard threshold.
+
+    Candidates are texts sharing all ``num_perm / bands`` rows of at least one band;
+    they are then verified against the estimated Jaccard similarity of the full
+    signature, so the banding only controls recall and cost.
+    """
+
+    def __init__(self, *, threshold: float = 0.85, num_perm: int = 128, bands: int = 32) -> None:
+        if num_perm % bands:
+            raise ValueError("bands must divide num_perm")
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self._buckets: list[dict[bytes, list[Hashable]]] = [{} for _ in range(bands)]
+        self._signatures: dict[Hashable, np.ndarray] = {}
+
+    def _band_keys(self, signature: np.ndarray) -> list[bytes]:
+        return [
+            signature[band * self.rows : (band + 1) * self.rows].tobytes()
+            for band in range(self.bands)
+        ]
+
+    def add(self, key: Hashable, signature: np.ndarray) -> None:
+        self._signatures[key] = signature
+        for bucket, band_key in zip(self._buckets, self._band_keys(signature), strict=True):
+            bucket.setdefault(band_key, []).append(key)
+
+    def query(self, signature: np.ndarray) -> list[Hashable]:
+        seen: set[Hashable] = set()
+        found: list[Hashable] = []
+        for bucket, band_key in zip(self._buckets, self._band_keys(signature), strict=True):
+            for key in bucket.get(band_key, ()):
+                if key in seen:
+                    continue
+                seen.add(key)
+                if estimated_jaccard(signature, self._signatures[key]) >= self.threshold:
+                    found.append(key)
+        return found
+
+
+def collapse_near_duplicates(
+    texts: Sequence[str],
+    *,
+    threshold: float = 0.85,
+    hasher: MinHasher | None = None,
+) -> list[int]:
+    """Return, for every text, the index of the first near-identical text (itself if unique)."""
+
+    hasher = hasher or MinHasher()
+    index = MinHashLSH(threshold=threshold, num_perm=hasher.num_perm)
+    canonical: list[int] = []
+    for position, text in enumerate(texts):
+        signature = hasher.signature(text)
+        matches = index.query(signature)
+        if matches:
+            canonical.append(min(matches))  # type: ignore[type-var]
+        else:
+            index.add(position, signature)
+            canonical.append(position)
+    return canonical
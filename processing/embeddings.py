@@ -1,12 +1,28 @@
 """Embedding utilities."""
 from __future__ import annotations
 
+import asyncio
+import re
+import threading
+from collections import OrderedDict
 from dataclasses import dataclass
-from typing import Sequence
+from typing import Any, Callable, Sequence
 
 import numpy as np
-from qdrant_client import QdrantClient
-from sentence_transformers import SentenceTransformer
+
+from .cleanup import content_hash
+from .metrics import REGISTRY, stage_timer
+
+EMBEDDING_CACHE_TOTAL = REGISTRY.counter(
+    "echograph_embedding_cache_total",
+    "Embedding cache lookups by result.",
+    ("result",),
+)
+
+
+WORD_RE = re.compile(r"\S+")
+# Keyword payload fields indexed in every collection so filtered searches stay fast.
+PAYLOAD_INDEX_FIELDS = ("region", "regulation_type", "language")
 
 
 @dataclass(slots=True)
@@ -15,33 +31,322 @@ class EmbeddingConfig:
     qdrant_url: str = "http://localhost:6333"
     collection_name: str = "echograph_embeddings"
     vector_size: int | None = None
+    # MiniLM truncates at 256 word pieces; 160 words stays safely below that.
+    window_words: int = 160
+    window_overlap: int | None = None
+    pooling: str = "mean"
+
+
+@dataclass(slots=True)
+class WindowedEmbeddings:
+    """Pooled text vectors plus the window vectors they were pooled from.
+
+    Windows of text ``i`` are rows ``offsets[i]:offsets[i + 1]`` of ``window_vectors``
+    and ``spans``; spans are character offsets into that text. All vectors are
+    L2-normalised, so dot products are cosine similarities.
+    """
+
+    vectors: np.ndarray
+    window_vectors: np.ndarray
+    spans: list[tuple[int, int]]
+    offsets: np.ndarray
+
+    def windows(self, index: int) -> slice:
+        return slice(int(self.offsets[index]), int(self.offsets[index + 1]))
+
+
+def split_windows(
+    text: str,
+    *,
+    window_words: int = 160,
+    overlap: int | None = None,
+) -> list[tuple[int, int]]:
+    """Split ``text`` into overlapping word windows, returned as character spans.
+
+    ``overlap`` defaults to a fifth of the window.
+    """
+
+    if overlap is None:
+        overlap = window_words // 5
+    words = [(match.start(), match.end()) for match in WORD_RE.finditer(text)]
+    if not words:
+        return [(0, len(text))]
+    stride = max(1, window_words - overlap)
+    spans: list[tuple[int, int]] = []
+    for start in range(0, len(words), stride):
+        window = words[start : start + window_words]
+        spans.append((window[0][0], window[-1][1]))
+        if start + window_words >= len(words):
+            break
+    return spans
+
+
+def _normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-9)
+
+
+def cosine_similarity(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Pairwise cosine similarities between the rows of ``a`` and ``b``."""
+
+    return _normalize_rows(a) @ _normalize_rows(b).T
+
+
+def encode_windows(
+    encode: Callable[[list[str]], np.ndarray],
+    texts: Sequence[str],
+    *,
+    window_words: int = 160,
+    overlap: int | None = None,
+    pooling: str = "mean",
+) -> WindowedEmbeddings:
+    """Embed texts of any length by pooling model-sized windows.
+
+    Every window of every text goes to ``encode`` in a single call, so long sections
+    cost one batched forward pass instead of silently losing their tail to the
+    model's truncation. ``pooling`` is ``"mean"`` or ``"max"``.
+    """
+
+    if pooling not in {"mean", "max"}:
+        raise ValueError(f"Unsupported pooling: {pooling}")
+    spans: list[tuple[int, int]] = []
+    offsets = [0]
+    for text in texts:
+        spans.extend(split_windows(text, window_words=window_words, overlap=overlap))
+        offsets.append(len(spans))
+    owners = np.repeat(np.arange(len(texts)), np.diff(offsets))
+    window_texts = [
+        texts[owner][start:end] for owner, (start, end) in zip(owners, spans, strict=True)
+    ]
+    if not window_texts:
+        empty = np.zeros((0, 0), dtype=np.float32)
+        return WindowedEmbeddings(empty, empty, [], np.asarray(offsets))
+
+    window_vectors = _normalize_rows(np.asarray(encode(window_texts), dtype=np.float32))
+    starts = np.asarray(offsets[:-1])
+    if pooling == "max":
+        pooled = np.maximum.reduceat(window_vectors, starts, axis=0)
+    else:
+        pooled = np.add.reduceat(window_vectors, starts, axis=0) / np.diff(offsets)[:, None]
+    return WindowedEmbeddings(
+        vectors=_normalize_rows(pooled),
+        window_vectors=window_vectors,
+        spans=spans,
+        offsets=np.asarray(offsets),
+    )
 
 
 class EmbeddingService:
     """Generate and persist embeddings to Qdrant."""
 
-    def __init__(self, config: EmbeddingConfig | None = None) -> None:
+    def __init__(self, config: EmbeddingConfig | None = None, *, recreate: bool = True) -> None:
+        from qdrant_client import QdrantClient
+        from sentence_transformers import SentenceTransformer
+
         self.config = config or EmbeddingConfig()
         self.model = SentenceTransformer(self.config.model_name)
         self.client = QdrantClient(url=self.config.qdrant_url)
-        self._ensure_collection()
+        self._ensure_collection(recreate=recreate)
+
+    def _ensure_collection(self, *, recreate: bool = True) -> None:
+        """Create the collection and its payload indexes.
+
+        With ``recreate=False`` an existing collection is kept; missing payload
+        indexes are still added.
+        """
+
+        from qdrant_client.http.models import PayloadSchemaType
 
-    def _ensure_collection(self) -> None:
-        dim = self.config.vector_size or self.model.get_sentence_embedding_dimension()
-        self.client.recreate_collection(
-            collection_name=self.config.collection_name,
-            vectors_config={"size": dim, "distance": "Cosine"},
-        )
+        name = self.config.collection_name
+        if recreate or not self.client.collection_exists(name):
+            dim = self.config.vector_size or self.model.get_sentence_embedding_dimension()
+            self.client.recreate_collection(
+                collection_name=name,
+                vectors_config={"size": dim, "distance": "Cosine"},
+            )
+        for field_name in PAYLOAD_INDEX_FIELDS:
+            self.client.create_payload_index(
+                collection_name=name,
+                field_name=field_name,
+                field_schema=PayloadSchemaType.KEYWORD,
+            )
+
+    def _encode(self, texts: list[str]) -> np.ndarray:
+        return self.model.encode(texts, show_progress_bar=False, convert_to_numpy=True)
 
     def embed(self, texts: Sequence[str]) -> np.ndarray:
-        vectors = self.model.encode(list(texts), show_progress_bar=False, convert_to_numpy=True)
-        return vectors
+        return self.embed_windows(texts).vectors
+
+    def embed_windows(self, texts: Sequence[str]) -> WindowedEmbeddings:
+        with stage_timer("encode"):
+            return encode_windows(
+                self._encode,
+                list(texts),
+                window_words=self.config.window_words,
+                overlap=self.config.window_overlap,
+                pooling=self.config.pooling,
+            )
+
+    def upsert(
+        self,
+        texts: Sequence[str],
+        metadata: Sequence[dict[str, str]],
+        *,
+        ids: Sequence[int | str] | None = None,
+    ) -> None:
+        """Embed and store ``texts``; pass stable ``ids`` so repeated upserts overwrite."""
+
+        from qdrant_client.http.models import Batch
 
-    def upsert(self, texts: Sequence[str], metadata: Sequence[dict[str, str]]) -> None:
         vectors = self.embed(texts)
         payloads = list(metadata)
-        ids = list(range(len(payloads)))
-        self.client.upsert(
-            collection_name=self.config.collection_name,
-            points={"ids": ids, "payloads": payloads, "vectors": vectors.tolist()},
-        )
+        point_ids = list(ids) if ids is not None else list(range(len(payloads)))
+        with stage_timer("vector_upsert"):
+            self.client.upsert(
+                collection_name=self.config.collection_name,
+                points=Batch(ids=point_ids, payloads=payloads, vectors=vectors.tolist()),
+            )
+
+
+class AsyncEmbeddingService:
+    """``EmbeddingService`` counterpart built on Qdrant's async client.
+
+    Encoding runs in a worker thread, so the event loop keeps uploading and
+    searching while the model is busy; see ``processing.pipeline``. Call
+    ``ensure_collection`` once before the first upsert.
+    """
+
+    def __init__(
+        self,
+        config: EmbeddingConfig | None = None,
+        *,
+        model: Any = None,
+        client: Any = None,
+    ) -> None:
+        self.config = config or EmbeddingConfig()
+        if model is None:
+            from sentence_transformers import SentenceTransformer
+
+            model = SentenceTransformer(self.config.model_name)
+        if client is None:
+            from qdrant_client import AsyncQdrantClient
+
+            client = AsyncQdrantClient(url=self.config.qdrant_url)
+        self.model = model
+        self.client = client
+
+    async def ensure_collection(self, *, recreate: bool = False) -> None:
+        from qdrant_client.http.models import Distance, PayloadSchemaType, VectorParams
+
+        name = self.config.collection_name
+        exists = await self.client.collection_exists(name)
+        if exists and recreate:
+            await self.client.delete_collection(name)
+        if recreate or not exists:
+            dim = self.config.vector_size or self.model.get_sentence_embedding_dimension()
+            await self.client.create_collection(
+                collection_name=name,
+                vectors_config=VectorParams(size=dim, distance=Distance.COSINE),
+            )
+        for field_name in PAYLOAD_INDEX_FIELDS:
+            await self.client.create_payload_index(
+                collection_name=name,
+                field_name=field_name,
+                field_schema=PayloadSchemaType.KEYWORD,
+            )
+
+    def _encode(self, texts: list[str]) -> np.ndarray:
+        return self.model.encode(texts, show_progress_bar=False, convert_to_numpy=True)
+
+    def embed_sync(self, texts: Sequence[str]) -> np.ndarray:
+        with stage_timer("encode"):
+            return encode_windows(
+                self._encode,
+                list(texts),
+                window_words=self.config.window_words,
+                overlap=self.config.window_overlap,
+                pooling=self.config.pooling,
+            ).vectors
+
+    async def embed(self, texts: Sequence[str]) -> np.ndarray:
+        return await asyncio.to_thread(self.embed_sync, texts)
+
+    async def upsert_vectors(
+        self,
+        vectors: np.ndarray,
+        metadata: Sequence[dict[str, Any]],
+        *,
+        ids: Sequence[int | str],
+    ) -> None:
+        from qdrant_client.http.models import Batch
+
+        with stage_timer("vector_upsert"):
+            await self.client.upsert(
+                collection_name=self.config.collection_name,
+                points=Batch(ids=list(ids), payloads=list(metadata), vectors=vectors.tolist()),
+            )
+
+    async def upsert(
+        self,
+        texts: Sequence[str],
+        metadata: Sequence[dict[str, Any]],
+        *,
+        ids: Sequence[int | str],
+    ) -> None:
+        await self.upsert_vectors(await self.embed(texts), metadata, ids=ids)
+
+
+class EmbeddingCache:
+    """Bounded LRU of embeddings keyed by content hash.
+
+    Only texts that are not cached are sent to the model, in a single batch, so
+    re-encoding a corpus after a small edit costs time proportional to the edit.
+    """
+
+    def __init__(self, max_entries: int = 50_000) -> None:
+        self.max_entries = max_entries
+        self._vectors: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._vectors)
+
+    def encode(self, model: Any, texts: Sequence[str]) -> np.ndarray:
+        keys = [content_hash(text) for text in texts]
+        found: dict[str, np.ndarray] = {}
+        missing: dict[str, str] = {}
+        with self._lock:
+            for key, text in zip(keys, texts, strict=True):
+                if key in self._vectors:
+                    self._vectors.move_to_end(key)
+                    found[key] = self._vectors[key]
+                elif key not in missing:
+                    missing[key] = text
+        hits = len(keys) - len(missing)
+        self.hits += hits
+        self.misses += len(missing)
+        EMBEDDING_CACHE_TOTAL.inc(hits, result="hit")
+        EMBEDDING_CACHE_TOTAL.inc(len(missing), result="miss")
+
+        if missing:
+            with stage_timer("encode"):
+                encoded = model.encode(
+                    list(missing.values()), show_progress_bar=False, convert_to_numpy=True
+                )
+            fresh = dict(zip(missing, np.asarray(encoded), strict=True))
+            found.update(fresh)
+            with self._lock:
+                self._vectors.update(fresh)
+                while len(self._vectors) > self.max_entries:
+                    self._vectors.popitem(last=False)
+
+        rows = [found[key] for key in keys]
+        if not rows:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.vstack(rows)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._vectors.clear()
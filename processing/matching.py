@@ -1,12 +1,113 @@
 """Relationship discovery between guideline and regulation sections."""
 from __future__ import annotations
 
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import Iterable, Sequence
+from typing import TYPE_CHECKING, Iterable, Iterator, Sequence
 
 import numpy as np
-from qdrant_client import QdrantClient
-from qdrant_client.http.models import Filter, PointStruct
+
+from .metrics import MATCHES_TOTAL, stage_timer
+
+if TYPE_CHECKING:  # pragma: no cover - imports for type checkers only
+    from qdrant_client import AsyncQdrantClient, QdrantClient
+    from qdrant_client.http.models import Filter, PointStruct
+
+    from .rerank import CrossEncoderReranker
+
+
+def payload_filter(**conditions: str | Sequence[str] | None) -> Filter | None:
+    """Filter requiring each given payload field to equal the value (or one of the values).
+
+    ``None`` values are ignored, e.g. ``payload_filter(region="EU", regulation_type=None)``.
+    The fields in ``embeddings.PAYLOAD_INDEX_FIELDS`` are indexed, so these filters
+    are applied inside the vector index rather than by post-filtering.
+    """
+
+    from qdrant_client.http.models import FieldCondition, Filter, MatchAny, MatchValue
+
+    must = []
+    for key, value in conditions.items():
+        if value is None or (not isinstance(value, str) and not value):
+            continue
+        match = MatchValue(value=value) if isinstance(value, str) else MatchAny(any=list(value))
+        must.append(FieldCondition(key=key, match=match))
+    return Filter(must=must) if must else None
+
+
+def _tile_top_k(
+    queries: np.ndarray, keys: np.ndarray, k: int, tile_cols: int
+) -> tuple[np.ndarray, np.ndarray]:
+    rows = queries.shape[0]
+    best_scores = np.full((rows, 0), -np.inf, dtype=np.float32)
+    best_indices = np.zeros((rows, 0), dtype=np.int64)
+    for start in range(0, keys.shape[0], tile_cols):
+        scores = queries @ keys[start : start + tile_cols].T
+        if scores.shape[1] > k:
+            top = np.argpartition(scores, -k, axis=1)[:, -k:]
+            scores = np.take_along_axis(scores, top, axis=1)
+        else:
+            top = np.broadcast_to(np.arange(scores.shape[1]), scores.shape)
+        # Merge with the running best: at most 2k candidates per row.
+        best_scores = np.concatenate([best_scores, scores], axis=1)
+        best_indices = np.concatenate([best_indices, top + start], axis=1)
+        if best_scores.shape[1] > k:
+            keep = np.argpartition(best_scores, -k, axis=1)[:, -k:]
+            best_scores = np.take_along_axis(best_scores, keep, axis=1)
+            best_indices = np.take_along_axis(best_indices, keep, axis=1)
+    order = np.argsort(-best_scores, axis=1, kind="stable")
+    return (
+        np.take_along_axis(best_indices, order, axis=1),
+        np.take_along_axis(best_scores, order, axis=1),
+    )
+
+
+def tiled_top_k(
+    queries: np.ndarray,
+    keys: np.ndarray,
+    k: int,
+    *,
+    start_row: int = 0,
+    tile_rows: int = 1024,
+    tile_cols: int = 16384,
+    workers: int = 1,
+) -> Iterator[tuple[int, np.ndarray, np.ndarray]]:
+    """Yield ``(first_row, indices, scores)`` of the ``k`` best keys for each block of queries.
+
+    Similarities are computed one ``tile_rows`` x ``tile_cols`` block at a time, so
+    memory stays bounded however many keys there are; ``argpartition`` keeps the
+    running top ``k`` per row. Blocks are computed by ``workers`` threads (the matrix
+    products release the GIL) and yielded in row order, best score first per row.
+    """
+
+    queries = np.ascontiguousarray(queries, dtype=np.float32)
+    keys = np.ascontiguousarray(keys, dtype=np.float32)
+    k = min(k, keys.shape[0])
+    starts = range(start_row, queries.shape[0], tile_rows)
+    if k <= 0:
+        for start in starts:
+            rows = min(tile_rows, queries.shape[0] - start)
+            yield start, np.zeros((rows, 0), dtype=np.int64), np.zeros((rows, 0), np.float32)
+        return
+
+    def block(start: int) -> tuple[int, np.ndarray, np.ndarray]:
+        with stage_timer("similarity"):
+            indices, scores = _tile_top_k(queries[start : start + tile_rows], keys, k, tile_cols)
+        return start, indices, scores
+
+    if workers <= 1:
+        yield from map(block, starts)
+        return
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # Bounded look-ahead, so a slow consumer does not pile up finished blocks.
+        pending = []
+        for start in starts:
+            pending.append(executor.submit(block, start))
+            if len(pending) > workers:
+                yield pending.pop(0).result()
+        for future in pending:
+            yield future.result()
 
 
 @dataclass(slots=True)
@@ -19,11 +120,22 @@ class MatchResult:
 
 
 class RelationshipMatcher:
-    """Query Qdrant for similar sections and summarize the rationale."""
+    """Query Qdrant for similar sections and summarize the rationale.
+
+    With a ``reranker``, candidates whose chunk and payload carry a ``text`` field are
+    rescored by the cross-encoder and its probability becomes the match confidence.
+    """
 
-    def __init__(self, *, client: QdrantClient, collection_name: str) -> None:
+    def __init__(
+        self,
+        *,
+        client: QdrantClient,
+        collection_name: str,
+        reranker: CrossEncoderReranker | None = None,
+    ) -> None:
         self.client = client
         self.collection_name = collection_name
+        self.reranker = reranker
 
     def search(
         self,
@@ -32,12 +144,21 @@ class RelationshipMatcher:
         limit: int = 5,
         filters: Filter | None = None,
     ) -> list[PointStruct]:
-        return self.client.search(
-            collection_name=self.collection_name,
-            query_vector=list(vector),
-            limit=limit,
-            query_filter=filters,
-        )
+        with stage_timer("similarity"):
+            if not hasattr(self.client, "search"):
+                # ``search`` was removed in newer qdrant-client releases.
+                return self.client.query_points(
+                    collection_name=self.collection_name,
+                    query=list(vector),
+                    limit=limit,
+                    query_filter=filters,
+                ).points
+            return self.client.search(
+                collection_name=self.collection_name,
+                query_vector=list(vector),
+                limit=limit,
+                query_filter=filters,
+            )
 
     def match(
         self,
@@ -45,25 +166,62 @@ class RelationshipMatcher:
         *,
         embedding_lookup: callable[[str], Sequence[float]],
         rationale_fn: callable[[dict[str, str], dict[str, str]], str],
+        limit: int = 5,
+        filters: Filter | None = None,
     ) -> list[MatchResult]:
         results: list[MatchResult] = []
+        pairs: list[tuple[str, str] | None] = []
         for chunk in guideline_chunks:
             vector = embedding_lookup(chunk["id"])
-            matches = self.search(vector)
-            for point in matches:
-                payload = point.payload or {}
-                rationale = rationale_fn(chunk, payload)
-                results.append(
-                    MatchResult(
-                        guideline_id=chunk["id"],
-                        regulation_id=str(payload.get("id")),
-                        score=float(point.score or 0.0),
-                        rationale=rationale,
-                        confidence=float(payload.get("confidence", 0.5)),
-                    )
+            points = self.search(vector, limit=limit, filters=filters)
+            self._collect(chunk, points, rationale_fn, results, pairs)
+        return self._finish(results, pairs)
+
+    @staticmethod
+    def _collect(
+        chunk: dict[str, str],
+        points: Iterable[PointStruct],
+        rationale_fn: callable[[dict[str, str], dict[str, str]], str],
+        results: list[MatchResult],
+        pairs: list[tuple[str, str] | None],
+    ) -> None:
+        for point in points:
+            payload = point.payload or {}
+            rationale = rationale_fn(chunk, payload)
+            results.append(
+                MatchResult(
+                    guideline_id=chunk["id"],
+                    regulation_id=str(payload.get("id")),
+                    score=float(point.score or 0.0),
+                    rationale=rationale,
+                    confidence=float(payload.get("confidence", 0.5)),
                 )
+            )
+            texts = (chunk.get("text"), payload.get("text"))
+            pairs.append(texts if all(texts) else None)
+
+    def _finish(
+        self,
+        results: list[MatchResult],
+        pairs: list[tuple[str, str] | None],
+    ) -> list[MatchResult]:
+        if self.reranker is not None:
+            self._rerank(results, pairs)
+        MATCHES_TOTAL.inc(len(results), source="matcher")
         return results
 
+    def _rerank(self, results: list[MatchResult], pairs: list[tuple[str, str] | None]) -> None:
+        # Best cosine scores first, so the candidate budget is spent where it matters.
+        order = sorted(
+            (index for index, pair in enumerate(pairs) if pair is not None),
+            key=lambda index: results[index].score,
+            reverse=True,
+        )
+        probabilities = self.reranker.score([pairs[index] for index in order])
+        for index, probability in zip(order, probabilities, strict=True):
+            if probability is not None:
+                results[index].confidence = probability
+
     @staticmethod
     def summarize_rationale(chunk: dict[str, str], candidate: dict[str, str]) -> str:
         guideline_label = chunk.get("title", chunk.get("id", "unknown"))
@@ -76,3 +234,87 @@ class RelationshipMatcher:
     @staticmethod
     def confidence_from_score(score: float) -> float:
         return float(np.clip(score, 0, 1))
+
+
+class AsyncRelationshipMatcher(RelationshipMatcher):
+    """``RelationshipMatcher`` on top of Qdrant's async client.
+
+    ``search_many`` sends all query vectors of a batch in one ``query_batch_points``
+    request, so a batch of guideline chunks costs one round trip.
+    """
+
+    client: AsyncQdrantClient
+
+    def __init__(
+        self,
+        *,
+        client: AsyncQdrantClient,
+        collection_name: str,
+        reranker: CrossEncoderReranker | None = None,
+    ) -> None:
+        super().__init__(client=client, collection_name=collection_name, reranker=reranker)
+
+    async def search(  # type: ignore[override]
+        self,
+        vector: Sequence[float],
+        *,
+        limit: int = 5,
+        filters: Filter | None = None,
+    ) -> list[PointStruct]:
+        [points] = await self.search_many([vector], limit=limit, filters=filters)
+        return points
+
+    async def search_many(
+        self,
+        vectors: Sequence[Sequence[float]],
+        *,
+        limit: int = 5,
+        filters: Filter | None = None,
+    ) -> list[list[PointStruct]]:
+        from qdrant_client.http.models import QueryRequest
+
+        if not len(vectors):
+            return []
+        requests = [
+            QueryRequest(
+                query=[float(value) for value in vector],
+                limit=limit,
+                filter=filters,
+                with_payload=True,
+            )
+            for vector in vectors
+        ]
+        with stage_timer("similarity"):
+            responses = await self.client.query_batch_points(
+                collection_name=self.collection_name, requests=requests
+            )
+        return [response.points for response in responses]
+
+    async def match(  # type: ignore[override]
+        self,
+        guideline_chunks: Iterable[dict[str, str]],
+        *,
+        embedding_lookup: callable[[str], Sequence[float]],
+        rationale_fn: callable[[dict[str, str], dict[str, str]], str],
+        limit: int = 5,
+        filters: Filter | None = None,
+    ) -> list[MatchResult]:
+        chunks = list(guideline_chunks)
+        vectors = [embedding_lookup(chunk["id"]) for chunk in chunks]
+        points = await self.search_many(vectors, limit=limit, filters=filters)
+        return await asyncio.to_thread(self.results_for, chunks, points, rationale_fn=rationale_fn)
+
+    def results_for(
+        self,
+        chunks: Sequence[dict[str, str]],
+        points: Sequence[Sequence[PointStruct]],
+        *,
+        rationale_fn: callable[[dict[str, str], dict[str, str]], str],
+    ) -> list[MatchResult]:
+        """Build results for ``chunks`` from the points already retrieved for each."""
+
+        results: list[MatchResult] = []
+        pairs: list[tuple[str, str] | None] = []
+        for chunk, chunk_points in zip(chunks, points, strict=True):
+            self._collect(chunk, chunk_points, rationale_fn, results, pairs)
+        return self._finish(results, pairs)
@@ -0,0 +1,287 @@
+"""Lightweight Prometheus-style metrics shared by ingestion, processing and the API.
+
+Only counters, gauges and histograms are implemented; the registry renders the
+Prometheus text exposition format for ``/metrics`` and a JSON-friendly snapshot
+for command line reports.
+"""
+from __future__ import annotations
+
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator, Sequence
+
+DEFAULT_BUCKETS: tuple[float, ...] = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+    math.inf,
+)
+
+LabelKey = tuple[str, ...]
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict[str, str]) -> LabelKey:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, key: LabelKey, extra: dict[str, str] | None = None) -> str:
+        pairs = list(zip(self.labelnames, key, strict=True)) + list((extra or {}).items())
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+    def header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def render(self) -> list[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        samples = [f"{self.name}{self._labels(key)} {_format_value(value)}" for key, value in items]
+        return self.header() + samples
+
+    def snapshot(self) -> list[dict[str, object]]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [
+            {"labels": dict(zip(self.labelnames, key, strict=True)), "value": value}
+            for key, value in items
+        ]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+
+class _HistogramSeries:
+    __slots__ = ("bucket_counts", "count", "total", "maximum")
+
+    def __init__(self, size: int) -> None:
+        self.bucket_counts = [0] * size
+        self.count = 0
+        self.total = 0.0
+        self.maximum = 0.0
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        *,
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        bounds = sorted(buckets)
+        if bounds[-1] != math.inf:
+            bounds.append(math.inf)
+        self.buckets = tuple(bounds)
+        self._series: dict[LabelKey, _HistogramSeries] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = _HistogramSeries(len(self.buckets))
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series.bucket_counts[index] += 1
+                    break
+            series.count += 1
+            series.total += value
+            series.maximum = max(series.maximum, value)
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels: str) -> int:
+        series = self._series.get(self._key(labels))
+        return series.count if series else 0
+
+    def render(self) -> list[str]:
+        lines = self.header()
+        with self._lock:
+            items = sorted(self._series.items())
+            for key, series in items:
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, series.bucket_counts, strict=True):
+                    cumulative += bucket_count
+                    labels = self._labels(key, {"le": _format_value(bound)})
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                lines.append(f"{self.name}_sum{self._labels(key)} {_format_value(series.total)}")
+                lines.append(f"{self.name}_count{self._labels(key)} {series.count}")
+        return lines
+
+    def snapshot(self) -> list[dict[str, object]]:
+        with self._lock:
+            items = sorted(self._series.items())
+            return [
+                {
+                    "labels": dict(zip(self.labelnames, key, strict=True)),
+                    "count": series.count,
+                    "sum": series.total,
+                    "mean": series.total / series.count if series.count else 0.0,
+                    "max": series.maximum,
+                }
+                for key, series in items
+            ]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+
+class MetricsRegistry:
+    """Holds named metrics; registering an existing name returns the same metric."""
+
+    def __init__(self) -> None:
+        self._metrics: dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric):
+                    raise ValueError(f"Metric {metric.name} already registered as {existing.kind}")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))  # type: ignore[return-value]
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))  # type: ignore[return-value]
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        *,
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        metric = Histogram(name, documentation, labelnames, buckets=buckets)
+        return self._register(metric)  # type: ignore[return-value]
+
+    def render_prometheus(self) -> str:
+        lines: list[str] = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())  # type: ignore[attr-defined]
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> dict[str, dict[str, list[dict[str, object]]]]:
+        report: dict[str, dict[str, list[dict[str, object]]]] = {}
+        for metric in list(self._metrics.values()):
+            section = report.setdefault(f"{metric.kind}s", {})
+            section[metric.name] = metric.snapshot()  # type: ignore[attr-defined]
+        return report
+
+    def reset(self) -> None:
+        for metric in list(self._metrics.values()):
+            metric.reset()  # type: ignore[attr-defined]
+
+
+REGISTRY = MetricsRegistry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "echograph_stage_duration_seconds",
+    "Wall-clock duration of pipeline stages.",
+    ("stage",),
+)
+DOCUMENTS_TOTAL = REGISTRY.counter(
+    "echograph_documents_total",
+    "Documents processed, by entry point.",
+    ("source",),
+)
+SECTIONS_TOTAL = REGISTRY.counter(
+    "echograph_sections_total",
+    "Sections created, by category.",
+    ("category",),
+)
+MATCHES_TOTAL = REGISTRY.counter(
+    "echograph_matches_total",
+    "Candidate matches produced, by entry point.",
+    ("source",),
+)
+
+
+def stage_timer(stage: str):
+    """Context manager recording the enclosed block in ``STAGE_SECONDS``."""
+
+    return STAGE_SECONDS.time(stage=stage)
@@ -0,0 +1,97 @@
+"""Pipelined encode, upload and search over batches with the async Qdrant client.
+
+Three stages run concurrently and are connected by bounded queues: while batch
+N+1 is encoded on a worker thread, batch N is uploaded and batch N-1 is searched.
+``queue_size`` caps how many batches may wait between two stages, so a slow
+vector store applies backpressure to encoding instead of growing memory.
+"""
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Iterable
+
+import numpy as np
+
+from .embeddings import AsyncEmbeddingService
+from .matching import AsyncRelationshipMatcher, MatchResult, RelationshipMatcher
+
+_DONE = object()
+
+
+@dataclass(slots=True)
+class TextBatch:
+    texts: list[str]
+    metadata: list[dict[str, Any]]
+    ids: list[int | str]
+
+
+@dataclass(slots=True)
+class BatchResult:
+    batch: TextBatch
+    vectors: np.ndarray
+    matches: list[MatchResult] = field(default_factory=list)
+
+
+async def run_pipeline(
+    batches: Iterable[TextBatch],
+    *,
+    service: AsyncEmbeddingService,
+    matcher: AsyncRelationshipMatcher | None = None,
+    rationale_fn: Callable[[dict[str, Any], dict[str, Any]], str] = (
+        RelationshipMatcher.summarize_rationale
+    ),
+    limit: int = 5,
+    filters: Any = None,
+    queue_size: int = 2,
+) -> list[BatchResult]:
+    """Encode and upsert every batch and, with a ``matcher``, search its vectors.
+
+    Results are returned in batch order. If any stage fails, the other stages are
+    cancelled and the error is raised.
+    """
+
+    encoded: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+    uploaded: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+    results: list[BatchResult] = []
+
+    async def encode_stage() -> None:
+        for batch in batches:
+            await encoded.put(BatchResult(batch, await service.embed(batch.texts)))
+        await encoded.put(_DONE)
+
+    async def upload_stage() -> None:
+        while (item := await encoded.get()) is not _DONE:
+            await service.upsert_vectors(item.vectors, item.batch.metadata, ids=item.batch.ids)
+            await uploaded.put(item)
+        await uploaded.put(_DONE)
+
+    async def search_stage() -> None:
+        while (item := await uploaded.get()) is not _DONE:
+            if matcher is not None:
+                chunks = [
+                    {**metadata, "id": str(point_id), "text": text}
+                    for text, metadata, point_id in zip(
+                        item.batch.texts, item.batch.metadata, item.batch.ids, strict=True
+                    )
+                ]
+                points = await matcher.search_many(item.vectors, limit=limit, filters=filters)
+                # A cross-encoder reranker runs inside results_for; keep it off the loop.
+                item.matches = await asyncio.to_thread(
+                    matcher.results_for, chunks, points, rationale_fn=rationale_fn
+                )
+            results.append(item)
+
+    await _run_stages([encode_stage(), upload_stage(), search_stage()])
+    return results
+
+
+async def _run_stages(stages: list[Awaitable[None]]) -> None:
+    tasks = [asyncio.ensure_future(stage) for stage in stages]
+    try:
+        await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
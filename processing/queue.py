@@ -0,0 +1,166 @@
+"""Durable SQLite work queue with leases, shared by local worker processes.
+
+Each task is claimed under a time-limited lease. A worker that crashes simply
+lets its lease expire, after which another worker reclaims the task, so a run
+can be stopped at any point and resumed by starting the workers again.
+"""
+from __future__ import annotations
+
+import json
+import sqlite3
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Iterable
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id TEXT PRIMARY KEY,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    lease_owner TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    result TEXT,
+    error TEXT,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_tasks_status ON tasks (status, lease_expires);
+"""
+
+
+@dataclass(slots=True)
+class Task:
+    id: str
+    payload: dict[str, Any]
+    attempts: int
+
+
+class WorkQueue:
+    """Lease-based task table stored in a SQLite database file.
+
+    Claims run inside ``BEGIN IMMEDIATE`` transactions, so concurrent processes
+    never receive the same task while its lease is valid.
+    """
+
+    def __init__(self, path: Path, *, max_attempts: int = 3, timeout: float = 30.0) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_attempts = max_attempts
+        self._connection = sqlite3.connect(self.path, timeout=timeout, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self._connection.close()
+
+    def enqueue(self, tasks: Iterable[tuple[str, dict[str, Any]]]) -> int:
+        """Add tasks that are not queued yet; returns how many were new."""
+
+        now = time.time()
+        rows = [(task_id, json.dumps(payload), now) for task_id, payload in tasks]
+        with self._transaction():
+            before = self._connection.total_changes
+            self._connection.executemany(
+                "INSERT OR IGNORE INTO tasks (id, payload, updated_at) VALUES (?, ?, ?)", rows
+            )
+            return self._connection.total_changes - before
+
+    def claim(self, owner: str, *, lease_seconds: float = 300.0) -> Task | None:
+        now = time.time()
+        with self._transaction():
+            # A worker that died on a task's last attempt never calls ``fail``.
+            self._connection.execute(
+                """
+                UPDATE tasks
+                SET status = 'failed', error = 'lease expired on the last attempt',
+                    lease_owner = NULL, lease_expires = NULL, updated_at = ?
+                WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?
+                """,
+                (now, now, self.max_attempts),
+            )
+            row = self._connection.execute(
+                """
+                SELECT id, payload, attempts FROM tasks
+                WHERE attempts < ?
+                  AND (status = 'pending' OR (status = 'leased' AND lease_expires < ?))
+                ORDER BY rowid
+                LIMIT 1
+                """,
+                (self.max_attempts, now),
+            ).fetchone()
+            if row is None:
+                return None
+            self._connection.execute(
+                """
+                UPDATE tasks
+                SET status = 'leased', lease_owner = ?, lease_expires = ?,
+                    attempts = attempts + 1, updated_at = ?
+                WHERE id = ?
+                """,
+                (owner, now + lease_seconds, now, row[0]),
+            )
+        return Task(id=row[0], payload=json.loads(row[1]), attempts=row[2] + 1)
+
+    def renew(self, task_id: str, owner: str, *, lease_seconds: float = 300.0) -> bool:
+        now = time.time()
+        with self._transaction():
+            cursor = self._connection.execute(
+                """
+                UPDATE tasks SET lease_expires = ?, updated_at = ?
+                WHERE id = ? AND lease_owner = ? AND status = 'leased'
+                """,
+                (now + lease_seconds, now, task_id, owner),
+            )
+        return cursor.rowcount == 1
+
+    def complete(self, task_id: str, owner: str, result: dict[str, Any] | None = None) -> bool:
+        with self._transaction():
+            cursor = self._connection.execute(
+                """
+                UPDATE tasks SET status = 'done', result = ?, error = NULL,
+                    lease_owner = NULL, lease_expires = NULL, updated_at = ?
+                WHERE id = ? AND lease_owner = ? AND status = 'leased'
+                """,
+                (json.dumps(result) if result is not None else None, time.time(), task_id, owner),
+            )
+        return cursor.rowcount == 1
+
+    def fail(self, task_id: str, owner: str, error: str) -> None:
+        """Release a task after an error; it is retried until ``max_attempts``."""
+
+        with self._transaction():
+            self._connection.execute(
+                """
+                UPDATE tasks
+                SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END,
+                    error = ?, lease_owner = NULL, lease_expires = NULL, updated_at = ?
+                WHERE id = ? AND lease_owner = ?
+                """,
+                (self.max_attempts, error, time.time(), task_id, owner),
+            )
+
+    def counts(self) -> dict[str, int]:
+        rows = self._connection.execute("SELECT status, COUNT(*) FROM tasks GROUP BY status")
+        return dict(rows.fetchall())
+
+    def results(self) -> list[dict[str, Any]]:
+        rows = self._connection.execute(
+            "SELECT result FROM tasks WHERE status = 'done' AND result IS NOT NULL ORDER BY rowid"
+        )
+        return [json.loads(result) for (result,) in rows]
+
+    def _transaction(self) -> _Transaction:
+        return _Transaction(self._connection)
+
+
+class _Transaction:
+    def __init__(self, connection: sqlite3.Connection) -> None:
+        self._connection = connection
+
+    def __enter__(self) -> None:
+        self._connection.execute("BEGIN IMMEDIATE")
+
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        self._connection.execute("COMMIT" if exc_type is None else "ROLLBACK")
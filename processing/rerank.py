@@ -0,0 +1,136 @@
+"""Second-stage cross-encoder re-ranking of bi-encoder match candidates.
+
+The bi-encoder only yields a cosine score per pair. A cross-encoder reads both
+texts together and produces a much better relevance estimate, but is too slow to
+run on every pair, so it only rescores the top candidates that cosine retrieval
+already selected, within a pair budget and a wall-clock deadline.
+"""
+from __future__ import annotations
+
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Sequence
+
+from .cleanup import content_hash
+from .metrics import REGISTRY, stage_timer
+
+RERANK_PAIRS_TOTAL = REGISTRY.counter(
+    "echograph_rerank_pairs_total",
+    "Candidate pairs seen by the cross-encoder re-ranker, by outcome.",
+    ("result",),
+)
+
+
+@dataclass(slots=True)
+class RerankConfig:
+    model_name: str = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+    batch_size: int = 32
+    candidate_budget: int = 256
+    max_latency_seconds: float = 2.0
+    cache_entries: int = 100_000
+
+    @classmethod
+    def from_env(cls) -> RerankConfig | None:
+        """Build a config from ``RERANK_*`` variables; ``None`` when ``RERANK_MODEL`` is unset."""
+
+        model_name = os.getenv("RERANK_MODEL")
+        if not model_name:
+            return None
+        defaults = cls()
+        return cls(
+            model_name=model_name,
+            batch_size=int(os.getenv("RERANK_BATCH_SIZE") or defaults.batch_size),
+            candidate_budget=int(
+                os.getenv("RERANK_CANDIDATE_BUDGET") or defaults.candidate_budget
+            ),
+            max_latency_seconds=float(
+                os.getenv("RERANK_MAX_LATENCY_SECONDS") or defaults.max_latency_seconds
+            ),
+        )
+
+
+class CrossEncoderReranker:
+    """Score ``(query, candidate)`` text pairs with a cross-encoder.
+
+    Pairs are scored in the order given, so callers pass them best-first: when the
+    candidate budget or the latency cap is hit, the remaining pairs are returned as
+    ``None`` and keep their bi-encoder confidence. Scores are cached by pair hash.
+    """
+
+    def __init__(self, config: RerankConfig | None = None, *, model: Any = None) -> None:
+        self.config = config or RerankConfig()
+        self._model = model
+        self._cache: OrderedDict[str, float] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def model(self) -> Any:
+        if self._model is None:
+            from sentence_transformers import CrossEncoder
+
+            self._model = CrossEncoder(self.config.model_name)
+        return self._model
+
+    @staticmethod
+    def pair_key(query: str, candidate: str) -> str:
+        return content_hash(f"{query}\x1f{candidate}")
+
+    def score(self, pairs: Sequence[tuple[str, str]]) -> list[float | None]:
+        """Return a relevance probability per pair, or ``None`` for pairs left unscored."""
+
+        results: list[float | None] = [None] * len(pairs)
+        pending: dict[str, list[int]] = {}
+        with self._lock:
+            for index, (query, candidate) in enumerate(pairs):
+                key = self.pair_key(query, candidate)
+                if key in self._cache:
+                    self._cache.move_to_end(key)
+                    results[index] = self._cache[key]
+                else:
+                    pending.setdefault(key, []).append(index)
+        cached = len(pairs) - sum(len(indices) for indices in pending.values())
+        RERANK_PAIRS_TOTAL.inc(cached, result="cached")
+
+        keys = list(pending)[: self.config.candidate_budget]
+        deadline = time.perf_counter() + self.config.max_latency_seconds
+        scored = 0
+        with stage_timer("rerank"):
+            for offset in range(0, len(keys), self.config.batch_size):
+                if time.perf_counter() >= deadline:
+                    break
+                batch = keys[offset : offset + self.config.batch_size]
+                logits = self.model.predict(
+                    [pairs[pending[key][0]] for key in batch],
+                    batch_size=self.config.batch_size,
+                    show_progress_bar=False,
+                )
+                fresh = {
+                    key: _sigmoid(float(logit)) for key, logit in zip(batch, logits, strict=True)
+                }
+                with self._lock:
+                    self._cache.update(fresh)
+                    while len(self._cache) > self.config.cache_entries:
+                        self._cache.popitem(last=False)
+                for key, probability in fresh.items():
+                    for index in pending[key]:
+                        results[index] = probability
+                        scored += 1
+
+        RERANK_PAIRS_TOTAL.inc(scored, result="scored")
+        RERANK_PAIRS_TOTAL.inc(len(pairs) - cached - scored, result="skipped")
+        return results
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+
+def _sigmoid(value: float) -> float:
+    if value >= 0:
+        return 1.0 / (1.0 + math.exp(-value))
+    exp = math.exp(value)
+    return exp / (1.0 + exp)
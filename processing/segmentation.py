@@ -0,0 +1,90 @@
+"""Single-pass paragraph and sentence segmentation with exact character offsets."""
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import Iterator
+
+PARAGRAPH_BREAK = "\n\n"
+SENTENCE_END_RE = re.compile(r"[.!?]+[\"')\]]* ")
+
+
+@dataclass(slots=True)
+class Segment:
+    text: str
+    start: int
+    end: int
+
+
+def segment_text(text: str, *, max_length: int = 800) -> Iterator[Segment]:
+    """Yield segments of at most ``max_length`` characters from ``text``.
+
+    ``text`` is expected in the form produced by ``cleanup.normalize_paragraphs``:
+    paragraphs separated by a blank line, single spaces inside them. Paragraphs
+    that fit are emitted whole; longer ones are packed sentence by sentence, and
+    sentences longer than ``max_length`` are cut at the last space that keeps at
+    least 40% of the limit. ``text[segment.start:segment.end] == segment.text``.
+
+    The scan moves forward only, using bounded ``find``/``rfind`` and regex
+    searches on the original string, so no intermediate strings are built.
+    """
+
+    if max_length < 1:
+        raise ValueError("max_length must be positive")
+    length = len(text)
+    cursor = 0
+    while cursor < length:
+        brk = text.find(PARAGRAPH_BREAK, cursor)
+        end = length if brk == -1 else brk
+        start, stop = _trim(text, cursor, end)
+        if start < stop:
+            if stop - start <= max_length:
+                yield Segment(text[start:stop], start, stop)
+            else:
+                yield from _pack_sentences(text, start, stop, max_length)
+        cursor = length if brk == -1 else brk + len(PARAGRAPH_BREAK)
+
+
+def _trim(text: str, start: int, end: int) -> tuple[int, int]:
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    return start, end
+
+
+def _pack_sentences(text: str, start: int, stop: int, max_length: int) -> Iterator[Segment]:
+    """Greedily pack whole sentences of ``text[start:stop]`` into segments."""
+
+    segment_start = start
+    last_boundary = -1  # end of the last sentence that fits in the current segment
+    position = start
+    while True:
+        match = SENTENCE_END_RE.search(text, position, stop)
+        boundary = stop if match is None else match.end() - 1  # exclude the space
+        if boundary - segment_start > max_length:
+            if last_boundary > segment_start:
+                yield Segment(text[segment_start:last_boundary], segment_start, last_boundary)
+                segment_start, _ = _trim(text, last_boundary, stop)
+                last_boundary = -1
+                continue  # re-check the same sentence against the new segment start
+            # A single sentence exceeds the limit: cut it at a space.
+            cut = _cut_point(text, segment_start, max_length)
+            seg_start, seg_end = _trim(text, segment_start, cut)
+            yield Segment(text[seg_start:seg_end], seg_start, seg_end)
+            segment_start, _ = _trim(text, cut, stop)
+            position = max(position, segment_start)
+            continue
+        last_boundary = boundary
+        if match is None:
+            break
+        position = match.end()
+    seg_start, seg_end = _trim(text, segment_start, stop)
+    if seg_start < seg_end:
+        yield Segment(text[seg_start:seg_end], seg_start, seg_end)
+
+
+def _cut_point(text: str, start: int, max_length: int) -> int:
+    limit = start + max_length
+    split = text.rfind(" ", start + int(max_length * 0.4), limit)
+    return split if split > start else limit
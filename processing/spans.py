@@ -0,0 +1,112 @@
+"""Locate the sentences inside a matched section that best support a match."""
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Callable, Sequence
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from .corpus import CorpusStore
+
+SENTENCE_RE = re.compile(r"[^.!?\n]+(?:[.!?]+[\"')\]]*|$)", re.MULTILINE)
+
+
+@dataclass(slots=True)
+class SpanRequest:
+    """Find the window of ``text[start:end]`` closest to row ``query`` of the query matrix.
+
+    With ``text=None`` the range is read from corpus document ``document`` instead.
+    """
+
+    query: int
+    text: str | None
+    start: int = 0
+    end: int | None = None
+    document: str | None = None
+
+
+def sentence_spans(text: str, start: int = 0, end: int | None = None) -> list[tuple[int, int]]:
+    """Character spans of the sentences in ``text[start:end]``, whitespace trimmed."""
+
+    end = len(text) if end is None else end
+    spans: list[tuple[int, int]] = []
+    for match in SENTENCE_RE.finditer(text, start, end):
+        chunk = match.group()
+        stripped = chunk.strip()
+        if not stripped:
+            continue
+        leading = len(chunk) - len(chunk.lstrip())
+        spans.append((match.start() + leading, match.start() + leading + len(stripped)))
+    return spans
+
+
+def sentence_windows(
+    text: str,
+    start: int = 0,
+    end: int | None = None,
+    *,
+    sentences: int = 2,
+) -> list[tuple[int, int]]:
+    """Spans of every run of ``sentences`` consecutive sentences in ``text[start:end]``."""
+
+    end = len(text) if end is None else end
+    spans = sentence_spans(text, start, end)
+    if not spans:
+        return [(start, end)]
+    size = min(sentences, len(spans))
+    return [(spans[index][0], spans[index + size - 1][1]) for index in range(len(spans) - size + 1)]
+
+
+def localize_spans(
+    encode: Callable[[list[str]], np.ndarray],
+    queries: np.ndarray,
+    requests: Sequence[SpanRequest],
+    *,
+    sentences: int = 2,
+    corpus: CorpusStore | None = None,
+) -> list[tuple[int, int]]:
+    """Return the best sentence window for every request.
+
+    Candidate windows of all requests are embedded in a single ``encode`` call
+    (requests over the same text and bounds share their windows) and scored against
+    the query vectors with one matrix product. Requests without ``text`` read only
+    their ``start:end`` range from ``corpus``; offsets are still document offsets.
+    """
+
+    if not requests:
+        return []
+    groups: dict[tuple[str | None, str | None, int, int | None], tuple[int, int]] = {}
+    spans: list[tuple[int, int]] = []
+    texts: list[str] = []
+    for request in requests:
+        key = _group_key(request)
+        if key in groups:
+            continue
+        if request.text is not None:
+            text, base, end = request.text, 0, request.end
+        else:
+            if corpus is None or request.document is None:
+                raise ValueError("SpanRequest without text needs a document and a corpus")
+            text = corpus.excerpt(request.document, request.start, request.end)
+            base, end = request.start, None
+        windows = sentence_windows(text, request.start - base, end, sentences=sentences)
+        groups[key] = (len(spans), len(windows))
+        spans.extend((start + base, stop + base) for start, stop in windows)
+        texts.extend(text[start:stop] for start, stop in windows)
+
+    vectors = np.asarray(encode(texts), dtype=np.float32)
+    vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-9)
+    scores = np.asarray(queries, dtype=np.float32) @ vectors.T
+
+    located: list[tuple[int, int]] = []
+    for request in requests:
+        offset, count = groups[_group_key(request)]
+        best = offset + int(np.argmax(scores[request.query, offset : offset + count]))
+        located.append(spans[best])
+    return located
+
+
+def _group_key(request: SpanRequest) -> tuple[str | None, str | None, int, int | None]:
+    return (request.text, request.document, request.start, request.end)
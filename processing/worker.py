@@ -0,0 +1,354 @@
+"""Processing worker: stream ingestion output through normalize, chunk, embed and upsert.
+
+Input files are split into tasks (line ranges of JSONL files, row groups of
+Parquet files) that are stored in a SQLite lease queue and consumed by ``N``
+local processes. Finished tasks stay recorded in the queue, so re-running the
+same command after a crash or restart resumes where the previous run stopped.
+
+Usage::
+
+    python -m processing.worker data/raw --workers 4 --queue data/processing/queue.db
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import socket
+import threading
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator, Protocol, Sequence
+
+from .chunking import ChunkConfig, chunk_text
+from .cleanup import normalize_many
+from .embeddings import PAYLOAD_INDEX_FIELDS, EmbeddingConfig
+from .metrics import DOCUMENTS_TOTAL, stage_timer
+from .queue import Task, WorkQueue
+
+POINT_NAMESPACE = uuid.UUID("6f1c7f2e-3a58-4c1b-9d43-0d5d2f3f6b8a")
+
+
+class VectorSink(Protocol):
+    def upsert(
+        self,
+        texts: Sequence[str],
+        metadata: Sequence[dict[str, Any]],
+        *,
+        ids: Sequence[int | str] | None = None,
+    ) -> None: ...
+
+
+@dataclass(slots=True)
+class WorkerConfig:
+    queue_path: Path = Path("data/processing/queue.db")
+    workers: int = 1
+    batch_size: int = 256
+    chunk_size: int = 160
+    lease_seconds: float = 300.0
+    max_attempts: int = 3
+    # Values for ``PAYLOAD_INDEX_FIELDS`` (region, regulation_type, language) used when a
+    # record does not carry its own, so filtered matching finds worker-ingested points.
+    payload_defaults: dict[str, str] = field(default_factory=dict)
+    embedding: EmbeddingConfig = field(default_factory=EmbeddingConfig)
+
+
+def default_sink(config: WorkerConfig) -> VectorSink:
+    from .embeddings import EmbeddingService
+
+    return EmbeddingService(config.embedding, recreate=False)
+
+
+def discover_inputs(paths: Iterable[Path]) -> list[Path]:
+    """Expand directories to their JSONL files.
+
+    ``ingestion.parquet`` repeats the records of the JSONL files next to it, so
+    Parquet files are only processed when passed explicitly.
+    """
+
+    found: list[Path] = []
+    for path in paths:
+        if not path.exists():
+            raise FileNotFoundError(f"Input not found: {path}")
+        if path.is_dir():
+            found.extend(sorted(path.glob("*.jsonl")))
+        elif path.suffix in {".jsonl", ".parquet"}:
+            found.append(path)
+        else:
+            raise ValueError(f"Unsupported input: {path}")
+    return found
+
+
+def _file_digest(path: Path) -> str:
+    digest = hashlib.sha256(str(path.resolve()).encode("utf-8") + b"\0")
+    with path.open("rb") as handle:
+        for block in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()[:16]
+
+
+def plan_tasks(path: Path, *, batch_size: int) -> Iterator[tuple[str, dict[str, Any]]]:
+    """Yield ``(task_id, payload)`` pairs covering ``path``.
+
+    Task ids include a digest of the file's path and content, so an edited file is
+    processed again while unchanged files are skipped on resume.
+    """
+
+    digest = _file_digest(path)
+    if path.suffix == ".parquet":
+        import pyarrow.parquet as pq
+
+        for group in range(pq.ParquetFile(path).num_row_groups):
+            payload = {"path": str(path), "format": "parquet", "row_group": group}
+            yield f"{digest}:rg{group}", payload
+        return
+
+    start = offset = lines = 0
+    with path.open("rb") as handle:
+        for line in handle:
+            offset += len(line)
+            lines += 1
+            if lines == batch_size:
+                payload = {"path": str(path), "format": "jsonl", "start": start, "end": offset}
+                yield f"{digest}:{start}", payload
+                start, lines = offset, 0
+    if lines:
+        payload = {"path": str(path), "format": "jsonl", "start": start, "end": offset}
+        yield f"{digest}:{start}", payload
+
+
+def read_records(payload: dict[str, Any]) -> list[dict[str, Any]]:
+    path = Path(payload["path"])
+    if payload["format"] == "parquet":
+        import pyarrow.parquet as pq
+
+        return pq.ParquetFile(path).read_row_group(payload["row_group"]).to_pylist()
+    with path.open("rb") as handle:
+        handle.seek(payload["start"])
+        block = handle.read(payload["end"] - payload["start"])
+    return [json.loads(line) for line in block.splitlines() if line.strip()]
+
+
+def _indexed_fields(record: dict[str, Any], defaults: dict[str, str]) -> dict[str, str]:
+    fields = {}
+    for name in PAYLOAD_INDEX_FIELDS:
+        value = record.get(name) or defaults.get(name)
+        if value:
+            fields[name] = str(value)
+    return fields
+
+
+def process_task(
+    task: Task,
+    sink: VectorSink,
+    *,
+    chunk_size: int,
+    payload_defaults: dict[str, str] | None = None,
+) -> dict[str, int]:
+    with stage_timer("worker_read"):
+        records = read_records(task.payload)
+    with stage_timer("normalize"):
+        texts = normalize_many(str(record.get("text") or "") for record in records)
+    chunk_config = ChunkConfig(chunk_size=chunk_size)
+    chunks: list[str] = []
+    payloads: list[dict[str, Any]] = []
+    ids: list[str] = []
+    with stage_timer("chunk"):
+        for position, (record, text) in enumerate(zip(records, texts, strict=True)):
+            fields = _indexed_fields(record, payload_defaults or {})
+            for index, chunk in enumerate(chunk_text(text, chunk_config)):
+                key = f"{task.id}:{position}:{index}"
+                chunks.append(chunk)
+                payloads.append(
+                    {"text": chunk, "source": record.get("source"), "chunk": key, **fields}
+                )
+                ids.append(str(uuid.uuid5(POINT_NAMESPACE, key)))
+    if chunks:
+        sink.upsert(chunks, payloads, ids=ids)
+    DOCUMENTS_TOTAL.inc(len(records), source="worker")
+    return {"records": len(records), "chunks": len(chunks)}
+
+
+class _LeaseHeartbeat:
+    """Renew a task's lease from a background thread while the task is processed.
+
+    The thread uses its own queue connection and renews every third of the lease,
+    so tasks that run longer than ``lease_seconds`` are not reclaimed by others.
+    """
+
+    def __init__(self, config: WorkerConfig, task_id: str, owner: str) -> None:
+        self._config = config
+        self._task_id = task_id
+        self._owner = owner
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._renew, daemon=True)
+
+    def __enter__(self) -> _LeaseHeartbeat:
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        self._stopped.set()
+        self._thread.join()
+
+    def _renew(self) -> None:
+        lease_seconds = self._config.lease_seconds
+        queue = WorkQueue(self._config.queue_path, max_attempts=self._config.max_attempts)
+        try:
+            while not self._stopped.wait(lease_seconds / 3):
+                if not queue.renew(self._task_id, self._owner, lease_seconds=lease_seconds):
+                    return  # lease lost; ``complete`` will report it
+        finally:
+            queue.close()
+
+
+def work(
+    config: WorkerConfig,
+    *,
+    owner: str,
+    sink: VectorSink | None = None,
+    sink_factory: Callable[[WorkerConfig], VectorSink] = default_sink,
+) -> int:
+    """Claim and process tasks until the queue is drained; returns tasks completed."""
+
+    queue = WorkQueue(config.queue_path, max_attempts=config.max_attempts)
+    completed = 0
+    try:
+        while (task := queue.claim(owner, lease_seconds=config.lease_seconds)) is not None:
+            sink = sink or sink_factory(config)
+            try:
+                with _LeaseHeartbeat(config, task.id, owner):
+                    result = process_task(
+                        task,
+                        sink,
+                        chunk_size=config.chunk_size,
+                        payload_defaults=config.payload_defaults,
+                    )
+            except Exception as exc:  # noqa: BLE001 - recorded on the task and retried
+                queue.fail(task.id, owner, f"{type(exc).__name__}: {exc}")
+                continue
+            if queue.complete(task.id, owner, result):
+                completed += 1
+    finally:
+        queue.close()
+    return completed
+
+
+def _work_in_child(
+    config: WorkerConfig,
+    owner: str,
+    sink_factory: Callable[[WorkerConfig], VectorSink],
+) -> None:
+    work(config, owner=owner, sink_factory=sink_factory)
+
+
+def run(
+    inputs: Sequence[Path],
+    config: WorkerConfig,
+    *,
+    sink_factory: Callable[[WorkerConfig], VectorSink] = default_sink,
+) -> dict[str, Any]:
+    """Queue ``inputs`` and process them with ``config.workers`` processes."""
+
+    queue = WorkQueue(config.queue_path, max_attempts=config.max_attempts)
+    try:
+        queued = sum(
+            queue.enqueue(plan_tasks(path, batch_size=config.batch_size))
+            for path in discover_inputs(inputs)
+        )
+    finally:
+        queue.close()
+
+    # The sink is created here before any child starts, so only one process creates
+    # the vector collection; this process then works alongside the children.
+    sink = sink_factory(config)
+    prefix = f"{socket.gethostname()}:{os.getpid()}"
+    context = multiprocessing.get_context("spawn")
+    children = [
+        context.Process(target=_work_in_child, args=(config, f"{prefix}:{index}", sink_factory))
+        for index in range(1, max(1, config.workers))
+    ]
+    for child in children:
+        child.start()
+    work(config, owner=f"{prefix}:0", sink=sink)
+    for child in children:
+        child.join()
+
+    queue = WorkQueue(config.queue_path, max_attempts=config.max_attempts)
+    try:
+        results = queue.results()
+        return {
+            "queued": queued,
+            "tasks": queue.counts(),
+            "records": sum(result["records"] for result in results),
+            "chunks": sum(result["chunks"] for result in results),
+        }
+    finally:
+        queue.close()
+
+
+def build_parser() -> argparse.ArgumentParser:
+    defaults = WorkerConfig()
+    parser = argparse.ArgumentParser(description="Embed ingestion output into the vector store")
+    parser.add_argument("inputs", nargs="+", type=Path, help="JSONL/Parquet files or directories")
+    parser.add_argument("--queue", type=Path, default=defaults.queue_path)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument(
+        "--batch-size", type=int, default=defaults.batch_size, help="Records per task"
+    )
+    parser.add_argument(
+        "--chunk-size", type=int, default=defaults.chunk_size, help="Words per chunk"
+    )
+    parser.add_argument("--lease-seconds", type=float, default=defaults.lease_seconds)
+    parser.add_argument("--max-attempts", type=int, default=defaults.max_attempts)
+    for name in PAYLOAD_INDEX_FIELDS:
+        parser.add_argument(
+            f"--{name.replace('_', '-')}",
+            dest=name,
+            help=f"Payload '{name}' for records that do not set one",
+        )
+    parser.add_argument(
+        "--qdrant-url", default=os.getenv("QDRANT_URL", defaults.embedding.qdrant_url)
+    )
+    parser.add_argument("--collection", default=defaults.embedding.collection_name)
+    parser.add_argument(
+        "--model", default=os.getenv("EMBEDDING_MODEL", defaults.embedding.model_name)
+    )
+    return parser
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    try:
+        inputs = discover_inputs(args.inputs)
+    except (FileNotFoundError, ValueError) as exc:
+        parser.error(str(exc))
+    if not inputs:
+        parser.exit(1, f"No JSONL files in {', '.join(map(str, args.inputs))}; nothing to do.\n")
+    config = WorkerConfig(
+        queue_path=args.queue,
+        workers=args.workers,
+        batch_size=args.batch_size,
+        chunk_size=args.chunk_size,
+        lease_seconds=args.lease_seconds,
+        max_attempts=args.max_attempts,
+        payload_defaults={
+            name: getattr(args, name)
+            for name in PAYLOAD_INDEX_FIELDS
+            if getattr(args, name) is not None
+        },
+        embedding=EmbeddingConfig(
+            model_name=args.model,
+            qdrant_url=args.qdrant_url,
+            collection_name=args.collection,
+        ),
+    )
+    print(json.dumps(run(inputs, config), indent=2))
+
+
+if __name__ == "__main__":
+    main()
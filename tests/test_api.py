@@ -1,7 +1,14 @@
 import pytest
 from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import NullPool
 
 from api.app import app
+from api.database import get_read_session, get_session
+from api.models import Base, CloudGuidelineSection, Match, RegulationSection
+from api.search import highlight_spans
 
 
 @pytest.fixture
@@ -9,7 +16,384 @@ def client():
     return TestClient(app)
 
 
+@pytest.fixture
+def sqlite_db(tmp_path):
+    """Point the API at a throwaway SQLite database and return a sync session factory."""
+
+    database_path = tmp_path / "api.db"
+    sync_engine = create_engine(f"sqlite:///{database_path}")
+    Base.metadata.create_all(sync_engine)
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{database_path}", poolclass=NullPool)
+    session_factory = async_sessionmaker(async_engine, expire_on_commit=False, class_=AsyncSession)
+
+    async def override_session():
+        async with session_factory() as session:
+            yield session
+
+    app.dependency_overrides[get_session] = override_session
+    app.dependency_overrides[get_read_session] = override_session
+    yield lambda: Session(sync_engine)
+    app.dependency_overrides.clear()
+    sync_engine.dispose()
+
+
+def _seed_matches(session_factory, scores):
+    with session_factory() as session:
+        guideline = CloudGuidelineSection(external_id="g-1", title="Guideline", body="Encrypt data")
+        regulation = RegulationSection(
+            external_id="r-1",
+            title="Regulation",
+            body="Data must be encrypted",
+            region="EU",
+            regulation_type="law",
+        )
+        session.add_all([guideline, regulation])
+        session.flush()
+        matches = [
+            Match(
+                guideline_id=guideline.id,
+                regulation_id=regulation.id,
+                score=score,
+                confidence=score,
+                rationale="overlap",
+            )
+            for score in scores
+        ]
+        session.add_all(matches)
+        session.commit()
+        return guideline.id, [match.id for match in matches]
+
+
 def test_healthcheck(client):
     response = client.get("/healthz")
     assert response.status_code == 200
     assert response.json() == {"status": "ok"}
+
+
+def test_pool_healthcheck_reports_primary_pool(client):
+    response = client.get("/healthz/pool")
+    assert response.status_code == 200
+    payload = response.json()
+    assert "primary" in payload
+    assert "pool_class" in payload["primary"]
+
+
+def test_bulk_update_by_ids(client, sqlite_db):
+    _, match_ids = _seed_matches(sqlite_db, [0.9, 0.8, 0.7])
+
+    response = client.post(
+        "/matches/bulk",
+        json={"match_ids": match_ids[:2], "changes": {"status": "approved", "reviewer": "ana"}},
+    )
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "updated": 2,
+        "match_ids": match_ids[:2],
+        "status_counts": {"approved": 2},
+        "skipped_ids": [],
+    }
+    with sqlite_db() as session:
+        statuses = {match.id: match.status for match in session.query(Match)}
+    assert statuses == {match_ids[0]: "approved", match_ids[1]: "approved", match_ids[2]: "pending"}
+
+
+def test_bulk_update_by_filter(client, sqlite_db):
+    guideline_id, match_ids = _seed_matches(sqlite_db, [0.9, 0.4, 0.3])
+
+    response = client.post(
+        "/matches/bulk",
+        json={
+            "filter": {"guideline_id": guideline_id, "status": "pending", "max_score": 0.5},
+            "changes": {"status": "rejected", "reviewer_notes": "low score"},
+        },
+    )
+
+    assert response.status_code == 200
+    assert response.json()["match_ids"] == match_ids[1:]
+
+
+def test_bulk_update_requires_single_selector(client, sqlite_db):
+    response = client.post("/matches/bulk", json={"changes": {"status": "approved"}})
+    assert response.status_code == 400
+
+
+def test_bulk_update_rejects_an_empty_filter(client, sqlite_db):
+    _seed_matches(sqlite_db, [0.9, 0.4])
+
+    for criteria in ({}, {"guideline_id": None, "status": None}):
+        response = client.post(
+            "/matches/bulk", json={"filter": criteria, "changes": {"status": "approved"}}
+        )
+        assert response.status_code == 400
+    with sqlite_db() as session:
+        assert {match.status for match in session.query(Match)} == {"pending"}
+
+
+def _seed_sections(session_factory):
+    with session_factory() as session:
+        session.add_all(
+            [
+                CloudGuidelineSection(
+                    external_id="g-enc", title="Encryption", body="Encrypt customer data at rest."
+                ),
+                CloudGuidelineSection(
+                    external_id="g-log", title="Logging", body="Retain audit logs for a year."
+                ),
+                RegulationSection(
+                    external_id="r-enc",
+                    title="Article 32",
+                    body="Controllers shall implement encryption of personal data.",
+                    region="EU",
+                    regulation_type="law",
+                ),
+            ]
+        )
+        session.commit()
+
+
+def test_search_returns_ranked_hits_with_highlights(client, sqlite_db):
+    _seed_sections(sqlite_db)
+
+    response = client.get("/search", params={"q": "encrypt data"})
+
+    assert response.status_code == 200
+    payload = response.json()
+    assert payload["total"] == 2
+    assert {hit["external_id"] for hit in payload["hits"]} == {"g-enc", "r-enc"}
+    top = payload["hits"][0]
+    assert top["external_id"] == "g-enc"
+    assert top["highlights"][0] == {"start": 0, "end": 7}
+    # BM25 matched "data" in the regulation, not "encryption", so only "data" is highlighted.
+    regulation = payload["hits"][1]
+    body = "Controllers shall implement encryption of personal data."
+    assert [body[span["start"] : span["end"]] for span in regulation["highlights"]] == ["data"]
+
+
+def test_highlights_follow_the_backend_normalization():
+    body = "Keys are encrypted; the keyboard is not."
+    # Postgres ranks by stemmed lexemes: "encryption" matches "encrypted".
+    lexemes = {"encryption": ("encrypt",), "encrypted": ("encrypt",), "keys": ("key",)}
+
+    stemmed = highlight_spans(body, ["encryption"], normalize=lambda t: lexemes.get(t, (t,)))
+    exact = highlight_spans(body, ["key", "encryption"])
+
+    assert [body[start:end] for start, end in stemmed] == ["encrypted"]
+    assert exact == []  # BM25 matches whole tokens: neither "Keys" nor "keyboard"
+
+
+def test_search_scope_and_pagination(client, sqlite_db):
+    _seed_sections(sqlite_db)
+
+    response = client.get("/search", params={"q": "data", "scope": "regulation", "limit": 1})
+
+    payload = response.json()
+    assert payload["total"] == 1
+    assert [hit["kind"] for hit in payload["hits"]] == ["regulation"]
+
+
+def test_search_hybrid_reranks_with_cached_embeddings(client, sqlite_db, monkeypatch):
+    import numpy as np
+
+    import api.upload as upload
+    from processing.embeddings import EmbeddingCache
+
+    _seed_sections(sqlite_db)
+    calls = []
+
+    class FakeModel:
+        def encode(self, texts, **_):
+            calls.append(list(texts))
+            topical = [any(word in text for word in ("personal", "key")) for text in texts]
+            return np.array([[1.0, 0.0] if hit else [0.0, 1.0] for hit in topical])
+
+    monkeypatch.setattr(upload, "_embedding_model", FakeModel())
+    monkeypatch.setattr(upload, "_embedding_cache", EmbeddingCache())
+
+    response = client.get("/search", params={"q": "encrypt data key", "hybrid": True, "alpha": 0.1})
+
+    hits = response.json()["hits"]
+    assert hits[0]["external_id"] == "r-enc"
+    assert hits[0]["semantic_score"] == pytest.approx(1.0)
+    # Section vectors come from the cache on later queries; only the new query is encoded.
+    calls.clear()
+    client.get("/search", params={"q": "data key", "hybrid": True})
+    assert calls == [["data key"]]
+
+
+def test_list_endpoints_match_schema_serialization(client, sqlite_db):
+    from pydantic import TypeAdapter
+    from sqlalchemy.orm import selectinload
+
+    from api.schemas import GuidelineSection as GuidelineSchema, MatchDetail as MatchSchema
+
+    guideline_id, _ = _seed_matches(sqlite_db, [0.9, 0.4])
+    with sqlite_db() as session:
+        matches = (
+            session.query(Match)
+            .options(selectinload(Match.guideline), selectinload(Match.regulation))
+            .all()
+        )
+        expected_matches = TypeAdapter(list[MatchSchema]).dump_python(
+            [MatchSchema.model_validate(row) for row in matches], mode="json", by_alias=True
+        )
+        guidelines = session.query(CloudGuidelineSection).all()
+        expected_guidelines = TypeAdapter(list[GuidelineSchema]).dump_python(
+            [GuidelineSchema.model_validate(row) for row in guidelines], mode="json"
+        )
+
+    assert client.get(f"/guidelines/{guideline_id}/matches").json() == expected_matches
+    assert client.get("/guidelines").json() == expected_guidelines
+
+
+def test_update_match_returns_nested_sections(client, sqlite_db):
+    _, match_ids = _seed_matches(sqlite_db, [0.9])
+
+    response = client.patch(f"/matches/{match_ids[0]}", json={"status": "approved"})
+
+    assert response.status_code == 200
+    payload = response.json()
+    assert payload["status"] == "approved"
+    assert payload["guideline"]["external_id"] == "g-1"
+    assert payload["regulation"]["region"] == "EU"
+
+
+def test_metrics_endpoint_exposes_prometheus_text(client):
+    client.get("/healthz")
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    expected = 'echograph_http_request_duration_seconds_count{method="GET",route="/healthz"'
+    assert expected in response.text
+
+
+def test_document_excerpt_reads_from_the_corpus(client, tmp_path, monkeypatch):
+    monkeypatch.setenv("CORPUS_DIR", str(tmp_path / "corpus"))
+    from processing.corpus import default_corpus
+
+    default_corpus().add("upload/abc", "Keys rotate yearly. Data is encrypted at rest.")
+
+    response = client.get("/documents/upload/abc/excerpt", params={"start": 20, "end": 500})
+    assert response.status_code == 200
+    assert response.json() == {
+        "document_key": "upload/abc",
+        "length": 46,
+        "start": 20,
+        "end": 46,
+        "text": "Data is encrypted at rest.",
+    }
+    assert client.get("/documents/missing/excerpt").status_code == 404
+
+
+def test_review_queue_claims_renews_and_releases(client, sqlite_db):
+    _, match_ids = _seed_matches(sqlite_db, [0.9, 0.55, 0.2])
+
+    alice = client.post("/review/claim", json={"reviewer": "alice", "limit": 2}).json()
+    bob = client.post("/review/claim", json={"reviewer": "bob", "limit": 2}).json()
+
+    assert [match["id"] for match in alice["matches"]] == [match_ids[1], match_ids[2]]
+    assert alice["matches"][0]["claimed_by"] == "alice"
+    assert alice["matches"][0]["regulation"]["external_id"] == "r-1"
+    assert [match["id"] for match in bob["matches"]] == [match_ids[0]]
+
+    conflict = client.patch(
+        f"/matches/{match_ids[1]}", json={"status": "approved", "reviewer": "bob"}
+    )
+    assert conflict.status_code == 409
+    anonymous = client.patch(f"/matches/{match_ids[1]}", json={"status": "approved"})
+    assert anonymous.status_code == 409
+    decided = client.patch(
+        f"/matches/{match_ids[1]}", json={"status": "approved", "reviewer": "alice"}
+    ).json()
+    assert decided["claimed_by"] is None
+
+    renewed = client.post(
+        "/review/renew", json={"reviewer": "alice", "match_ids": match_ids}
+    ).json()
+    assert [match["id"] for match in renewed["matches"]] == [match_ids[2]]
+    assert renewed["lease_expires_at"] >= alice["lease_expires_at"]
+    released = client.post(
+        "/review/release", json={"reviewer": "bob", "match_ids": match_ids}
+    ).json()
+    assert released == {"released": 1}
+    again = client.post("/review/claim", json={"reviewer": "carol"}).json()
+    assert [match["id"] for match in again["matches"]] == [match_ids[0]]
+
+
+def test_bulk_update_skips_matches_claimed_by_other_reviewers(client, sqlite_db):
+    _, match_ids = _seed_matches(sqlite_db, [0.9, 0.55, 0.2])
+    client.post("/review/claim", json={"reviewer": "alice", "limit": 1})
+
+    as_bob = client.post(
+        "/matches/bulk",
+        json={"match_ids": match_ids, "changes": {"status": "approved", "reviewer": "bob"}},
+    ).json()
+    assert as_bob["match_ids"] == [match_ids[0], match_ids[2]]
+    assert as_bob["skipped_ids"] == [match_ids[1]]
+
+    anonymous = client.post(
+        "/matches/bulk", json={"filter": {"min_score": 0.5}, "changes": {"status": "rejected"}}
+    ).json()
+    assert anonymous["match_ids"] == [match_ids[0]] and anonymous["skipped_ids"] == [match_ids[1]]
+    as_alice = client.post(
+        "/matches/bulk",
+        json={"match_ids": [match_ids[1]], "changes": {"status": "approved", "reviewer": "alice"}},
+    ).json()
+    assert as_alice["match_ids"] == [match_ids[1]] and as_alice["skipped_ids"] == []
+    with sqlite_db() as session:
+        assert session.get(Match, match_ids[1]).claimed_by is None
+
+
+def test_reverse_lookup_and_coverage_follow_reviews(client, sqlite_db):
+    guideline_id, match_ids = _seed_matches(sqlite_db, [0.9, 0.4, 0.7])
+    with sqlite_db() as session:
+        session.add(
+            RegulationSection(
+                external_id="r-2",
+                title="Other",
+                body="Keep logs",
+                region="EU",
+                regulation_type="law",
+            )
+        )
+        session.commit()
+    assert client.post("/coverage/rebuild").json() == {"regulations": 2}
+    regulation_id = client.get(f"/guidelines/{guideline_id}/matches").json()[0]["regulation_id"]
+
+    client.patch(f"/matches/{match_ids[0]}", json={"status": "approved"})
+    client.post(
+        "/matches/bulk",
+        json={"match_ids": match_ids[1:], "changes": {"status": "rejected"}},
+    )
+
+    reverse = client.get(f"/regulations/{regulation_id}/matches").json()
+    assert [match["id"] for match in reverse] == [match_ids[0], match_ids[2], match_ids[1]]
+    assert reverse[0]["guideline"]["external_id"] == "g-1"
+    assert client.get(
+        f"/regulations/{regulation_id}/matches", params={"status": "approved"}
+    ).json()[0]["id"] == match_ids[0]
+    assert client.get(f"/regulations/{regulation_id}/coverage").json() == {
+        "regulation_id": regulation_id,
+        "region": "EU",
+        "regulation_type": "law",
+        "matches": 3,
+        "pending": 0,
+        "approved": 1,
+    }
+    (summary,) = client.get("/coverage", params={"region": "EU"}).json()
+    assert summary == {
+        "region": "EU",
+        "regulation_type": "law",
+        "regulations": 2,
+        "matched_regulations": 1,
+        "covered_regulations": 1,
+        "matches": 3,
+        "pending": 0,
+        "approved": 1,
+        "covered": 0.5,
+    }
+    client.post("/coverage/rebuild")
+    assert client.get("/coverage", params={"region": "EU"}).json() == [summary]
+    assert client.get("/coverage", params={"region": "US"}).json() == []
@@ -0,0 +1,40 @@
+import pytest
+
+from processing.corpus import CorpusError, CorpusStore
+
+TEXT = "".join(f"Paragraph {index}: données chiffrées, clés tournantes. " for index in range(400))
+
+
+def test_excerpts_decompress_only_overlapping_blocks(tmp_path):
+    store = CorpusStore(tmp_path, block_chars=1000)
+    document = store.add("doc", TEXT)
+
+    assert document.length == len(TEXT) and document.blocks == -(-len(TEXT) // 1000)
+    assert store.text("doc") == TEXT
+    reads = store.blocks_read
+    assert store.excerpt("doc", 1990, 2010) == TEXT[1990:2010]
+    assert store.blocks_read - reads == 2
+    assert store.excerpt("doc", 5000, 5001) == TEXT[5000]
+    assert store.excerpt("doc", -30) == TEXT[-30:]
+    assert store.excerpt("doc", 10, 5) == ""
+    assert store.excerpt("doc", len(TEXT) - 3, len(TEXT) + 50) == TEXT[-3:]
+    assert store.stats()["stored_bytes"] < len(TEXT.encode("utf-8"))
+    with pytest.raises(CorpusError):
+        store.excerpt("missing")
+
+
+def test_readers_see_documents_added_and_replaced_by_other_writers(tmp_path):
+    writer = CorpusStore(tmp_path, block_chars=1000)
+    writer.add("doc", TEXT)
+    reader = CorpusStore(tmp_path)
+    assert reader.excerpt("doc", 0, 12) == TEXT[:12]
+    blocks = reader.document("doc").blocks
+
+    assert writer.add("doc", TEXT) == writer.document("doc")  # unchanged text is not rewritten
+    writer.add("doc", "Revised text.")
+    writer.add("other", "")
+
+    assert reader.text("doc") == "Revised text."
+    assert reader.text("other") == "" and "other" in reader
+    assert reader.block_chars == 1000 and reader.stats()["documents"] == 2
+    assert CorpusStore(tmp_path).document("doc").first_block == blocks
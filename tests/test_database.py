@@ -0,0 +1,24 @@
+from api.database import PoolSettings, engine_options
+
+
+def test_engine_options_skip_pool_sizing_for_sqlite():
+    options = engine_options("sqlite+aiosqlite:///:memory:", PoolSettings())
+    assert "pool_size" not in options
+    assert options["pool_pre_ping"] is True
+
+
+def test_engine_options_apply_asyncpg_statement_cache():
+    settings = PoolSettings(pool_size=4, max_overflow=2, statement_cache_size=0, command_timeout=5)
+    options = engine_options("postgresql+asyncpg://user:pass@db/echograph", settings)
+    assert options["pool_size"] == 4
+    assert options["max_overflow"] == 2
+    assert options["connect_args"]["statement_cache_size"] == 0
+    assert options["connect_args"]["command_timeout"] == 5
+
+
+def test_pool_settings_from_env(monkeypatch):
+    monkeypatch.setenv("DATABASE_POOL_SIZE", "25")
+    monkeypatch.setenv("DATABASE_POOL_PRE_PING", "false")
+    settings = PoolSettings.from_env()
+    assert settings.pool_size == 25
+    assert settings.pool_pre_ping is False
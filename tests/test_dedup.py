@@ -0,0 +1,35 @@
+from processing.dedup import MinHasher, MinHashLSH, collapse_near_duplicates, estimated_jaccard
+
+NOTICE = (
+    "This document is confidential and is provided solely for the internal use of the customer "
+    "and may not be copied, distributed or disclosed to any third party without written consent."
+)
+
+
+def test_signature_estimates_jaccard_similarity():
+    hasher = MinHasher()
+    near = estimated_jaccard(hasher.signature(NOTICE), hasher.signature(NOTICE + " Inc."))
+    far = estimated_jaccard(
+        hasher.signature(NOTICE),
+        hasher.signature("Providers shall encrypt customer data at rest using managed keys."),
+    )
+
+    assert estimated_jaccard(hasher.signature(NOTICE), hasher.signature(NOTICE.upper())) == 1.0
+    assert near > 0.85
+    assert far < 0.2
+
+
+def test_lsh_returns_only_keys_above_threshold():
+    hasher = MinHasher()
+    index = MinHashLSH(threshold=0.85)
+    index.add("notice", hasher.signature(NOTICE))
+
+    assert index.query(hasher.signature(NOTICE + " Inc.")) == ["notice"]
+    assert index.query(hasher.signature("Audit logs are retained for twelve months.")) == []
+
+
+def test_collapse_points_duplicates_at_first_occurrence():
+    texts = [NOTICE, "Audit logs are retained for twelve months.", NOTICE + " Inc.", NOTICE]
+
+    assert collapse_near_duplicates(texts) == [0, 1, 0, 0]
+    assert collapse_near_duplicates(texts, threshold=1.0) == [0, 1, 2, 0]
@@ -0,0 +1,100 @@
+import threading
+import time
+
+import pytest
+
+from ingestion.download import DownloadError, FetchResult, MirrorFetcher, MirrorStats
+
+SOURCE = "https://vendor.example/guide.pdf"
+MIRROR = "https://mirror.example/guide.pdf"
+
+
+class FakeMirrors:
+    def __init__(self, bodies, *, slow=(), failures=None):
+        self.bodies = bodies
+        self.slow = set(slow)
+        self.failures = dict(failures or {})
+        self.release = threading.Event()
+        self.requests = []
+
+    def __call__(self, url, destination, *, etag=None, last_modified=None, timeout=60.0):
+        self.requests.append(url)
+        if url in self.slow:
+            self.release.wait(5)
+        if self.failures.get(url, 0) > 0:
+            self.failures[url] -= 1
+            raise OSError(f"{url} unreachable")
+        destination.write_text(self.bodies[url], encoding="utf-8")
+        return FetchResult(url, destination, f"etag-{url}", None)
+
+
+def test_slow_source_is_hedged_with_the_next_mirror(tmp_path):
+    mirrors = FakeMirrors({SOURCE: "primary", MIRROR: "mirror"}, slow=[SOURCE])
+    fetcher = MirrorFetcher({SOURCE: [MIRROR]}, hedge_after=0.05, fetch=mirrors)
+
+    result = fetcher.fetch(SOURCE, tmp_path / "guide.pdf")
+    mirrors.release.set()
+
+    assert result.url == SOURCE and result.mirror == MIRROR
+    assert result.path.read_text(encoding="utf-8") == "mirror"
+    assert mirrors.requests == [SOURCE, MIRROR]
+    # The measured latencies put the mirror first next time.
+    assert fetcher.candidates(SOURCE) == [MIRROR, SOURCE]
+    assert fetcher.stats.latencies[SOURCE] > fetcher.stats.latencies[MIRROR]
+
+
+def test_failed_hedge_starts_the_next_mirror_at_once(tmp_path):
+    third = "https://third.example/guide.pdf"
+    mirrors = FakeMirrors(
+        {SOURCE: "primary", MIRROR: "mirror", third: "third"},
+        slow=[SOURCE],
+        failures={MIRROR: 1},
+    )
+    fetcher = MirrorFetcher({SOURCE: [MIRROR, third]}, hedge_after=0.3, fetch=mirrors)
+
+    began = time.monotonic()
+    result = fetcher.fetch(SOURCE, tmp_path / "guide.pdf")
+    elapsed = time.monotonic() - began
+    mirrors.release.set()
+
+    assert result.mirror == third and mirrors.requests == [SOURCE, MIRROR, third]
+    # The hedge failed fast; the third mirror did not wait for another hedge_after.
+    assert elapsed < 0.5
+
+
+def test_failed_rounds_are_retried_with_exponential_backoff(tmp_path):
+    slept = []
+    mirrors = FakeMirrors(
+        {SOURCE: "primary", MIRROR: "mirror"}, failures={SOURCE: 3, MIRROR: 2}
+    )
+    fetcher = MirrorFetcher(
+        {SOURCE: [MIRROR]}, hedge_after=5.0, backoff_seconds=0.5, fetch=mirrors, sleep=slept.append
+    )
+
+    result = fetcher.fetch(SOURCE, tmp_path / "guide.pdf")
+
+    assert slept == [0.5, 1.0]
+    assert result.path.read_text(encoding="utf-8") == "mirror"
+    assert fetcher.stats.failures == {SOURCE: 3, MIRROR: 0}
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["guide.pdf"]
+
+    with pytest.raises(DownloadError, match="after 3 attempts"):
+        MirrorFetcher(
+            hedge_after=5.0, fetch=FakeMirrors({}, failures={SOURCE: 9}), sleep=slept.append
+        ).fetch(SOURCE, tmp_path / "other.pdf")
+
+
+def test_mirror_order_prefers_fast_and_penalizes_failures():
+    stats = MirrorStats.from_snapshot(
+        {
+            "https://a/": {"latency_seconds": 1.0, "failures": 2},
+            "https://b/": {"latency_seconds": 3.0, "failures": 0},
+        }
+    )
+    assert stats.order(["https://a/", "https://b/", "https://c/"], unknown=3.5) == [
+        "https://b/",
+        "https://c/",
+        "https://a/",
+    ]
+    stats.record("https://a/", 1.0)
+    assert stats.order(["https://b/", "https://a/"], unknown=5.0) == ["https://a/", "https://b/"]
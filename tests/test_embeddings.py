@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+
+from processing.embeddings import encode_windows, split_windows
+
+TEXT = " ".join(f"w{index}" for index in range(10))
+
+
+def test_split_windows_covers_text_with_overlap():
+    spans = split_windows(TEXT, window_words=4, overlap=1)
+
+    assert [TEXT[start:end] for start, end in spans] == [
+        "w0 w1 w2 w3",
+        "w3 w4 w5 w6",
+        "w6 w7 w8 w9",
+    ]
+    assert split_windows("  short text ", window_words=4) == [(2, 12)]
+
+
+def test_encode_windows_pools_in_one_batch():
+    calls = []
+
+    def encode(texts):
+        calls.append(texts)
+        return np.array([[1.0, 0.0] if "w0" in text else [0.0, 2.0] for text in texts])
+
+    mean = encode_windows(encode, [TEXT, "w0"], window_words=4, overlap=1)
+    peak = encode_windows(encode, [TEXT], window_words=4, overlap=1, pooling="max")
+
+    assert len(calls[0]) == 4
+    assert mean.windows(0) == slice(0, 3) and mean.windows(1) == slice(3, 4)
+    assert mean.vectors[0] == pytest.approx(np.array([1.0, 2.0]) / np.sqrt(5))
+    assert mean.vectors[1] == pytest.approx([1.0, 0.0])
+    assert peak.vectors[0] == pytest.approx(np.array([1.0, 1.0]) / np.sqrt(2))
@@ -0,0 +1,134 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from ingestion import extract
+from ingestion.cache import ExtractionCache
+from ingestion.extract import (
+    ExtractionError,
+    batch_extract_documents,
+    extract_document,
+    extract_pdf_document,
+    garbled_ratio,
+    page_is_degraded,
+)
+
+
+def _write_pdf(path: Path, pages: list[str]) -> Path:
+    """Write a minimal PDF with one line of Helvetica text per page ("" for blank pages)."""
+
+    count = len(pages)
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids ["
+        + b" ".join(f"{4 + 2 * index} 0 R".encode() for index in range(count))
+        + f"] /Count {count} >>".encode(),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    for index, text in enumerate(pages):
+        stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET".encode() if text else b""
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {5 + 2 * index} 0 R >>".encode()
+        )
+        objects.append(
+            f"<< /Length {len(stream)} >>\nstream\n".encode() + stream + b"\nendstream"
+        )
+
+    body = b"%PDF-1.4\n"
+    offsets = []
+    for number, content in enumerate(objects, start=1):
+        offsets.append(len(body))
+        body += f"{number} 0 obj\n".encode() + content + b"\nendobj\n"
+    xref = len(body)
+    body += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    body += b"".join(f"{offset:010d} 00000 n \n".encode() for offset in offsets)
+    body += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\n".encode()
+    body += f"startxref\n{xref}\n%%EOF\n".encode()
+    path.write_bytes(body)
+    return path
+
+
+def test_garbled_ratio_flags_unmapped_glyphs():
+    assert garbled_ratio("Plain regulation text.") == 0.0
+    assert garbled_ratio("(cid:12)(cid:7) ok") > 0.5
+    assert page_is_degraded("   ")
+    assert page_is_degraded("\ufffd\ufffd\ufffda")
+    assert not page_is_degraded("Data at rest is encrypted.")
+
+
+def test_pdf_uses_fast_backend_and_records_page_stats(tmp_path):
+    path = _write_pdf(tmp_path / "doc.pdf", ["Access is logged.", "Keys rotate yearly."])
+
+    extraction = extract_pdf_document(path)
+
+    assert "Access is logged." in extraction.text and "Keys rotate yearly." in extraction.text
+    assert extraction.metadata["page_backends"] == ["pypdfium2", "pypdfium2"]
+    assert set(extraction.metadata["backends"]) == {"pypdfium2"}
+    assert extraction.metadata["backends"]["pypdfium2"]["pages"] == 2
+    assert extraction.metadata["backends"]["pypdfium2"]["pages_per_second"] > 0
+
+
+def test_pdf_falls_back_for_degraded_pages_only(tmp_path, monkeypatch):
+    path = _write_pdf(tmp_path / "doc.pdf", ["Access is logged.", "Keys rotate yearly.", ""])
+    fast = extract.PDF_BACKENDS["pypdfium2"]
+    requested = []
+
+    def garbled_second_page(path, pages=None):
+        texts = fast(path, pages)
+        texts[1] = "(cid:3)(cid:4)(cid:5)"
+        return texts
+
+    def plumber(path, pages=None):
+        requested.append(pages)
+        return extract._pdfplumber_pages(path, pages)
+
+    monkeypatch.setitem(extract.PDF_BACKENDS, "pypdfium2", garbled_second_page)
+    monkeypatch.setitem(extract.PDF_BACKENDS, "pdfplumber", plumber)
+
+    extraction = extract_document(path)
+
+    assert requested == [[1, 2]]
+    assert "Keys rotate yearly." in extraction.text and "cid:" not in extraction.text
+    # The blank page stays blank, so the fast backend's output is kept for it.
+    assert extraction.metadata["page_backends"] == ["pypdfium2", "pdfplumber", "pypdfium2"]
+    assert extraction.metadata["backends"]["pdfplumber"]["pages"] == 2
+
+
+def test_pdf_raises_when_no_backend_can_read(tmp_path):
+    path = tmp_path / "broken.pdf"
+    path.write_bytes(b"not a pdf")
+
+    with pytest.raises(ExtractionError):
+        extract_pdf_document(path)
+
+
+def test_cache_serves_identical_content_and_evicts(tmp_path, monkeypatch):
+    cache = ExtractionCache(tmp_path / "cache")
+    first = _write_pdf(tmp_path / "a.pdf", ["Access is logged.", "Keys rotate yearly."])
+    copy = tmp_path / "b.pdf"
+    copy.write_bytes(first.read_bytes())
+
+    fresh = extract_document(first, cache=cache)
+    calls = []
+    monkeypatch.setitem(extract.PDF_BACKENDS, "pypdfium2", lambda *args: calls.append(args))
+    cached = batch_extract_documents([copy], cache=cache)[copy]
+
+    assert calls == []
+    assert cached.text == fresh.text and cached.pages == fresh.pages
+    assert cached.metadata["cached"] is True
+    assert cached.metadata["page_backends"] == ["pypdfium2", "pypdfium2"]
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+    small = ExtractionCache(tmp_path / "small")
+    for index in range(3):
+        key = small.key(first, f"v{index}")
+        small.put(key, {"pages": [f"page {index}"], "text": None, "metadata": {}})
+        os.utime(small._entry(key), (index, index))
+        if index == 0:
+            small.max_bytes = small.stats()["bytes"] * 2  # room for two entries
+
+    assert small.stats()["evictions"] == 1
+    assert small.get(small.key(first, "v0")) is None
+    assert small.get(small.key(first, "v2")) == {"pages": ["page 2"], "text": None, "metadata": {}}
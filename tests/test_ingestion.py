@@ -3,6 +3,7 @@ from pathlib import Path
 import pandas as pd
 
 from ingestion.config import IngestionConfig
+from ingestion.extract import Extraction
 from ingestion.pipeline import IngestionPipeline
 
 
@@ -10,14 +11,14 @@ def test_persist_creates_jsonl(tmp_path: Path, monkeypatch):
     source_path = tmp_path / "doc.txt"
     source_path.write_text("hello world\nsecond line", encoding="utf-8")
 
-    def fake_download_all(urls, output_dir):
+    def fake_download_all(urls, output_dir, fetcher=None):
         return [source_path]
 
-    def fake_batch_extract(paths):
-        return {source_path: "hello world\nsecond line"}
+    def fake_extract_document(path, cache=None):
+        return Extraction("hello world\nsecond line", {"extractor": "fake"})
 
     monkeypatch.setattr("ingestion.pipeline.download_all", fake_download_all)
-    monkeypatch.setattr("ingestion.pipeline.batch_extract", fake_batch_extract)
+    monkeypatch.setattr("ingestion.pipeline.extract_document", fake_extract_document)
 
     config = IngestionConfig(sources=["http://example.com/doc.txt"], output_dir=tmp_path, metadata_dir=tmp_path)
     pipeline = IngestionPipeline(config)
@@ -27,3 +28,7 @@ def test_persist_creates_jsonl(tmp_path: Path, monkeypatch):
     df = pd.read_json(files[0], lines=True)
     assert len(df) == 2
     assert set(df.columns) == {"text", "source"}
+    (document,) = pipeline.store.documents(source="http://example.com/doc.txt")
+    assert document.status == "ok" and document.num_characters == 23
+    assert document.extraction == {"extractor": "fake"}
+    assert pipeline.store.runs()[0].run_id == document.run_id
@@ -1,7 +1,7 @@
 import numpy as np
 from qdrant_client.http.models import ScoredPoint
 
-from processing.matching import MatchResult, RelationshipMatcher
+from processing.matching import MatchResult, RelationshipMatcher, tiled_top_k
 
 
 class DummyClient:
@@ -45,3 +45,53 @@ def test_relationship_matcher_builds_results():
             confidence=0.8,
         )
     ]
+
+
+def test_filtered_match_only_returns_requested_region():
+    from qdrant_client import QdrantClient
+    from qdrant_client.http.models import Batch, Distance, VectorParams
+
+    from processing.matching import payload_filter
+
+    client = QdrantClient(location=":memory:")
+    client.create_collection("regs", vectors_config=VectorParams(size=2, distance=Distance.COSINE))
+    client.upsert(
+        "regs",
+        points=Batch(
+            ids=[1, 2, 3],
+            vectors=[[1.0, 0.0], [0.9, 0.1], [0.0, 1.0]],
+            payloads=[
+                {"id": "us-law", "region": "US", "regulation_type": "law"},
+                {"id": "eu-law", "region": "EU", "regulation_type": "law"},
+                {"id": "eu-standard", "region": "EU", "regulation_type": "standard"},
+            ],
+        ),
+    )
+    matcher = RelationshipMatcher(client=client, collection_name="regs")
+
+    results = matcher.match(
+        [{"id": "g1"}],
+        embedding_lookup=lambda _: [1.0, 0.0],
+        rationale_fn=RelationshipMatcher.summarize_rationale,
+        filters=payload_filter(region="EU", regulation_type=["law", "standard"], language=None),
+    )
+
+    assert [result.regulation_id for result in results] == ["eu-law", "eu-standard"]
+    assert payload_filter(region=None) is None
+
+
+def test_tiled_top_k_matches_a_full_sort_from_any_start_row():
+    rng = np.random.default_rng(7)
+    queries = rng.standard_normal((23, 8)).astype(np.float32)
+    keys = rng.standard_normal((50, 8)).astype(np.float32)
+    expected = np.argsort(-(queries @ keys.T), axis=1)[:, :4]
+
+    for workers in (1, 3):
+        blocks = list(
+            tiled_top_k(queries, keys, 4, start_row=5, tile_rows=6, tile_cols=7, workers=workers)
+        )
+        assert [start for start, _, _ in blocks] == [5, 11, 17]
+        indices = np.concatenate([block[1] for block in blocks])
+        scores = np.concatenate([block[2] for block in blocks])
+        np.testing.assert_array_equal(indices, expected[5:])
+        assert np.all(np.diff(scores, axis=1) <= 0)
@@ -0,0 +1,53 @@
+import json
+
+from ingestion.metadata import DocumentRecord, MetadataStore, RunRecord
+
+
+def test_documents_are_queried_by_source_and_date(tmp_path):
+    store = MetadataStore(tmp_path / "ingestion.db")
+    store.record_documents(
+        DocumentRecord(
+            source=f"https://example.com/{name}",
+            source_path=f"data/raw/{name}",
+            ingested_at=f"2026-10-{day:02d}T08:00:00",
+            sha256=name * 4,
+            status=status,
+            extraction={"pages": day},
+        )
+        for name, day, status in [("a.pdf", 1, "ok"), ("b.pdf", 5, "failed"), ("a.pdf", 9, "ok")]
+    )
+    store.record_run(RunRecord(run_id="r1", started_at="2026-10-09T08:00:00", status="ok"))
+
+    history = store.documents(source="https://example.com/a.pdf")
+    assert [document.ingested_at[:10] for document in history] == ["2026-10-09", "2026-10-01"]
+    assert history[0].extraction == {"pages": 9}
+    recent = store.documents(since="2026-10-05", until="2026-10-09")
+    assert [document.source_path for document in recent] == ["data/raw/b.pdf"]
+    assert [document.status for document in store.documents(status="failed")] == ["failed"]
+    assert [run.run_id for run in store.runs(since="2026-10-01")] == ["r1"]
+    assert store.runs(since="2026-10-10") == []
+    store.update_mirrors({"https://mirror.example/a.pdf": {"latency_seconds": 1.5, "failures": 1}})
+    assert store.mirror_stats()["https://mirror.example/a.pdf"]["failures"] == 1
+
+
+def test_import_json_files_is_idempotent(tmp_path):
+    metadata_dir = tmp_path / "metadata"
+    metadata_dir.mkdir()
+    for name in ("one", "two"):
+        (metadata_dir / f"{name}.json").write_text(
+            json.dumps(
+                {
+                    "source_path": f"data/raw/{name}.pdf",
+                    "ingested_at": "2026-01-02T03:04:05",
+                    "num_characters": 42,
+                }
+            ),
+            encoding="utf-8",
+        )
+    (metadata_dir / "broken.json").write_text("{", encoding="utf-8")
+    store = MetadataStore(tmp_path / "ingestion.db")
+
+    assert store.import_json_files(metadata_dir) == 2
+    assert store.import_json_files(metadata_dir) == 0
+    (document,) = store.documents(source="data/raw/one.pdf")
+    assert document.num_characters == 42 and document.status == "ok"
@@ -0,0 +1,46 @@
+import json
+
+from ingestion.cli import write_metrics_report
+from processing.metrics import MetricsRegistry
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = MetricsRegistry()
+    histogram = registry.histogram("stage_seconds", "Stage timings.", ("stage",), buckets=(0.1, 1))
+    histogram.observe(0.05, stage="extract")
+    histogram.observe(0.5, stage="extract")
+    histogram.observe(5, stage="extract")
+
+    text = registry.render_prometheus()
+
+    assert '# TYPE stage_seconds histogram' in text
+    assert 'stage_seconds_bucket{stage="extract",le="0.1"} 1' in text
+    assert 'stage_seconds_bucket{stage="extract",le="1"} 2' in text
+    assert 'stage_seconds_bucket{stage="extract",le="+Inf"} 3' in text
+    assert 'stage_seconds_count{stage="extract"} 3' in text
+
+
+def test_counter_snapshot_and_registration_is_idempotent():
+    registry = MetricsRegistry()
+    counter = registry.counter("documents_total", "Documents.", ("source",))
+    assert registry.counter("documents_total", "Documents.", ("source",)) is counter
+    counter.inc(source="upload")
+    counter.inc(2, source="upload")
+
+    snapshot = registry.snapshot()
+
+    assert snapshot["counters"]["documents_total"] == [{"labels": {"source": "upload"}, "value": 3}]
+
+
+def test_stage_timer_feeds_cli_report(tmp_path):
+    from processing.metrics import REGISTRY, stage_timer
+
+    with stage_timer("segment"):
+        pass
+    report_path = tmp_path / "report.json"
+    write_metrics_report(report_path)
+
+    report = json.loads(report_path.read_text(encoding="utf-8"))
+    stages = report["histograms"]["echograph_stage_duration_seconds"]
+    assert any(series["labels"] == {"stage": "segment"} for series in stages)
+    REGISTRY.reset()
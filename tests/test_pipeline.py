@@ -0,0 +1,128 @@
+import asyncio
+import time
+import zlib
+
+import numpy as np
+import pytest
+from qdrant_client import AsyncQdrantClient
+
+from processing.embeddings import AsyncEmbeddingService, EmbeddingConfig
+from processing.matching import AsyncRelationshipMatcher
+from processing.pipeline import TextBatch, run_pipeline
+
+pytestmark = pytest.mark.filterwarnings("ignore:Payload indexes have no effect")
+
+
+class HashingModel:
+    def get_sentence_embedding_dimension(self):
+        return 32
+
+    def encode(self, texts, **_):
+        vectors = np.zeros((len(texts), 32), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for token in text.lower().split():
+                vectors[row, zlib.crc32(token.encode()) % 32] += 1.0
+        return vectors
+
+
+REGULATIONS = ["encrypt customer data at rest", "retain audit logs for a year"]
+
+
+def _batches(texts, size):
+    return [
+        TextBatch(
+            texts=texts[start : start + size],
+            metadata=[{"title": text} for text in texts[start : start + size]],
+            ids=list(range(start, min(start + size, len(texts)))),
+        )
+        for start in range(0, len(texts), size)
+    ]
+
+
+def test_pipeline_uploads_and_matches_with_in_memory_qdrant():
+    async def scenario():
+        client = AsyncQdrantClient(location=":memory:")
+        model = HashingModel()
+        regulations = AsyncEmbeddingService(
+            EmbeddingConfig(collection_name="regulations"), model=model, client=client
+        )
+        await regulations.ensure_collection()
+        metadata = [{"id": f"r{index}", "title": text} for index, text in enumerate(REGULATIONS)]
+        await regulations.upsert(REGULATIONS, metadata, ids=[0, 1])
+        guidelines = AsyncEmbeddingService(
+            EmbeddingConfig(collection_name="guidelines"), model=model, client=client
+        )
+        await guidelines.ensure_collection()
+        matcher = AsyncRelationshipMatcher(client=client, collection_name="regulations")
+        texts = ["data at rest must be encrypted", "audit logs retained", "keys rotate yearly"]
+
+        results = await run_pipeline(
+            _batches(texts, 2), service=guidelines, matcher=matcher, limit=1, queue_size=1
+        )
+        stored = await client.count("guidelines")
+        return results, stored.count
+
+    results, stored = asyncio.run(scenario())
+
+    assert stored == 3
+    assert [len(result.batch.texts) for result in results] == [2, 1]
+    first, second = results[0].matches
+    assert (first.guideline_id, first.regulation_id) == ("0", "r0")
+    assert (second.guideline_id, second.regulation_id) == ("1", "r1")
+
+
+class RecordingService:
+    def __init__(self, events):
+        self.events = events
+
+    async def embed(self, texts):
+        self.events.append(f"encode {texts[0]}")
+        return np.ones((len(texts), 2))
+
+    async def upsert_vectors(self, vectors, metadata, *, ids):
+        await asyncio.sleep(0.01)
+        self.events.append(f"upload {ids[0]}")
+
+
+def test_pipeline_overlaps_stages_with_bounded_queues():
+    events = []
+    batches = [TextBatch([str(index)], [{}], [index]) for index in range(4)]
+
+    asyncio.run(run_pipeline(batches, service=RecordingService(events), queue_size=1))
+
+    assert events.index("encode 1") < events.index("upload 0")
+    # With one slot per queue, encoding can run at most two batches ahead of uploads.
+    assert events.index("upload 0") < events.index("encode 3")
+
+
+def test_pipeline_propagates_stage_errors():
+    class FailingService(RecordingService):
+        async def upsert_vectors(self, vectors, metadata, *, ids):
+            raise RuntimeError("qdrant down")
+
+    batches = [TextBatch([str(index)], [{}], [index]) for index in range(5)]
+    with pytest.raises(RuntimeError, match="qdrant down"):
+        asyncio.run(run_pipeline(batches, service=FailingService([]), queue_size=1))
+
+
+def test_pipeline_reranks_off_the_event_loop():
+    events = []
+
+    class SlowRerankMatcher:
+        async def search_many(self, vectors, *, limit, filters):
+            return [[] for _ in vectors]
+
+        def results_for(self, chunks, points, *, rationale_fn):
+            events.append(f"rerank {chunks[0]['id']}")
+            time.sleep(0.1)  # a blocking cross-encoder forward pass
+            return []
+
+    batches = [TextBatch([str(index)], [{}], [index]) for index in range(3)]
+    asyncio.run(
+        run_pipeline(
+            batches, service=RecordingService(events), matcher=SlowRerankMatcher(), queue_size=1
+        )
+    )
+
+    # Uploads keep going while the first batch is being reranked.
+    assert events.index("rerank 0") < events.index("upload 2") < events.index("rerank 1")
@@ -0,0 +1,190 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import NullPool
+
+from api.coverage import rebuild_coverage
+from api.models import (
+    Base,
+    CloudGuidelineSection,
+    CoverageSummary,
+    Match,
+    RegulationCoverage,
+    RegulationSection,
+)
+from api.rematch import RematchConfig, rematch_all
+
+VOCABULARY = ("alpha", "beta", "gamma")
+
+
+def encode(texts):
+    vectors = np.zeros((len(texts), len(VOCABULARY)), dtype=np.float32)
+    for row, text in enumerate(texts):
+        for token in text.split():
+            vectors[row, VOCABULARY.index(token)] += 1.0
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+@pytest.fixture
+def database(tmp_path):
+    path = tmp_path / "rematch.db"
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        for index, body in enumerate(["alpha", "beta", "gamma gamma alpha"], start=1):
+            session.add(
+                CloudGuidelineSection(
+                    id=index, external_id=f"G{index}", title=f"G{index}", body=body
+                )
+            )
+        for index, body in enumerate(VOCABULARY, start=1):
+            session.add(
+                RegulationSection(
+                    id=index,
+                    external_id=f"R{index}",
+                    title=f"R{index}",
+                    body=body,
+                    region="EU",
+                    regulation_type="law",
+                )
+            )
+        for guideline_id, regulation_id, status in [
+            (1, 1, "pending"),
+            (1, 2, "approved"),
+            (2, 2, "approved"),
+            (3, 2, "pending"),
+        ]:
+            session.add(
+                Match(
+                    guideline_id=guideline_id,
+                    regulation_id=regulation_id,
+                    score=0.1,
+                    confidence=0.1,
+                    rationale="old",
+                    status=status,
+                )
+            )
+        session.commit()
+    yield path, engine
+    engine.dispose()
+
+
+def _run(path, coroutine):
+    async def run():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{path}", poolclass=NullPool)
+        factory = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+        try:
+            return await coroutine(factory)
+        finally:
+            await engine.dispose()
+
+    return asyncio.run(run())
+
+
+async def _rebuild(factory):
+    async with factory() as session:
+        await rebuild_coverage(session)
+        await session.commit()
+
+
+def _state(engine):
+    with Session(engine) as session:
+        matches = sorted(
+            (match.guideline_id, match.regulation_id, match.status, round(match.score, 3))
+            for match in session.scalars(select(Match))
+        )
+        coverage = sorted(
+            (row.regulation_id, row.matches, row.pending, row.approved)
+            for row in session.scalars(select(RegulationCoverage))
+        )
+        summary = [
+            (row.regulations, row.matched_regulations, row.covered_regulations, row.matches)
+            for row in session.scalars(select(CoverageSummary))
+        ]
+    return matches, coverage, summary
+
+
+def test_rematch_replaces_pending_matches_and_keeps_reviewed_ones(database, tmp_path):
+    path, engine = database
+    _run(path, _rebuild)
+    config = RematchConfig(top_k=1, threshold=0.5, checkpoint_dir=tmp_path / "checkpoint")
+    seen = []
+
+    report = _run(
+        path,
+        lambda factory: rematch_all(
+            factory, config, encode=encode, progress=lambda *args: seen.append(args)
+        ),
+    )
+
+    assert (report.created, report.updated, report.removed, report.kept) == (1, 1, 1, 1)
+    assert seen == [(3, 3)]
+    matches, coverage, summary = _state(engine)
+    assert matches == [
+        (1, 1, "pending", 1.0),
+        (1, 2, "approved", 0.1),
+        (2, 2, "approved", 0.1),
+        (3, 3, "pending", 0.894),
+    ]
+    with Session(engine) as session:
+        created = session.scalars(select(Match).where(Match.regulation_id == 3)).one()
+        assert created.guideline_excerpt == "gamma gamma alpha" and "G3" in created.rationale
+    # The incrementally maintained counters agree with a full rebuild.
+    _run(path, _rebuild)
+    assert _state(engine) == (matches, coverage, summary)
+    assert not any((tmp_path / "checkpoint").iterdir())
+
+
+def test_rematch_leaves_matches_under_a_live_review_claim(database, tmp_path):
+    path, engine = database
+    with Session(engine) as session:
+        for match in session.scalars(select(Match).where(Match.status == "pending")):
+            match.claimed_by = "alice"
+            match.claim_expires_at = datetime.utcnow() + timedelta(minutes=15)
+        session.commit()
+    _run(path, _rebuild)
+    config = RematchConfig(top_k=1, threshold=0.5, checkpoint_dir=tmp_path / "checkpoint")
+
+    report = _run(path, lambda factory: rematch_all(factory, config, encode=encode))
+
+    assert (report.created, report.updated, report.removed, report.kept) == (1, 0, 0, 2)
+    matches = _state(engine)[0]
+    assert (1, 1, "pending", 0.1) in matches and (3, 2, "pending", 0.1) in matches
+    assert (3, 3, "pending", 0.894) in matches
+
+
+def test_interrupted_rematch_resumes_from_the_checkpoint(database, tmp_path):
+    path, engine = database
+    _run(path, _rebuild)
+    config = RematchConfig(
+        top_k=1, threshold=0.5, checkpoint_dir=tmp_path / "checkpoint", tile_rows=1, workers=2
+    )
+    calls = []
+
+    def counting_encode(texts):
+        calls.append(texts)
+        return encode(texts)
+
+    def interrupt(done, total):
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        _run(
+            path,
+            lambda factory: rematch_all(
+                factory, config, encode=counting_encode, progress=interrupt
+            ),
+        )
+    assert _state(engine)[0][0] == (1, 1, "pending", 1.0)
+
+    report = _run(path, lambda factory: rematch_all(factory, config, encode=counting_encode))
+
+    assert report.resumed_from == 1 and report.created == 1 and report.removed == 1
+    assert len(calls) == 2  # vectors were reused from the checkpoint
+    matches = _state(engine)[0]
+    assert (3, 3, "pending", 0.894) in matches and (3, 2, "pending", 0.1) not in matches
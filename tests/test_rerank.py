@@ -0,0 +1,68 @@
+from types import SimpleNamespace
+
+import pytest
+
+from processing.matching import RelationshipMatcher
+from processing.rerank import CrossEncoderReranker, RerankConfig
+
+
+class OverlapModel:
+    """Cross-encoder stand-in whose logit is the number of shared words minus two."""
+
+    def __init__(self):
+        self.batches: list[list[tuple[str, str]]] = []
+
+    def predict(self, pairs, **_):
+        self.batches.append(list(pairs))
+        return [len(set(left.split()) & set(right.split())) - 2.0 for left, right in pairs]
+
+
+def test_scores_in_batches_within_budget_and_caches_pairs():
+    model = OverlapModel()
+    reranker = CrossEncoderReranker(RerankConfig(batch_size=2, candidate_budget=3), model=model)
+    pairs = [("a b c", "a b c"), ("a b", "c d"), ("a", "a"), ("x", "y"), ("a b c", "a b c")]
+
+    first = reranker.score(pairs)
+
+    assert [len(batch) for batch in model.batches] == [2, 1]
+    assert first[0] == first[4] == pytest.approx(0.731, abs=1e-3)
+    assert first[2] == pytest.approx(0.269, abs=1e-3)
+    assert first[3] is None
+
+    model.batches.clear()
+    second = reranker.score(pairs[:3])
+    assert model.batches == []
+    assert second == first[:3]
+
+
+def test_latency_cap_leaves_pairs_unscored():
+    model = OverlapModel()
+    reranker = CrossEncoderReranker(RerankConfig(max_latency_seconds=0), model=model)
+
+    assert reranker.score([("a", "a")]) == [None]
+    assert model.batches == []
+
+
+def test_matcher_uses_reranked_probability_as_confidence():
+    points = [
+        SimpleNamespace(
+            score=0.9, payload={"id": "r1", "title": "R1", "text": "encrypt data at rest"}
+        ),
+        SimpleNamespace(score=0.8, payload={"id": "r2", "title": "R2"}),
+    ]
+    client = SimpleNamespace(search=lambda **_: points)
+    matcher = RelationshipMatcher(
+        client=client,
+        collection_name="test",
+        reranker=CrossEncoderReranker(model=OverlapModel()),
+    )
+
+    results = matcher.match(
+        [{"id": "g1", "title": "G1", "text": "encrypt data at rest"}],
+        embedding_lookup=lambda _: [0.0],
+        rationale_fn=RelationshipMatcher.summarize_rationale,
+    )
+
+    assert results[0].confidence == pytest.approx(0.881, abs=1e-3)
+    assert results[1].confidence == 0.5
+    assert [result.score for result in results] == [0.9, 0.8]
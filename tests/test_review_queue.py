@@ -0,0 +1,99 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import NullPool
+
+from api.models import Base, CloudGuidelineSection, Match, RegulationSection
+from api.review_queue import claim_matches, release_claims, renew_claims
+
+NOW = datetime(2026, 10, 19, 12, 0, 0)
+
+
+def _database(tmp_path, confidences):
+    path = tmp_path / "queue.db"
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        guideline = CloudGuidelineSection(external_id="g-1", title="G", body="Encrypt data")
+        regulation = RegulationSection(
+            external_id="r-1", title="R", body="Encrypt", region="EU", regulation_type="law"
+        )
+        session.add_all([guideline, regulation])
+        session.flush()
+        session.add_all(
+            Match(
+                guideline_id=guideline.id,
+                regulation_id=regulation.id,
+                score=confidence,
+                confidence=confidence,
+                rationale="overlap",
+            )
+            for confidence in confidences
+        )
+        session.commit()
+    engine.dispose()
+    return path
+
+
+def _run(path, *calls):
+    async def run():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{path}", poolclass=NullPool)
+        factory = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+
+        async def call(function, *args, **kwargs):
+            async with factory() as session:
+                return await function(session, *args, **kwargs)
+
+        results = await asyncio.gather(*(call(*args[:-1], **args[-1]) for args in calls))
+        await engine.dispose()
+        return results
+
+    return asyncio.run(run())
+
+
+def test_concurrent_claims_never_overlap_and_prefer_uncertain_matches(tmp_path):
+    path = _database(tmp_path, [0.95, 0.52, 0.3, 0.7, 0.45, 0.1, 0.6, 0.85])
+
+    claims = _run(
+        path,
+        *((claim_matches, f"reviewer-{index}", {"limit": 3, "now": NOW}) for index in range(4)),
+    )
+
+    claimed = [match_id for match_ids, _ in claims for match_id in match_ids]
+    assert len(claimed) == len(set(claimed)) == 8
+    engine = create_engine(f"sqlite:///{path}")
+    with Session(engine) as session:
+        matches = session.scalars(select(Match)).all()
+        assert all(match.claim_expires_at == NOW + timedelta(seconds=900) for match in matches)
+        confidence = {match.id: match.confidence for match in matches}
+    engine.dispose()
+    # Whichever claim ran first received the three matches closest to 0.5.
+    batches = [{confidence[match_id] for match_id in match_ids} for match_ids, _ in claims]
+    assert {0.52, 0.45, 0.6} in batches
+
+
+def test_leases_expire_renew_and_release(tmp_path):
+    path = _database(tmp_path, [0.5, 0.6, 0.9])
+    ((alice, _),) = _run(path, (claim_matches, "alice", {"limit": 2, "now": NOW}))
+    assert len(alice) == 2
+
+    later = NOW + timedelta(seconds=600)
+    ((renewed, expires_at),) = _run(
+        path, (renew_claims, "alice", alice[:1], {"lease_seconds": 900, "now": later})
+    )
+    assert renewed == alice[:1] and expires_at == later + timedelta(seconds=900)
+
+    # After the original lease ran out, the unrenewed match goes back to the queue.
+    expired = NOW + timedelta(seconds=1000)
+    ((bob, _),) = _run(path, (claim_matches, "bob", {"limit": 5, "now": expired}))
+    assert alice[1] in bob and alice[0] not in bob
+    ((stolen, _),) = _run(path, (renew_claims, "alice", alice[1:], {"now": expired}))
+    assert stolen == []
+
+    (released,) = _run(path, (release_claims, "bob", bob, {}))
+    assert released == len(bob)
+    ((carol, _),) = _run(path, (claim_matches, "carol", {"limit": 5, "now": expired}))
+    assert sorted(carol) == sorted(bob)
@@ -0,0 +1,162 @@
+import random
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+
+from ingestion import pipeline
+from ingestion.config import IngestionConfig
+from ingestion.download import FetchResult
+from ingestion.extract import Extraction
+from ingestion.scheduler import CronSchedule, HostRateLimiter, IngestionScheduler, RunLock
+
+START = datetime(2026, 10, 19, 12, 34, 56, tzinfo=timezone.utc)
+
+
+def test_cron_schedule_next_after():
+    assert CronSchedule.parse("*/15 * * * *").next_after(START) == START.replace(
+        minute=45, second=0
+    )
+    assert CronSchedule.parse("@daily").next_after(START) == datetime(
+        2026, 10, 20, tzinfo=timezone.utc
+    )
+    # Restricted day-of-month and day-of-week match if either does (Monday the 26th).
+    assert CronSchedule.parse("30 2 1 * 1").next_after(START).day == 26
+    assert CronSchedule.parse("0 0 29 2 *").next_after(START).year == 2028
+    with pytest.raises(ValueError):
+        CronSchedule.parse("61 * * * *")
+
+
+def test_rate_limiter_spaces_requests_per_host():
+    now = [0.0]
+    slept = []
+
+    def sleep(seconds):
+        slept.append(seconds)
+        now[0] += seconds
+
+    limiter = HostRateLimiter(
+        2.0, overrides={"fast.example": 0.0}, clock=lambda: now[0], sleep=sleep
+    )
+    for url in ["https://a.example/1", "https://fast.example/1", "https://a.example/2"]:
+        limiter.wait(url)
+        now[0] += 0.5
+    limiter.wait("https://fast.example/2")
+
+    assert slept == [1.0]
+
+
+class FakeSources:
+    def __init__(self, contents):
+        self.contents = contents
+        self.requests = []
+
+    def __call__(self, url, destination, *, etag=None, last_modified=None):
+        self.requests.append((url, etag))
+        body = self.contents[url]
+        if etag == f"v-{body}":
+            return FetchResult(url, None, etag, last_modified)
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        destination.write_text(body, encoding="utf-8")
+        return FetchResult(url, destination, f"v-{body}", None)
+
+
+def _scheduler(tmp_path: Path, fetch, monkeypatch, **kwargs):
+    extracted = []
+
+    def fake_extract(path, cache=None):
+        extracted.append(path.name)
+        return Extraction(path.read_text(encoding="utf-8"))
+
+    monkeypatch.setattr("ingestion.pipeline.extract_document", fake_extract)
+    config = IngestionConfig(
+        sources=["https://a.example/one.txt", "https://b.example/two.txt"],
+        output_dir=tmp_path / "raw",
+        metadata_dir=tmp_path / "meta",
+        schedule="0 * * * *",
+    )
+    limiter = HostRateLimiter(0.0)
+    return IngestionScheduler(config, fetch=fetch, rate_limiter=limiter, **kwargs), extracted
+
+
+def test_incremental_runs_only_process_changed_sources(tmp_path, monkeypatch):
+    sources = FakeSources({"https://a.example/one.txt": "one", "https://b.example/two.txt": "two"})
+    scheduler, extracted = _scheduler(tmp_path, sources, monkeypatch)
+
+    first = scheduler.run_once()
+    second = scheduler.run_once()
+    sources.contents["https://b.example/two.txt"] = "two, revised"
+    third = scheduler.run_once()
+
+    assert [first.status, second.status, third.status] == ["ok", "ok", "ok"]
+    assert extracted == ["one.txt", "two.txt", "two.txt"]
+    assert second.changed == [] and third.changed == ["https://b.example/two.txt"]
+    assert ("https://a.example/one.txt", "v-one") in sources.requests
+    assert (tmp_path / "raw" / "ingestion.parquet").exists()
+    history = scheduler.history()
+    assert [record.run_id for record in history] == [third.run_id, second.run_id, first.run_id]
+    assert all(record.duration_seconds is not None for record in history)
+
+
+def test_overlapping_run_is_skipped_and_errors_are_recorded(tmp_path, monkeypatch):
+    def failing(url, destination, **kwargs):
+        raise OSError("unreachable")
+
+    scheduler, _ = _scheduler(tmp_path, failing, monkeypatch)
+    other = RunLock(scheduler.lock.path)
+    assert other.acquire()
+    try:
+        assert scheduler.run_once().status == "skipped"
+    finally:
+        other.release()
+
+    record = scheduler.run_once()
+    assert record.status == "partial"
+    assert record.errors["https://a.example/one.txt"] == "OSError: unreachable"
+
+
+def test_serve_waits_for_schedule_with_jitter(tmp_path, monkeypatch):
+    now = [START]
+    delays = []
+
+    def sleep(seconds):
+        delays.append(seconds)
+        now[0] += timedelta(seconds=seconds)
+
+    sources = FakeSources({"https://a.example/one.txt": "one", "https://b.example/two.txt": "two"})
+    scheduler, _ = _scheduler(
+        tmp_path,
+        sources,
+        monkeypatch,
+        jitter_seconds=30.0,
+        clock=lambda: now[0],
+        sleep=sleep,
+        rng=random.Random(1),
+    )
+    scheduler.serve(max_runs=2)
+
+    assert len(scheduler.history()) == 2
+    assert 25 * 60 + 4 <= delays[0] <= 25 * 60 + 34
+    assert now[0].hour == 14 and now[0].minute == 0
+
+
+def test_failed_extraction_is_recorded_and_retried(tmp_path, monkeypatch):
+    sources = FakeSources({"https://a.example/one.txt": "one", "https://b.example/two.txt": "two"})
+    scheduler, extracted = _scheduler(tmp_path, sources, monkeypatch)
+    working = pipeline.extract_document
+
+    def flaky(path, cache=None):
+        if path.name == "two.txt":
+            raise ValueError("corrupt")
+        return working(path, cache)
+
+    monkeypatch.setattr("ingestion.pipeline.extract_document", flaky)
+    first = scheduler.run_once()
+    monkeypatch.setattr("ingestion.pipeline.extract_document", working)
+    second = scheduler.run_once()
+
+    assert first.status == "partial"
+    assert first.errors == {"https://b.example/two.txt": "ValueError: corrupt"}
+    assert second.status == "ok" and second.changed == ["https://b.example/two.txt"]
+    failed = scheduler.store.documents(status="failed")
+    assert [document.source for document in failed] == ["https://b.example/two.txt"]
@@ -0,0 +1,38 @@
+from processing.cleanup import normalize_paragraphs
+from processing.segmentation import segment_text
+
+
+def test_normalize_paragraphs_keeps_blank_line_breaks():
+    raw = "  Title\tline\r\nwraps here \n \n\n Body­ text.\r\n\r\nLast "
+
+    assert normalize_paragraphs(raw) == "Title line wraps here\n\nBody text.\n\nLast"
+    assert normalize_paragraphs(" \n\n ") == ""
+
+
+def test_segment_text_splits_on_paragraphs_with_exact_offsets():
+    text = normalize_paragraphs("First paragraph.\nStill first.\n\nSecond one.\n\n\nThird.")
+
+    segments = list(segment_text(text, max_length=80))
+
+    assert [segment.text for segment in segments] == [
+        "First paragraph. Still first.",
+        "Second one.",
+        "Third.",
+    ]
+    assert all(text[s.start : s.end] == s.text for s in segments)
+
+
+def test_segment_text_packs_sentences_and_cuts_long_ones():
+    sentences = "Alpha beta gamma. Delta epsilon zeta. Eta theta iota."
+    long_sentence = " ".join(["word"] * 30)
+    text = f"{sentences}\n\n{long_sentence}"
+
+    segments = list(segment_text(text, max_length=40))
+
+    assert [segment.text for segment in segments[:2]] == [
+        "Alpha beta gamma. Delta epsilon zeta.",
+        "Eta theta iota.",
+    ]
+    assert all(len(segment.text) <= 40 for segment in segments)
+    assert all(text[s.start : s.end] == s.text for s in segments)
+    assert " ".join(segment.text for segment in segments[2:]) == long_sentence
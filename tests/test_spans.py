@@ -0,0 +1,61 @@
+import numpy as np
+
+from processing.corpus import CorpusStore
+from processing.spans import SpanRequest, localize_spans, sentence_spans, sentence_windows
+
+TEXT = "Keys rotate yearly.  Data is encrypted at rest. Logs are kept!\nBackups run daily"
+
+
+def _sentences(spans):
+    return [TEXT[start:end] for start, end in spans]
+
+
+def test_sentence_spans_are_trimmed_and_bounded():
+    assert _sentences(sentence_spans(TEXT)) == [
+        "Keys rotate yearly.",
+        "Data is encrypted at rest.",
+        "Logs are kept!",
+        "Backups run daily",
+    ]
+    assert _sentences(sentence_spans(TEXT, 20, 62)) == [
+        "Data is encrypted at rest.",
+        "Logs are kept!",
+    ]
+    assert _sentences(sentence_windows(TEXT, sentences=3))[-1] == (
+        "Data is encrypted at rest. Logs are kept!\nBackups run daily"
+    )
+
+
+def test_localize_spans_encodes_windows_once():
+    calls = []
+
+    def encode(texts):
+        calls.append(texts)
+        return np.array([[1.0, 0.0] if "encrypted" in text else [0.0, 1.0] for text in texts])
+
+    queries = np.array([[1.0, 0.0], [0.0, 1.0]])
+    requests = [SpanRequest(0, TEXT), SpanRequest(1, TEXT), SpanRequest(1, TEXT, 48, 62)]
+
+    spans = localize_spans(encode, queries, requests, sentences=1)
+
+    assert len(calls) == 1 and len(calls[0]) == 5
+    assert _sentences(spans) == [
+        "Data is encrypted at rest.",
+        "Keys rotate yearly.",
+        "Logs are kept!",
+    ]
+
+
+def test_localize_spans_reads_ranges_from_the_corpus(tmp_path):
+    corpus = CorpusStore(tmp_path, block_chars=16)
+    corpus.add("doc", "Preamble text. " + TEXT)
+
+    def encode(texts):
+        return np.array([[1.0, 0.0] if "encrypted" in text else [0.0, 1.0] for text in texts])
+
+    requests = [SpanRequest(0, None, 15, None, document="doc")]
+    ((start, end),) = localize_spans(
+        encode, np.array([[1.0, 0.0]]), requests, sentences=1, corpus=corpus
+    )
+
+    assert corpus.excerpt("doc", start, end) == "Data is encrypted at rest."
@@ -0,0 +1,32 @@
+import json
+import subprocess
+import sys
+
+HEAVY_MODULES = ("torch", "sentence_transformers", "qdrant_client", "pandas", "pdfplumber")
+
+
+def _loaded_heavy_modules(code: str) -> list[str]:
+    probe = (
+        f"{code}\n"
+        "import json, sys\n"
+        f"print(json.dumps([name for name in {HEAVY_MODULES!r} if name in sys.modules]))\n"
+    )
+    completed = subprocess.run(
+        [sys.executable, "-c", probe], capture_output=True, text=True, check=True
+    )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def test_api_import_defers_ml_and_vector_dependencies():
+    assert _loaded_heavy_modules("import api.app") == []
+
+
+def test_processing_package_import_is_lightweight():
+    assert _loaded_heavy_modules("import processing\nfrom processing import chunk_text") == []
+
+
+def test_processing_lazy_attributes_resolve():
+    import processing
+    from processing.matching import RelationshipMatcher
+
+    assert processing.RelationshipMatcher is RelationshipMatcher
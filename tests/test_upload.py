@@ -0,0 +1,448 @@
+import asyncio
+import zlib
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import NullPool
+
+import api.upload as upload
+from api.models import Base, CloudGuidelineSection, Match, RegulationSection
+from processing.embeddings import EmbeddingCache
+from processing.rerank import CrossEncoderReranker
+
+
+class HashingModel:
+    """Deterministic bag-of-words encoder that records what it was asked to embed."""
+
+    def __init__(self):
+        self.calls: list[list[str]] = []
+
+    def encode(self, texts, **_):
+        self.calls.append(list(texts))
+        vectors = np.zeros((len(texts), 64), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for token in text.lower().split():
+                vectors[row, zlib.crc32(token.encode()) % 64] += 1.0
+        return vectors
+
+
+@pytest.fixture
+def model(monkeypatch):
+    fake = HashingModel()
+    monkeypatch.setattr(upload, "_embedding_model", fake)
+    monkeypatch.setattr(upload, "_embedding_cache", EmbeddingCache())
+    monkeypatch.setattr(upload, "extract_text", lambda path: path.read_text(encoding="utf-8"))
+    return fake
+
+
+@pytest.fixture
+def database(tmp_path):
+    path = tmp_path / "upload.db"
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    yield path, engine
+    engine.dispose()
+
+
+def _ingest(database_path, file_path, **kwargs):
+    async def run():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{database_path}", poolclass=NullPool)
+        factory = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+        async with factory() as session:
+            summary = await upload.ingest_uploaded_document(session, file_path=file_path, **kwargs)
+        await engine.dispose()
+        return summary
+
+    return asyncio.run(run())
+
+
+SEGMENTS = [
+    "encryption of customer data at rest with managed keys",
+    "audit logging retained for twelve months in storage",
+    "incident notification to customers within three days",
+]
+
+
+def _write(tmp_path, name, segments, width=59):
+    # Segments are padded to ``width`` characters so that max_segment_length=width + 2
+    # slices the text exactly at the joining spaces.
+    path = tmp_path / name
+    path.write_text(" ".join(segment.ljust(width, ".") for segment in segments), encoding="utf-8")
+    return path
+
+
+def test_reupload_only_recomputes_changed_sections(tmp_path, database, model):
+    database_path, engine = database
+    with Session(engine) as session:
+        session.add_all(
+            CloudGuidelineSection(external_id=f"g-{index}", title=f"G{index}", body=segment)
+            for index, segment in enumerate(SEGMENTS)
+        )
+        session.commit()
+    options = dict(
+        category="regulation",
+        title="Regulation",
+        language="en",
+        document_key="reg-a",
+        max_segment_length=61,
+        similarity_threshold=0.5,
+        top_k=1,
+    )
+
+    first = _ingest(database_path, _write(tmp_path, "v1.txt", SEGMENTS), **options)
+    assert (first.sections_created, first.sections_unchanged) == (3, 0)
+    with Session(engine) as session:
+        kept = session.scalars(select(Match).order_by(Match.id)).first()
+        kept.status = "approved"
+        session.commit()
+        kept_id = kept.id
+
+    revised = SEGMENTS[:2] + ["breach notification to supervisory authorities within hours"]
+    model.calls.clear()
+    second = _ingest(database_path, _write(tmp_path, "v2.txt", revised), **options)
+
+    assert (second.sections_created, second.sections_unchanged, second.sections_superseded) == (
+        1,
+        2,
+        1,
+    )
+    encoded = [text for call in model.calls for text in call]
+    assert encoded == [revised[2].ljust(59, ".")]
+    with Session(engine) as session:
+        active = session.scalars(
+            select(RegulationSection).where(RegulationSection.superseded_at.is_(None))
+        ).all()
+        assert sorted(section.version for section in active) == [1, 1, 2]
+        assert session.get(Match, kept_id).status == "approved"
+        stale = session.scalars(
+            select(Match)
+            .join(RegulationSection, Match.regulation_id == RegulationSection.id)
+            .where(RegulationSection.superseded_at.is_not(None))
+        ).all()
+        assert all(match.status != "pending" for match in stale)
+
+
+def test_match_spans_survive_reuploads_that_move_sections(tmp_path, database, model):
+    database_path, engine = database
+    preface = "preface describing the scope of this document for readers"
+    common = dict(language="en", max_segment_length=61, similarity_threshold=0.5, top_k=1)
+    guideline = dict(category="guideline", title="Guideline", document_key="gl", **common)
+    regulation = dict(category="regulation", title="Regulation", document_key="reg", **common)
+
+    _ingest(database_path, _write(tmp_path, "g1.txt", SEGMENTS[:1]), **guideline)
+    _ingest(database_path, _write(tmp_path, "r1.txt", SEGMENTS[:1]), **regulation)
+    # Both documents gain a leading paragraph, so their unchanged sections move.
+    _ingest(database_path, _write(tmp_path, "g2.txt", [preface, SEGMENTS[0]]), **guideline)
+    _ingest(database_path, _write(tmp_path, "r2.txt", [preface, SEGMENTS[0]]), **regulation)
+
+    with Session(engine) as session:
+        matches = session.scalars(select(Match)).all()
+        assert matches
+        for match in matches:
+            guideline_body = session.get(CloudGuidelineSection, match.guideline_id).body
+            regulation_body = session.get(RegulationSection, match.regulation_id).body
+            for body, start, end in (
+                (guideline_body, match.guideline_span_start, match.guideline_span_end),
+                (regulation_body, match.regulation_span_start, match.regulation_span_end),
+            ):
+                assert 0 <= start < end <= len(body)
+        moved = session.scalars(
+            select(CloudGuidelineSection).where(CloudGuidelineSection.body.startswith("encryption"))
+        ).one()
+        assert moved.span_start == 60 and moved.version == 1
+        first = session.scalars(select(Match).where(Match.guideline_id == moved.id)).first()
+        assert (first.guideline_span_start, first.guideline_span_end) == (0, 59)
+
+
+def test_embedding_cache_encodes_each_text_once():
+    model = HashingModel()
+    cache = EmbeddingCache(max_entries=2)
+
+    first = cache.encode(model, ["a b", "c d", "a b"])
+    second = cache.encode(model, ["c d"])
+
+    assert model.calls == [["a b", "c d"]]
+    assert np.array_equal(first[1], second[0])
+    assert (cache.hits, cache.misses) == (2, 2)
+
+
+def test_near_duplicate_segments_are_collapsed_before_encoding(tmp_path, database, model):
+    database_path, engine = database
+    with Session(engine) as session:
+        session.add(CloudGuidelineSection(external_id="g-0", title="G0", body=SEGMENTS[0]))
+        session.commit()
+    notice = (
+        "this document is confidential and is provided solely for the internal use of the "
+        "customer and may not be disclosed to any third party without written consent"
+    )
+    segments = [notice, SEGMENTS[1], notice + " inc", SEGMENTS[2]]
+    path = _write(tmp_path, "boilerplate.txt", segments, width=179)
+
+    summary = _ingest(
+        database_path,
+        path,
+        category="regulation",
+        title="Regulation",
+        language="en",
+        max_segment_length=181,
+    )
+
+    assert (summary.sections_created, summary.duplicates_collapsed) == (3, 1)
+    assert len(model.calls[-1]) == 3
+    text = path.read_text(encoding="utf-8")
+    with Session(engine) as session:
+        canonical = session.scalars(
+            select(RegulationSection).order_by(RegulationSection.id)
+        ).first()
+        [span] = canonical.duplicate_spans
+        assert text[span["start"] : span["end"]] == segments[2].ljust(179, ".")
+
+
+def test_reranker_replaces_confidence_of_upload_matches(tmp_path, database, model, monkeypatch):
+    database_path, engine = database
+    with Session(engine) as session:
+        session.add(CloudGuidelineSection(external_id="g-0", title="G0", body=SEGMENTS[0]))
+        session.commit()
+    cross_encoder = SimpleNamespace(predict=lambda pairs, **_: [3.0] * len(pairs))
+    monkeypatch.setattr(upload, "_reranker", CrossEncoderReranker(model=cross_encoder))
+
+    summary = _ingest(
+        database_path,
+        _write(tmp_path, "reg.txt", SEGMENTS[:1]),
+        category="regulation",
+        title="Regulation",
+        language="en",
+        max_segment_length=61,
+    )
+
+    assert summary.matches_created == 1
+    with Session(engine) as session:
+        match = session.scalars(select(Match)).one()
+        assert match.confidence == pytest.approx(0.953, abs=1e-3)
+        assert match.score < match.confidence
+
+
+def test_long_sections_are_windowed_and_matched_to_their_tail(
+    tmp_path, database, model, monkeypatch
+):
+    database_path, engine = database
+    filler = " ".join(f"filler{index}" for index in range(40))
+    body = f"{filler} {SEGMENTS[0]}"
+    with Session(engine) as session:
+        session.add(
+            RegulationSection(
+                external_id="r-long", title="R", body=body, region="EU", regulation_type="law"
+            )
+        )
+        session.commit()
+    monkeypatch.setattr(upload, "EMBEDDING_WINDOW_WORDS", 9)
+
+    summary = _ingest(
+        database_path,
+        _write(tmp_path, "guideline.txt", SEGMENTS[:1]),
+        category="guideline",
+        title="Guideline",
+        language="en",
+        max_segment_length=61,
+        similarity_threshold=0.3,
+    )
+
+    assert summary.matches_created == 1
+    with Session(engine) as session:
+        match = session.scalars(select(Match)).one()
+        assert body[match.regulation_span_start : match.regulation_span_end] == SEGMENTS[0]
+
+
+def test_matches_point_at_the_best_sentence_of_the_section(tmp_path, database, model):
+    database_path, engine = database
+    body = (
+        "Operators must appoint a security officer. "
+        "Contracts are reviewed every year by counsel. "
+        f"{SEGMENTS[1].capitalize()}. "
+        "Suppliers sign a code of conduct."
+    )
+    with Session(engine) as session:
+        session.add(
+            RegulationSection(
+                external_id="r-1", title="R", body=body, region="EU", regulation_type="law"
+            )
+        )
+        session.commit()
+
+    _ingest(
+        database_path,
+        _write(tmp_path, "guideline.txt", SEGMENTS[1:2]),
+        category="guideline",
+        title="Guideline",
+        language="en",
+        max_segment_length=61,
+        similarity_threshold=0.3,
+    )
+
+    with Session(engine) as session:
+        match = session.scalars(select(Match)).one()
+        located = body[match.regulation_span_start : match.regulation_span_end]
+        assert SEGMENTS[1].capitalize() in located
+        assert "security officer" not in located
+        assert match.regulation_excerpt == located
+
+
+def test_guideline_upload_matches_only_requested_region(tmp_path, database, model):
+    database_path, engine = database
+    with Session(engine) as session:
+        session.add_all(
+            RegulationSection(
+                external_id=f"r-{region}",
+                title=region,
+                body=SEGMENTS[0],
+                region=region,
+                regulation_type="law",
+            )
+            for region in ("EU", "US")
+        )
+        session.commit()
+
+    summary = _ingest(
+        database_path,
+        _write(tmp_path, "guideline.txt", SEGMENTS[:1]),
+        category="guideline",
+        title="Guideline",
+        language="en",
+        region="EU",
+        max_segment_length=61,
+    )
+
+    assert summary.matches_created == 1
+    with Session(engine) as session:
+        match = session.scalars(select(Match)).one()
+        assert session.get(RegulationSection, match.regulation_id).region == "EU"
+
+
+def test_uploads_are_stored_in_the_corpus_and_matched_from_it(
+    tmp_path, database, model, monkeypatch
+):
+    database_path, _ = database
+    monkeypatch.setenv("CORPUS_DIR", str(tmp_path / "corpus"))
+    text = (
+        "Operators must appoint a security officer. "
+        f"{SEGMENTS[1].capitalize()}. Suppliers sign a code of conduct.\n\n"
+        "Contracts are reviewed every year by counsel."
+    )
+    regulation_file = tmp_path / "regulation.txt"
+    regulation_file.write_text(text, encoding="utf-8")
+    options = dict(language="en", max_segment_length=400, similarity_threshold=0.3)
+
+    regulation = _ingest(
+        database_path,
+        regulation_file,
+        category="regulation",
+        title="Regulation",
+        document_key="reg-b",
+        **options,
+    )
+    guideline = _ingest(
+        database_path,
+        _write(tmp_path, "guideline.txt", SEGMENTS[1:2]),
+        category="guideline",
+        title="Guideline",
+        **options,
+    )
+
+    corpus = upload.default_corpus()
+    assert regulation.corpus_key == "reg-b" and corpus.text("reg-b") == text
+    assert guideline.corpus_key.startswith("upload/") and guideline.corpus_key in corpus
+    reads = corpus.blocks_read
+    _ingest(
+        database_path,
+        _write(tmp_path, "guideline-2.txt", SEGMENTS[1:2], width=60),
+        category="guideline",
+        title="Guideline 2",
+        **options,
+    )
+    assert corpus.blocks_read > reads
+    with Session(database[1]) as session:
+        for match in session.scalars(select(Match)):
+            section = session.get(RegulationSection, match.regulation_id)
+            located = section.body[match.regulation_span_start : match.regulation_span_end]
+            assert SEGMENTS[1].capitalize() in located and "security officer" not in located
+
+
+def test_failed_upload_leaves_the_corpus_at_the_committed_revision(
+    tmp_path, database, model, monkeypatch
+):
+    database_path, engine = database
+    monkeypatch.setenv("CORPUS_DIR", str(tmp_path / "corpus"))
+    options = dict(
+        category="regulation",
+        title="Regulation",
+        document_key="reg-c",
+        language="en",
+        max_segment_length=61,
+    )
+    first = _write(tmp_path, "v1.txt", SEGMENTS[:2])
+    _ingest(database_path, first, **options)
+
+    async def fail(*args, **kwargs):
+        raise RuntimeError("matching failed")
+
+    monkeypatch.setattr(upload, "_match_new_regulations", fail)
+    with pytest.raises(RuntimeError):
+        _ingest(database_path, _write(tmp_path, "v2.txt", SEGMENTS[::-1]), **options)
+
+    # The rolled-back revision never reached the corpus, so spans still describe it.
+    text = upload.default_corpus().text("reg-c")
+    assert text == first.read_text(encoding="utf-8")
+    with Session(engine) as session:
+        for section in session.scalars(select(RegulationSection)):
+            assert text[section.span_start : section.span_end] == section.body
+
+
+def test_uploads_keep_coverage_counters_in_sync(tmp_path, database, model):
+    from api.coverage import rebuild_coverage
+    from api.models import CoverageSummary, RegulationCoverage
+
+    database_path, engine = database
+    options = dict(language="en", max_segment_length=61, similarity_threshold=0.5, top_k=2)
+    regulation = dict(category="regulation", title="Regulation", region="EU", **options)
+    _ingest(database_path, _write(tmp_path, "v1.txt", SEGMENTS), document_key="reg", **regulation)
+    _ingest(
+        database_path,
+        _write(tmp_path, "guideline.txt", SEGMENTS[:2]),
+        category="guideline",
+        title="Guideline",
+        **options,
+    )
+    revised = SEGMENTS[:2] + ["breach notification to supervisory authorities within hours"]
+    _ingest(database_path, _write(tmp_path, "v2.txt", revised), document_key="reg", **regulation)
+
+    def snapshot():
+        with Session(engine) as session:
+            return (
+                sorted(
+                    (row.regulation_id, row.matches, row.pending, row.approved)
+                    for row in session.scalars(select(RegulationCoverage))
+                ),
+                [
+                    (row.region, row.regulations, row.matched_regulations, row.matches)
+                    for row in session.scalars(select(CoverageSummary))
+                ],
+            )
+
+    incremental = snapshot()
+    assert incremental[1] == [("EU", 3, 2, 2)]
+
+    async def rebuild():
+        async_engine = create_async_engine(
+            f"sqlite+aiosqlite:///{database_path}", poolclass=NullPool
+        )
+        async with AsyncSession(async_engine) as session:
+            await rebuild_coverage(session)
+            await session.commit()
+        await async_engine.dispose()
+
+    asyncio.run(rebuild())
+    assert snapshot() == incremental
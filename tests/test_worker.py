@@ -0,0 +1,174 @@
+import json
+import sqlite3
+import time
+
+import pytest
+
+from processing.queue import WorkQueue
+from processing.worker import (
+    WorkerConfig,
+    discover_inputs,
+    main,
+    plan_tasks,
+    read_records,
+    run,
+    work,
+)
+
+
+class FileSink:
+    """Vector sink that appends upserted chunks to a JSONL file next to the queue."""
+
+    def __init__(self, config):
+        self.path = config.queue_path.with_suffix(".points")
+
+    def upsert(self, texts, metadata, *, ids=None):
+        with self.path.open("a", encoding="utf-8") as handle:
+            for point_id, payload in zip(ids, metadata, strict=True):
+                handle.write(json.dumps({"id": point_id, "text": payload["text"]}) + "\n")
+
+
+def _write_jsonl(path, count):
+    lines = [
+        json.dumps({"text": f"Record   number {index}.", "source": "s"}) for index in range(count)
+    ]
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+def test_plan_tasks_splits_jsonl_into_readable_ranges(tmp_path):
+    source = tmp_path / "doc.jsonl"
+    _write_jsonl(source, 5)
+
+    tasks = list(plan_tasks(source, batch_size=2))
+
+    assert len(tasks) == 3
+    records = [record for _, payload in tasks for record in read_records(payload)]
+    assert [record["text"] for record in records][-1] == "Record   number 4."
+    assert discover_inputs([tmp_path]) == [source]
+
+
+def test_queue_leases_expire_and_tasks_retry(tmp_path):
+    queue = WorkQueue(tmp_path / "queue.db", max_attempts=2)
+    queue.enqueue([("a", {}), ("b", {})])
+    assert queue.enqueue([("a", {})]) == 0
+
+    assert queue.claim("w1", lease_seconds=-1).id == "a"
+    reclaimed = queue.claim("w2")
+    assert (reclaimed.id, reclaimed.attempts) == ("a", 2)
+    assert queue.claim("w3").id == "b"
+    assert not queue.complete("a", "w1")
+    queue.fail("a", "w2", "boom")
+
+    assert queue.counts() == {"failed": 1, "leased": 1}
+    queue.close()
+
+
+def test_expired_lease_on_the_last_attempt_fails_the_task(tmp_path):
+    queue = WorkQueue(tmp_path / "queue.db", max_attempts=2)
+    queue.enqueue([("a", {})])
+    queue.claim("w1", lease_seconds=-1)
+    queue.claim("w2", lease_seconds=-1)  # both workers died without calling fail
+
+    assert queue.claim("w3") is None
+    assert queue.counts() == {"failed": 1}
+    error = queue._connection.execute("SELECT error FROM tasks").fetchone()[0]
+    assert "lease expired" in error
+    queue.close()
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_run_processes_every_record_once_and_resumes(tmp_path, workers):
+    inputs = tmp_path / "raw"
+    inputs.mkdir()
+    for name in ("a", "b"):
+        _write_jsonl(inputs / f"{name}.jsonl", 7)
+    config = WorkerConfig(queue_path=tmp_path / "queue.db", workers=workers, batch_size=3)
+
+    summary = run([inputs], config, sink_factory=FileSink)
+    again = run([inputs], config, sink_factory=FileSink)
+
+    assert summary["tasks"] == {"done": 6}
+    assert (summary["records"], summary["chunks"]) == (14, 14)
+    assert again["queued"] == 0
+    points = [json.loads(line) for line in (tmp_path / "queue.points").read_text().splitlines()]
+    assert len({point["id"] for point in points}) == len(points) == 14
+    assert "Record number 0." in {point["text"] for point in points}
+    with sqlite3.connect(tmp_path / "queue.db") as connection:
+        assert connection.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+
+def test_long_tasks_keep_their_lease_while_processing(tmp_path):
+    source = tmp_path / "doc.jsonl"
+    _write_jsonl(source, 2)
+    config = WorkerConfig(queue_path=tmp_path / "queue.db", lease_seconds=0.3)
+    queue = WorkQueue(config.queue_path)
+    queue.enqueue(plan_tasks(source, batch_size=2))
+    stolen = []
+
+    class SlowSink:
+        def upsert(self, texts, metadata, *, ids=None):
+            time.sleep(0.8)  # well past the lease
+            stolen.append(queue.claim("other"))
+
+    assert work(config, owner="w1", sink=SlowSink()) == 1
+    assert stolen == [None]
+    assert queue.counts() == {"done": 1}
+    queue.close()
+
+
+def test_worker_points_are_found_by_filtered_matching(tmp_path):
+    from qdrant_client import QdrantClient
+    from qdrant_client.http.models import Batch, Distance, VectorParams
+
+    from processing.matching import RelationshipMatcher, payload_filter
+
+    class QdrantSink:
+        def __init__(self):
+            self.client = QdrantClient(location=":memory:")
+            self.client.create_collection(
+                "regs", vectors_config=VectorParams(size=2, distance=Distance.COSINE)
+            )
+
+        def upsert(self, texts, metadata, *, ids=None):
+            vectors = [[1.0, 0.0]] * len(texts)
+            self.client.upsert(
+                "regs", points=Batch(ids=list(ids), vectors=vectors, payloads=list(metadata))
+            )
+
+    source = tmp_path / "regs.jsonl"
+    source.write_text(
+        json.dumps({"text": "Encrypt personal data.", "source": "eu"})
+        + "\n"
+        + json.dumps({"text": "Encrypt health data.", "source": "us", "region": "US"})
+        + "\n",
+        encoding="utf-8",
+    )
+    config = WorkerConfig(
+        queue_path=tmp_path / "queue.db",
+        payload_defaults={"region": "EU", "regulation_type": "law", "language": "en"},
+    )
+    queue = WorkQueue(config.queue_path)
+    queue.enqueue(plan_tasks(source, batch_size=10))
+    queue.close()
+    sink = QdrantSink()
+
+    assert work(config, owner="w1", sink=sink) == 1
+
+    matcher = RelationshipMatcher(client=sink.client, collection_name="regs")
+    results = matcher.match(
+        [{"id": "g1"}],
+        embedding_lookup=lambda _: [1.0, 0.0],
+        rationale_fn=lambda chunk, payload: payload["source"],
+        filters=payload_filter(region="EU", regulation_type="law", language="en"),
+    )
+    assert [result.rationale for result in results] == ["eu"]
+
+
+def test_cli_exits_cleanly_without_inputs(tmp_path, capsys):
+    with pytest.raises(SystemExit) as missing:
+        main([str(tmp_path / "missing"), "--queue", str(tmp_path / "queue.db")])
+    assert missing.value.code == 2 and "Input not found" in capsys.readouterr().err
+
+    with pytest.raises(SystemExit) as empty:
+        main([str(tmp_path), "--queue", str(tmp_path / "queue.db")])
+    assert empty.value.code == 1 and "No JSONL files" in capsys.readouterr().err